@@ -1,3 +1,14 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ApiKey
+
+
+@admin.register(ApiKey)
+class ApiKeyAdmin(admin.ModelAdmin):
+    fields = ('name', 'prefix', 'scopes', 'is_active', 'created_at')
+    readonly_fields = ('prefix', 'created_at')
+    list_display = ('name', 'prefix', 'scopes', 'is_active', 'created_at')
+
+    def has_add_permission(self, request):
+        # ключ показывается только при создании командой create_api_key
+        return False
@@ -0,0 +1,34 @@
+from django.contrib.auth.models import AnonymousUser
+from django.utils.translation import gettext_lazy as _
+from rest_framework import authentication, exceptions
+
+from .models import ApiKey
+
+
+class ApiKeyAuthentication(authentication.BaseAuthentication):
+    """
+    Аутентификация по ключу API из заголовка `Authorization: Api-Key <ключ>`.
+    Запрос выполняется от имени анонимного пользователя, а объект ключа
+    доступен в request.auth.
+    """
+    keyword = 'Api-Key'
+
+    def authenticate(self, request):
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed(_('Invalid API key header.'))
+
+        try:
+            key = header[1].decode('ascii')
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed(_('Invalid API key header.'))
+
+        api_key = ApiKey.get_by_key(key)
+        if api_key is None:
+            raise exceptions.AuthenticationFailed(_('Invalid API key.'))
+        return AnonymousUser(), api_key
+
+    def authenticate_header(self, request):
+        return self.keyword
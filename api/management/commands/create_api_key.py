@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api.models import ApiKey
+
+
+class Command(BaseCommand):
+    help = 'Создает ключ API и выводит его. Ключ нельзя получить повторно.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help='Название внешней системы')
+        parser.add_argument(
+            '--scope',
+            action='append',
+            default=[],
+            help='Доступное ключу действие, например offers.export'
+        )
+
+    def handle(self, *args, **options):
+        _, key = ApiKey.generate(options['name'], options['scope'])
+        self.stdout.write(key)
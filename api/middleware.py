@@ -0,0 +1,123 @@
+"""
+Сжатие ответов с учетом заголовка Accept-Encoding.
+
+Поддерживаются brotli (если установлен пакет brotli) и gzip; при равных
+весах в Accept-Encoding предпочтение отдается brotli. Небольшие ответы
+(меньше API_COMPRESSION_MIN_SIZE байт) не сжимаются: выигрыш в размере
+не окупает затрат на сжатие. Не сжимаются и изображения, которые уже
+сжаты, а также частичные ответы на запросы с заголовком Range.
+"""
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+INCOMPRESSIBLE_TYPES = ('image/', 'video/', 'audio/')
+
+ACCEPT_ENCODING_RE = re.compile(
+    r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def parse_accept_encoding(header):
+    """Возвращает словарь {кодировка: вес} из заголовка Accept-Encoding."""
+    weights = {}
+    for item in header.split(','):
+        match = ACCEPT_ENCODING_RE.match(item)
+        if match is None:
+            continue
+        coding, weight = match.groups()
+        try:
+            weights[coding.lower()] = float(weight) if weight else 1.0
+        except ValueError:
+            continue
+    return weights
+
+
+def get_supported_encodings():
+    if brotli is not None:
+        return ('br', 'gzip')
+    return ('gzip',)
+
+
+def choose_encoding(header):
+    weights = parse_accept_encoding(header)
+    best, best_weight = None, 0
+    for coding in get_supported_encodings():
+        weight = weights.get(coding, weights.get('*', 0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress_brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=settings.API_COMPRESSION_BROTLI_QUALITY)
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware:
+    """Сжимает ответы, если клиент поддерживает одну из кодировок."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if (response.has_header('Content-Encoding')
+                or response.has_header('Content-Range')
+                or response.get('Content-Type', '').startswith(
+                    INCOMPRESSIBLE_TYPES)):
+            return response
+        if (not response.streaming
+                and len(response.content) < settings.API_COMPRESSION_MIN_SIZE):
+            return response
+
+        # ответ зависит от Accept-Encoding, даже если он не будет сжат
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if encoding == 'br':
+                response.streaming_content = compress_brotli_sequence(
+                    response.streaming_content)
+            else:
+                response.streaming_content = compress_sequence(
+                    response.streaming_content)
+            # длина сжатого потока заранее неизвестна
+            del response['Content-Length']
+        else:
+            if encoding == 'br':
+                compressed = brotli.compress(
+                    response.content,
+                    quality=settings.API_COMPRESSION_BROTLI_QUALITY
+                )
+            else:
+                compressed = compress_string(response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(response.content))
+
+        # сжатое представление не совпадает побайтно с исходным, поэтому
+        # сильный ETag заменяется слабым, как в GZipMiddleware
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+
+        response['Content-Encoding'] = encoding
+        return response
@@ -1,3 +1,56 @@
+import hashlib
+import secrets
+import uuid
+
 from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+def hash_key(key):
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+class ApiKey(models.Model):
+    """
+    Ключ доступа к API для внешних систем. Хранится только хэш ключа, сам
+    ключ выдается один раз при создании (см. ApiKey.generate). Доступные
+    ключу действия перечислены в scopes через запятую.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(_('name'), max_length=100)
+    prefix = models.CharField(_('prefix'), max_length=8, editable=False)
+    key_hash = models.CharField(
+        _('key hash'),
+        max_length=64,
+        unique=True,
+        editable=False
+    )
+    scopes = models.CharField(_('scopes'), max_length=200, blank=True)
+    is_active = models.BooleanField(_('active'), default=True)
+    created_at = models.DateTimeField(_('created at'), auto_now_add=True)
+
+    class Meta:
+        verbose_name = _('API key')
+        verbose_name_plural = _('API keys')
+
+    @classmethod
+    def generate(cls, name, scopes=()):
+        """Создает ключ и возвращает пару (объект ключа, ключ)."""
+        key = secrets.token_urlsafe(32)
+        api_key = cls.objects.create(
+            name=name,
+            prefix=key[:8],
+            key_hash=hash_key(key),
+            scopes=','.join(scopes)
+        )
+        return api_key, key
+
+    @classmethod
+    def get_by_key(cls, key):
+        return cls.objects.filter(key_hash=hash_key(key), is_active=True).first()
+
+    def has_scope(self, scope):
+        return scope in {item.strip() for item in self.scopes.split(',')}
 
-# Create your models here.
+    def __str__(self):
+        return f'{self.name} ({self.prefix}...)'
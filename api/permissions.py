@@ -0,0 +1,16 @@
+from rest_framework import permissions
+
+from .models import ApiKey
+
+
+class HasApiKeyScope(permissions.BasePermission):
+    """
+    Разрешает запрос по ключу API, которому доступно действие
+    view.api_key_scope.
+    """
+
+    def has_permission(self, request, view):
+        return (
+            isinstance(request.auth, ApiKey)
+            and request.auth.has_scope(view.api_key_scope)
+        )
@@ -0,0 +1,85 @@
+"""
+Быстрое формирование JSON-ответов.
+
+Если установлен orjson, данные кодируются им, иначе - стандартным
+JSONRenderer. Результат в обоих случаях одинаков: типы, которые orjson
+кодирует иначе, чем DRF (дата и время), передаются кодировщику DRF.
+
+Постоянные части конверта ответа (см. Envelope) кодируются один раз при
+создании шаблона, и при каждом ответе кодируются только статус и тело.
+"""
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class Envelope(dict):
+    """
+    Данные ответа вида {"status": ..., "body": ..., <постоянные поля>}.
+    Это обычный словарь, но FastJSONRenderer берет постоянные поля в уже
+    закодированном виде из шаблона.
+    """
+
+    def __init__(self, template, status, body):
+        super().__init__(status=status, body=body)
+        self.update(template.static)
+        self.template = template
+
+
+class EnvelopeTemplate:
+    """Шаблон конверта с заранее закодированными постоянными полями."""
+
+    def __init__(self, static):
+        self.static = static
+        # '{"a":1,"b":2}' -> ',"a":1,"b":2}'
+        encoded = json.dumps(
+            static, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':'))
+        if static:
+            encoded = ',' + encoded[1:]
+        else:
+            encoded = '}'
+        self.encoded_tail = encoded.encode('utf-8')
+
+    def wrap(self, status, body):
+        return Envelope(self, status, body)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer, использующий orjson для компактного вывода."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        renderer_context = renderer_context or {}
+        if (orjson is None or data is None
+                or self.get_indent(accepted_media_type, renderer_context)):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if isinstance(data, Envelope):
+            ret = b''.join((
+                b'{"status":',
+                self.dumps(data['status']),
+                b',"body":',
+                self.dumps(data['body']),
+                data.template.encoded_tail,
+            ))
+        else:
+            ret = self.dumps(data)
+
+        # как и JSONRenderer, экранируем символы, недопустимые в JavaScript
+        return ret.replace(
+            '\u2028'.encode('utf-8'), b'\\u2028'
+        ).replace(
+            '\u2029'.encode('utf-8'), b'\\u2029'
+        )
+
+    def dumps(self, value):
+        return orjson.dumps(
+            value,
+            default=self.encoder_class().default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME
+        )
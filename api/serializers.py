@@ -0,0 +1,54 @@
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_QUERY_PARAM = 'fields'
+OMIT_QUERY_PARAM = 'omit'
+
+
+def parse_field_names(value):
+    if value is None:
+        return None
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+def get_sparse_fieldset(request, field_names, optional_fields=()):
+    """
+    Возвращает множество полей из field_names, выбранных параметрами запроса
+    `fields` и `omit` (названия полей через запятую), или None, если
+    выбраны все поля. Поля из optional_fields выводятся, только если они
+    явно перечислены в `fields`. Неизвестные названия полей игнорируются.
+    Ограничение действует только для запросов на чтение.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+
+    fields = parse_field_names(request.query_params.get(FIELDS_QUERY_PARAM))
+    omit = parse_field_names(request.query_params.get(OMIT_QUERY_PARAM))
+    optional_fields = set(optional_fields) & set(field_names)
+    if fields is None and omit is None and not optional_fields:
+        return None
+
+    selected = set(field_names)
+    if fields is not None:
+        selected &= fields
+    else:
+        selected -= optional_fields
+    if omit is not None:
+        selected -= omit
+    return selected
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    Сериализатор, выводящий только поля, выбранные параметрами запроса
+    `fields` и `omit`. Запрос берется из контекста сериализатора. Поля из
+    optional_fields выводятся, только если они запрошены явно.
+    """
+    optional_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fieldset = get_sparse_fieldset(
+            self.context.get('request'), self.fields, self.optional_fields)
+        if fieldset is not None:
+            for name in set(self.fields) - fieldset:
+                self.fields.pop(name)
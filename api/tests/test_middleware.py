@@ -0,0 +1,71 @@
+import gzip
+
+import pytest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from api import middleware
+from api.middleware import CompressionMiddleware, choose_encoding
+
+LARGE_CONTENT = b'{"results":[' + b'{"title":"offer"},' * 200 + b'{}]}'
+
+
+def get_response(content, accept_encoding, streaming=False):
+    request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+
+    def view(request):
+        if streaming:
+            return StreamingHttpResponse(iter([content]))
+        response = HttpResponse(content, content_type='application/json')
+        response['ETag'] = '"abc"'
+        return response
+
+    return CompressionMiddleware(view)(request)
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, deflate', 'gzip'),
+    ('gzip;q=0, identity', None),
+    ('identity', None),
+    ('*', 'gzip'),
+    ('', None),
+])
+def test_choose_encoding(monkeypatch, header, expected):
+    monkeypatch.setattr(middleware, 'brotli', None)
+
+    assert choose_encoding(header) == expected
+
+
+def test_gzip(monkeypatch):
+    monkeypatch.setattr(middleware, 'brotli', None)
+
+    response = get_response(LARGE_CONTENT, 'gzip')
+
+    assert response['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.content) == LARGE_CONTENT
+    assert response['ETag'] == 'W/"abc"'
+    assert 'Accept-Encoding' in response['Vary']
+
+
+def test_gzip_streaming(monkeypatch):
+    monkeypatch.setattr(middleware, 'brotli', None)
+
+    response = get_response(LARGE_CONTENT, 'gzip', streaming=True)
+
+    assert response['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(b''.join(response.streaming_content)) == LARGE_CONTENT
+
+
+def test_small_response_is_not_compressed():
+    response = get_response(b'{}', 'gzip, br')
+
+    assert not response.has_header('Content-Encoding')
+    assert response.content == b'{}'
+
+
+@pytest.mark.skipif(middleware.brotli is None, reason='brotli не установлен')
+def test_brotli():
+    response = get_response(LARGE_CONTENT, 'gzip, br')
+
+    assert response['Content-Encoding'] == 'br'
+    assert middleware.brotli.decompress(response.content) == LARGE_CONTENT
@@ -0,0 +1,43 @@
+import datetime
+import decimal
+import uuid
+
+import pytest
+from django.utils.translation import gettext_lazy as _
+from rest_framework.renderers import JSONRenderer
+
+from api import renderers
+from api.renderers import EnvelopeTemplate, FastJSONRenderer
+
+DATA = {
+    'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'date': datetime.date(2020, 6, 1),
+    'time': datetime.datetime(2020, 6, 1, 12, 30, 15, 123456,
+                              tzinfo=datetime.timezone.utc),
+    'price': decimal.Decimal('1.50'),
+    'message': _('Offer has been created.'),
+    'text': 'Строка с разделителем',
+    'items': [1, None, True, 2.5],
+}
+
+
+@pytest.mark.skipif(renderers.orjson is None, reason='orjson не установлен')
+def test_output_matches_json_renderer():
+    assert FastJSONRenderer().render(DATA) == JSONRenderer().render(DATA), \
+        'FastJSONRenderer формирует JSON, отличный от JSONRenderer'
+
+
+@pytest.mark.parametrize('static', [{}, {'links': {'home': '/'}}])
+def test_envelope(static):
+    template = EnvelopeTemplate(static)
+    data = template.wrap(200000, DATA)
+
+    assert data == {'status': 200000, 'body': DATA, **static}
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data), \
+        'Конверт ответа кодируется неверно'
+
+
+def test_fallback_without_orjson(monkeypatch):
+    monkeypatch.setattr(renderers, 'orjson', None)
+
+    assert FastJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
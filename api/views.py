@@ -6,6 +6,8 @@ from rest_framework import exceptions
 from rest_framework.response import Response
 from rest_framework.views import set_rollback
 
+from .serializers import get_sparse_fieldset
+
 logger = logging.getLogger(__name__)
 
 
@@ -51,3 +53,43 @@ def exception_handler(exc, context):
         },
         status=500
     )
+
+
+class SparseFieldsetMixin:
+    """
+    Загружает из базы данных только поля, необходимые для полей ответа,
+    выбранных параметрами `fields` и `omit`.
+
+    sparse_fields сопоставляет каждому полю ответа пути к полям модели
+    (связанные модели загружаются через select_related), sparse_prefetch -
+    связи, загружаемые через prefetch_related. Поля из
+    sparse_required_fields загружаются всегда, например, если они нужны
+    для сортировки или постраничного вывода. Поля из sparse_optional_fields
+    выводятся, только если они запрошены явно.
+    """
+    sparse_fields = {}
+    sparse_prefetch = {}
+    sparse_required_fields = ()
+    sparse_optional_fields = ()
+
+    def get_sparse_queryset(self, queryset, prefix=''):
+        fieldset = get_sparse_fieldset(
+            self.request, self.sparse_fields, self.sparse_optional_fields)
+        if fieldset is None:
+            return queryset
+
+        paths = {*self.sparse_required_fields}
+        for name in fieldset:
+            paths.update(self.sparse_fields[name])
+        paths = {f'{prefix}{path}' for path in paths}
+        relations = {path.rsplit('__', 1)[0] for path in paths if '__' in path}
+        prefetch = [
+            lookup for name, lookup in self.sparse_prefetch.items()
+            if name in fieldset
+        ]
+
+        # вызов select_related() без аргументов загрузил бы все связи
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if relations:
+            queryset = queryset.select_related(*relations)
+        return queryset.prefetch_related(*prefetch).only(*paths)
@@ -5,7 +5,7 @@ from .models import City, Region
 
 @admin.register(City)
 class CityAdmin(admin.ModelAdmin):
-    fields = ('name', 'region')
+    fields = ('name', 'region', 'latitude', 'longitude')
     list_filter = ('region', )
     list_display = ('name', 'region')
 
@@ -0,0 +1,55 @@
+"""
+Расстояния между населенными пунктами.
+
+Точное расстояние вычисляется по формуле гаверсинусов средствами СУБД,
+а для отбора кандидатов используется прямоугольник, описанный вокруг
+окружности заданного радиуса: условие на диапазоны координат может быть
+проверено по индексу.
+"""
+import math
+
+from django.db.models import F
+from django.db.models.functions import ASin, Cos, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def get_bounding_box(latitude, longitude, radius_km):
+    """
+    Возвращает границы (min_lat, max_lat, min_lon, max_lon) прямоугольника,
+    содержащего все точки на расстоянии не более radius_km. Если
+    прямоугольник пересекает полюс или 180-й меридиан, границы по долготе
+    равны None.
+    """
+    delta_lat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = latitude - delta_lat, latitude + delta_lat
+    if min_lat <= -90 or max_lat >= 90:
+        return max(min_lat, -90), min(max_lat, 90), None, None
+
+    delta_lon = math.degrees(
+        math.asin(min(1.0, math.sin(radius_km / EARTH_RADIUS_KM)
+                      / math.cos(math.radians(latitude))))
+    )
+    min_lon, max_lon = longitude - delta_lon, longitude + delta_lon
+    if min_lon < -180 or max_lon > 180:
+        return min_lat, max_lat, None, None
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def get_distance_expression(latitude, longitude, prefix=''):
+    """
+    Выражение для расстояния в километрах от точки (latitude, longitude)
+    до населенного пункта. prefix - путь к модели City, например 'city__'.
+    """
+    lat = Radians(F(f'{prefix}latitude'))
+    lon = Radians(F(f'{prefix}longitude'))
+    center_lat = math.radians(latitude)
+    center_lon = math.radians(longitude)
+
+    haversine = (
+        Power(Sin((lat - center_lat) / 2), 2)
+        + math.cos(center_lat) * Cos(lat)
+        * Power(Sin((lon - center_lon) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(haversine))
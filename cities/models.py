@@ -25,12 +25,21 @@ class City(models.Model):
         on_delete=models.CASCADE,
         related_name='cities'
     )
+    latitude = models.FloatField(_('latitude'), blank=True, null=True)
+    longitude = models.FloatField(_('longitude'), blank=True, null=True)
 
     class Meta:
         verbose_name = _('City')
         verbose_name_plural = _('Cities')
         ordering = ('name',)
         unique_together = (('name', 'region'),)
+        indexes = [
+            # поиск населенных пунктов в прямоугольнике вокруг точки
+            models.Index(
+                fields=['latitude', 'longitude'],
+                name='city_coordinates_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
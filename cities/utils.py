@@ -1,3 +1,4 @@
+import csv
 import logging
 import os
 import uuid
@@ -7,7 +8,7 @@ import requests
 from django.db import connection, transaction
 from dotenv import load_dotenv
 
-from .models import Region
+from .models import City, Region
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -108,3 +109,35 @@ def load_geo_objects():
             'GROUP BY tc.region_id, tc.name'
         ))
         cursor.execute('DROP TABLE tmp_city')
+
+
+@transaction.atomic
+def load_city_coordinates(path, batch_size=1000):
+    """
+    Функция заполняет координаты населенных пунктов из CSV-файла с колонками
+    region, name, latitude, longitude (API ВКонтакте координаты не
+    возвращает). Возвращает количество обновленных населенных пунктов.
+    """
+    with open(path, encoding='utf-8', newline='') as csv_file:
+        coordinates = {
+            (row['region'], row['name']): (
+                float(row['latitude']),
+                float(row['longitude'])
+            )
+            for row in csv.DictReader(csv_file)
+        }
+
+    cities = []
+    for city in City.objects.select_related('region').iterator():
+        point = coordinates.get((city.region.name, city.name))
+        if point is None or point == (city.latitude, city.longitude):
+            continue
+        city.latitude, city.longitude = point
+        cities.append(city)
+
+    City.objects.bulk_update(
+        cities,
+        ['latitude', 'longitude'],
+        batch_size=batch_size
+    )
+    return len(cities)
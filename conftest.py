@@ -3,6 +3,7 @@ import pytest
 
 pytest_plugins = [
     'users.tests.fixtures',
+    'offers.tests.fixtures',
 ]
 
 
@@ -17,4 +18,5 @@ def pytest_configure():
         'wrong_total_count': 'в поле ответа `count` неверное значение',
         'wrong_results_size': 'неверный размер выборки в ответе',
         'needless_following': 'создается ненужная подписка',
+        'wrong_num_queries': 'количество SQL-запросов зависит от размера выборки',
     }
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Offer, OfferCategory, OfferPhoto
+from .models import Offer, OfferCategory, OfferPhoto, PhotoFile
 
 
 class OfferAdmin(admin.ModelAdmin):
@@ -20,6 +20,11 @@ class OfferPhotoAdmin(admin.ModelAdmin):
     empty_value_display = "-пусто-"
 
 
+class PhotoFileAdmin(admin.ModelAdmin):
+    list_display = ("name", "ref_count")
+
+
 admin.site.register(OfferPhoto, OfferPhotoAdmin)
+admin.site.register(PhotoFile, PhotoFileAdmin)
 admin.site.register(Offer, OfferAdmin)
 admin.site.register(OfferCategory, OfferCategoryAdmin)
@@ -0,0 +1,77 @@
+"""
+Кэширование ответов со списком предложений и количествами по фильтрам.
+
+Ключ кэша включает номер поколения данных. Номер увеличивается при любом
+изменении предложений или их фотографий (см. offers.signals), после чего
+все ранее сохраненные ответы перестают использоваться и со временем
+вытесняются из кэша.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+GENERATION_KEY = 'offers:generation'
+
+
+def get_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Начальное значение берется из текущего времени, чтобы после
+        # вытеснения счетчика не повторились номера, под которыми в кэше
+        # могут оставаться устаревшие ответы
+        cache.add(GENERATION_KEY, int(time.time() * 1000), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        get_generation()
+
+
+def bump_generation_on_commit():
+    """
+    Увеличивает номер поколения после фиксации текущей транзакции. Если
+    увеличить его раньше, параллельный запрос может сохранить под новым
+    номером данные, прочитанные до фиксации, и они останутся в кэше до
+    следующего изменения.
+    """
+    transaction.on_commit(bump_generation)
+
+
+def get_request_key(prefix, request):
+    """
+    Формирует ключ кэша для запроса: параметры запроса сортируются, поэтому
+    их порядок в URL не влияет на ключ. Ответы содержат абсолютные ссылки
+    на соседние страницы, поэтому ключ включает схему, хост и путь.
+    """
+    params = urlencode(sorted(request.query_params.lists()), doseq=True)
+    digest = hashlib.md5(
+        f'{request.build_absolute_uri(request.path)}?{params}'.encode('utf-8')
+    ).hexdigest()
+    return f'offers:{prefix}:{get_generation()}:{digest}'
+
+
+def get_or_set(prefix, request, get_body, timeout):
+    key = get_request_key(prefix, request)
+    body = cache.get(key)
+    if body is None:
+        body = get_body()
+        cache.set(key, body, timeout)
+    return body
+
+
+def get_or_set_list(request, get_body):
+    return get_or_set('list', request, get_body,
+                      settings.OFFERS_LIST_CACHE_TIMEOUT)
+
+
+def get_or_set_facets(request, get_body):
+    return get_or_set('facets', request, get_body,
+                      settings.OFFERS_FACETS_CACHE_TIMEOUT)
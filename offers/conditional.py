@@ -0,0 +1,63 @@
+"""
+Валидаторы для условных GET-запросов (ETag и Last-Modified).
+
+Валидаторы вычисляются по идентификаторам предложений и времени их
+последнего изменения, без сериализации. Изменение фотографий, имени
+автора и удаление населенного пункта также обновляют время изменения
+предложения (см. offers.signals).
+"""
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def get_validators(rows, extra=''):
+    """
+    Возвращает пару (etag, last_modified) для последовательности пар
+    (id, updated_at). Параметр extra позволяет учесть в ETag данные,
+    не связанные с конкретными предложениями, например ссылки на соседние
+    страницы.
+    """
+    digest = hashlib.md5(str(extra).encode('utf-8'))
+    last_modified = None
+    for offer_id, updated_at in rows:
+        digest.update(f'{offer_id}:{updated_at.isoformat()};'.encode('utf-8'))
+        if last_modified is None or updated_at > last_modified:
+            last_modified = updated_at
+
+    if last_modified is not None:
+        last_modified = timegm(last_modified.utctimetuple())
+    return quote_etag(digest.hexdigest()), last_modified
+
+
+def is_conditional(request):
+    return any(header in request.META for header in (
+        'HTTP_IF_MATCH',
+        'HTTP_IF_NONE_MATCH',
+        'HTTP_IF_MODIFIED_SINCE',
+        'HTTP_IF_UNMODIFIED_SINCE',
+    ))
+
+
+def get_not_modified_response(request, etag, last_modified):
+    """
+    Возвращает ответ 304 (или 412), если ресурс не изменился с момента,
+    указанного в заголовках запроса, иначе None.
+    """
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    return response
@@ -0,0 +1,95 @@
+"""
+Потоковая выгрузка предложений в форматах NDJSON и CSV.
+
+Строки читаются из базы данных порциями через iterator(chunk_size) (в
+PostgreSQL - серверным курсором) и сразу отдаются клиенту, поэтому
+потребление памяти не зависит от размера выгрузки.
+"""
+import csv
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from api.renderers import FastJSONRenderer
+
+# поле выгрузки и соответствующая колонка запроса
+EXPORT_FIELDS = (
+    ('id', 'id'),
+    ('author', 'author__username'),
+    ('title', 'title'),
+    ('description', 'description'),
+    ('category', 'category_id'),
+    ('category_name', 'category__name'),
+    ('city', 'city_id'),
+    ('city_name', 'city__name'),
+    ('region', 'region_id'),
+    ('is_service', 'is_service'),
+    ('is_used', 'is_used'),
+    ('is_private', 'is_private'),
+    ('moderation_statuses', 'moderation_statuses'),
+    ('is_closed', 'is_closed'),
+    ('pub_date', 'pub_date'),
+    ('updated_at', 'updated_at'),
+)
+
+
+def get_rows(queryset):
+    return (
+        queryset
+        .prefetch_related(None)
+        .order_by('pub_date', 'id')
+        .values_list(*(column for _, column in EXPORT_FIELDS))
+        .iterator(chunk_size=settings.OFFERS_EXPORT_CHUNK_SIZE)
+    )
+
+
+def to_ndjson(rows):
+    renderer = FastJSONRenderer()
+    names = [name for name, _ in EXPORT_FIELDS]
+    for row in rows:
+        yield renderer.render(dict(zip(names, row))) + b'\n'
+
+
+class Echo:
+    """Буфер для csv.writer, возвращающий записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+# символы, с которых табличные редакторы начинают формулу
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def escape_cell(value):
+    """
+    Экранирует строку, которую табличный редактор выполнил бы как формулу
+    (CSV injection), апострофом в начале.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def to_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, _ in EXPORT_FIELDS])
+    for row in rows:
+        yield writer.writerow([escape_cell(value) for value in row])
+
+
+EXPORT_FORMATS = {
+    'ndjson': (to_ndjson, 'application/x-ndjson'),
+    'csv': (to_csv, 'text/csv; charset=utf-8'),
+}
+
+
+def get_export_response(queryset, export_format):
+    encode, content_type = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(
+        encode(get_rows(queryset)),
+        content_type=content_type
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="offers.{export_format}"')
+    return response
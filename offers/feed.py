@@ -0,0 +1,222 @@
+"""
+Лента предложений авторов, на которых подписан пользователь.
+
+При публикации предложения (одобрении модератором) оно записывается в
+ленты всех подписчиков автора (таблица FeedEntry), и чтение ленты сводится
+к просмотру диапазона индекса по подписчику. Для авторов, у которых больше
+OFFERS_FEED_FANOUT_LIMIT подписчиков, такая запись слишком дорога: их
+предложения в ленты не записываются, а добавляются при чтении отдельным
+запросом по индексу автора.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from users.models import Following
+
+from .models import PUBLIC_OFFERS_CONDITION, FeedEntry, Offer
+
+CELEBRITIES_KEY = 'offers:feed:celebrities'
+
+
+def get_celebrity_ids():
+    """
+    Возвращает множество авторов, предложения которых не записываются в
+    ленты. Множество кэшируется, чтобы запись и чтение лент использовали
+    одно и то же разбиение авторов.
+    """
+    celebrities = cache.get(CELEBRITIES_KEY)
+    if celebrities is None:
+        celebrities = set(
+            Following.objects
+            .values('author')
+            .annotate(followers_count=Count('id'))
+            .filter(followers_count__gt=settings.OFFERS_FEED_FANOUT_LIMIT)
+            .values_list('author', flat=True)
+        )
+        cache.set(CELEBRITIES_KEY, celebrities,
+                  settings.OFFERS_FEED_CELEBRITIES_CACHE_TIMEOUT)
+    return celebrities
+
+
+def add_offers(offers):
+    """Записывает опубликованные предложения в ленты подписчиков авторов."""
+    celebrities = get_celebrity_ids()
+    offers = [offer for offer in offers if offer.author_id not in celebrities]
+    if not offers:
+        return
+
+    followers = defaultdict(list)
+    for author_id, follower_id in (
+        Following.objects
+        .filter(author_id__in={offer.author_id for offer in offers})
+        .values_list('author_id', 'follower_id')
+    ):
+        followers[author_id].append(follower_id)
+
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(
+                follower_id=follower_id,
+                author_id=offer.author_id,
+                offer_id=offer.pk,
+                pub_date=offer.pub_date
+            )
+            for offer in offers
+            for follower_id in followers[offer.author_id]
+        ],
+        batch_size=settings.OFFERS_FEED_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def remove_offers(offer_ids):
+    """Удаляет снятые с публикации предложения из всех лент."""
+    FeedEntry.objects.filter(offer_id__in=offer_ids).delete()
+
+
+def sync_offers(offer_ids):
+    """
+    Приводит ленты в соответствие с текущим состоянием предложений:
+    опубликованные добавляются, остальные удаляются.
+    """
+    offers = list(
+        Offer.objects
+        .filter(pk__in=offer_ids)
+        .only('id', 'author_id', 'pub_date', 'is_closed', 'moderation_statuses')
+    )
+    add_offers([offer for offer in offers if offer.is_public])
+    remove_offers([offer.pk for offer in offers if not offer.is_public])
+
+
+def sync_offers_in_batches(queryset, published):
+    """
+    Записывает предложения queryset в ленты подписчиков (published=True)
+    или удаляет их из лент пакетами по OFFERS_FEED_SYNC_BATCH_SIZE,
+    перебирая их по первичному ключу. Используется, когда предложения
+    изменяются одним UPDATE без сигналов.
+    """
+    offers = queryset.order_by('pk').only('id', 'author_id', 'pub_date')
+    batch_size = settings.OFFERS_FEED_SYNC_BATCH_SIZE
+    batch = list(offers[:batch_size])
+    while batch:
+        if published:
+            add_offers(batch)
+        else:
+            remove_offers([offer.pk for offer in batch])
+        batch = list(offers.filter(pk__gt=batch[-1].pk)[:batch_size])
+
+
+def add_following(following):
+    """Добавляет в ленту нового подписчика последние предложения автора."""
+    if following.author_id in get_celebrity_ids():
+        return
+
+    offers = (
+        Offer.objects
+        .filter(PUBLIC_OFFERS_CONDITION, author_id=following.author_id)
+        .order_by('-pub_date', '-id')
+        .values_list('id', 'pub_date')[:settings.OFFERS_FEED_BACKFILL_SIZE]
+    )
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(
+                follower_id=following.follower_id,
+                author_id=following.author_id,
+                offer_id=offer_id,
+                pub_date=pub_date
+            )
+            for offer_id, pub_date in offers
+        ],
+        ignore_conflicts=True
+    )
+
+
+def remove_following(following):
+    FeedEntry.objects.filter(
+        follower_id=following.follower_id,
+        author_id=following.author_id
+    ).delete()
+
+
+def filter_after(queryset, position, id_field):
+    """Отбирает записи, следующие за позицией курсора (pub_date, id)."""
+    if position is None:
+        return queryset
+    pub_date, offer_id = position
+    return queryset.filter(pub_date__lte=pub_date).filter(
+        Q(pub_date__lt=pub_date) | Q(**{f'{id_field}__lt': offer_id}))
+
+
+def get_feed_keys(user, authors, position, count):
+    """
+    Возвращает count пар (pub_date, id) ленты пользователя, следующих за
+    позицией курсора: записи ленты объединяются с предложениями
+    популярных авторов authors.
+    """
+    keys = set(
+        filter_after(FeedEntry.objects.filter(follower=user), position, 'offer_id')
+        .order_by('-pub_date', '-offer_id')
+        .values_list('pub_date', 'offer_id')[:count]
+    )
+    if authors:
+        keys.update(
+            filter_after(
+                Offer.objects.filter(PUBLIC_OFFERS_CONDITION,
+                                     author_id__in=authors),
+                position,
+                'id'
+            )
+            .order_by('-pub_date', '-id')
+            .values_list('pub_date', 'id')[:count]
+        )
+    return sorted(keys, reverse=True)[:count]
+
+
+def prune_entries(user, offer_ids):
+    """
+    Удаляет из ленты записи о предложениях, которые больше не
+    опубликованы (например, изменены без отправки сигналов).
+    """
+    public = Offer.objects.filter(PUBLIC_OFFERS_CONDITION, pk__in=offer_ids)
+    (
+        FeedEntry.objects
+        .filter(follower=user, offer_id__in=offer_ids)
+        .exclude(offer_id__in=public.values('pk'))
+        .delete()
+    )
+
+
+def get_feed_page(user, offers, position, count):
+    """
+    Возвращает count предложений из ленты пользователя, следующих за
+    позицией курсора. Предложения загружаются из queryset offers, поэтому
+    к ним применяются его select_related, prefetch_related и фильтры.
+    Предложения, которых нет в offers, пропускаются, и ключи ленты
+    дочитываются, пока страница не будет заполнена или лента не
+    закончится.
+    """
+    authors = []
+    celebrities = get_celebrity_ids()
+    if celebrities:
+        authors = list(
+            Following.objects
+            .filter(follower=user, author_id__in=celebrities)
+            .values_list('author_id', flat=True)
+        )
+
+    page = []
+    while len(page) < count:
+        keys = get_feed_keys(user, authors, position, count)
+        found = offers.in_bulk([offer_id for _, offer_id in keys])
+        page.extend(found[offer_id] for _, offer_id in keys if offer_id in found)
+
+        missing = [offer_id for _, offer_id in keys if offer_id not in found]
+        if missing:
+            prune_entries(user, missing)
+        if len(keys) < count:
+            break
+        position = keys[-1]
+    return page[:count]
@@ -0,0 +1,55 @@
+from django.conf import settings
+from django_filters import rest_framework as filters
+from rest_framework.settings import api_settings
+
+from cities import geo
+from cities.models import City
+
+from .models import Offer
+
+
+class OfferFilter(filters.FilterSet):
+    """
+    Фильтры списка предложений. Параметры `near` (идентификатор населенного
+    пункта) и `radius_km` отбирают предложения из населенных пунктов на
+    расстоянии не более radius_km километров; если порядок сортировки не
+    задан явно, результаты упорядочиваются по расстоянию.
+    """
+    near = filters.ModelChoiceFilter(
+        queryset=City.objects.filter(latitude__isnull=False,
+                                     longitude__isnull=False),
+        method='filter_near'
+    )
+    radius_km = filters.NumberFilter(min_value=0, method='filter_radius_km')
+
+    class Meta:
+        model = Offer
+        fields = ['category', 'city', 'region', 'is_service']
+
+    def filter_near(self, queryset, name, value):
+        radius_km = self.form.cleaned_data.get('radius_km')
+        if radius_km is None:
+            radius_km = settings.OFFERS_NEAR_DEFAULT_RADIUS_KM
+        radius_km = min(float(radius_km), settings.OFFERS_NEAR_MAX_RADIUS_KM)
+
+        # прямоугольник вокруг точки отбирает населенные пункты по индексу,
+        # и точное расстояние вычисляется только для них
+        min_lat, max_lat, min_lon, max_lon = geo.get_bounding_box(
+            value.latitude, value.longitude, radius_km)
+        queryset = queryset.filter(city__latitude__range=(min_lat, max_lat))
+        if min_lon is not None:
+            queryset = queryset.filter(city__longitude__range=(min_lon, max_lon))
+
+        queryset = (
+            queryset
+            .annotate(distance=geo.get_distance_expression(
+                value.latitude, value.longitude, prefix='city__'))
+            .filter(distance__lte=radius_km)
+        )
+        if api_settings.ORDERING_PARAM not in self.request.query_params:
+            queryset = queryset.order_by('distance', '-pub_date', '-id')
+        return queryset
+
+    def filter_radius_km(self, queryset, name, value):
+        # радиус применяется вместе с параметром near в filter_near
+        return queryset
@@ -0,0 +1,141 @@
+"""
+Уменьшенные копии фотографий предложений.
+
+Для каждой загруженной фотографии создаются копии в формате WebP с
+ограничением размера по большей стороне (OFFERS_PHOTO_DERIVATIVES). При
+создании копий учитывается ориентация из EXIF, а метаданные исходного
+файла не сохраняются.
+
+Копии хранятся рядом с исходным файлом, поэтому для одинаковых файлов
+(см. offers.storage) они создаются один раз.
+
+Обработка изображений выполняется в пуле процессов, чтобы не задерживать
+ответ на запрос загрузки и не конкурировать за GIL с обработкой запросов.
+Если OFFERS_PHOTO_DERIVATIVES_SYNC включена (например, в тестах), копии
+создаются сразу.
+"""
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import cache
+from .models import Offer, OfferPhoto
+from .storage import get_derivative_name, photo_storage
+
+logger = logging.getLogger(__name__)
+
+executor = None
+
+
+def get_executor():
+    global executor
+    if executor is None:
+        executor = ProcessPoolExecutor(
+            max_workers=settings.OFFERS_PHOTO_WORKERS)
+    return executor
+
+
+def get_derivative_urls(name, ready):
+    """Словарь {название копии: URL} или пустой словарь, пока копий нет."""
+    if not name or not ready:
+        return {}
+    return {
+        key: photo_storage.url(get_derivative_name(name, key))
+        for key in settings.OFFERS_PHOTO_DERIVATIVES
+    }
+
+
+def get_cover_url(name, ready):
+    """
+    URL уменьшенной копии OFFERS_PHOTO_COVER_DERIVATIVE, а пока копии не
+    созданы - исходного файла.
+    """
+    if not name:
+        return None
+    if ready:
+        name = get_derivative_name(
+            name, settings.OFFERS_PHOTO_COVER_DERIVATIVE)
+    return photo_storage.url(name)
+
+
+def render_derivatives(source_path, targets, quality):
+    """
+    Создает копии изображения source_path. targets - список пар
+    (наибольший размер стороны, путь к файлу копии). Функция выполняется
+    в отдельном процессе, поэтому работает только с путями к файлам.
+    """
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+        for size, target_path in targets:
+            derivative = image.copy()
+            derivative.thumbnail((size, size), Image.LANCZOS)
+            os.makedirs(os.path.dirname(target_path), exist_ok=True)
+            # метаданные (EXIF, ICC) не передаются и в копию не попадают
+            derivative.save(target_path, 'WEBP', quality=quality)
+
+
+def get_render_arguments(name):
+    return (
+        photo_storage.path(name),
+        [
+            (size, photo_storage.path(get_derivative_name(name, key)))
+            for key, size in settings.OFFERS_PHOTO_DERIVATIVES.items()
+        ],
+        settings.OFFERS_PHOTO_WEBP_QUALITY,
+    )
+
+
+def complete_derivatives(photo_id, offer_id):
+    # копии - часть представления предложения, поэтому, как и при
+    # изменении фотографии, сбрасываются кэш и валидаторы предложения
+    OfferPhoto.objects.filter(pk=photo_id).update(derivatives_ready=True)
+    Offer.objects.filter(pk=offer_id).update(updated_at=timezone.now())
+    cache.bump_generation()
+
+
+def on_derivatives_done(photo_id, offer_id, future):
+    # вызывается в служебном потоке пула, у которого свое соединение с БД
+    close_old_connections()
+    try:
+        future.result()
+        complete_derivatives(photo_id, offer_id)
+    except Exception:
+        logger.exception(
+            f'Ошибка при создании копий фотографии {photo_id}')
+    finally:
+        close_old_connections()
+
+
+def create_derivatives(photo):
+    """Запускает создание копий фотографии после фиксации транзакции."""
+    if not photo.link:
+        return
+
+    photo_id, offer_id, name = photo.pk, photo.offer_id, photo.link.name
+
+    def submit():
+        if (OfferPhoto.objects
+                .filter(link=name, derivatives_ready=True)
+                .exclude(pk=photo_id)
+                .exists()):
+            # копии этого файла уже созданы для другой фотографии
+            complete_derivatives(photo_id, offer_id)
+            return
+        arguments = get_render_arguments(name)
+        if settings.OFFERS_PHOTO_DERIVATIVES_SYNC:
+            render_derivatives(*arguments)
+            complete_derivatives(photo_id, offer_id)
+            return
+        future = get_executor().submit(render_derivatives, *arguments)
+        future.add_done_callback(
+            lambda done: on_derivatives_done(photo_id, offer_id, done))
+
+    transaction.on_commit(submit)
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+
+from cities.models import City
+from offers import cache
+from offers.models import Offer
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет регион предложений по их населенным пунктам. Предложения '
+        'обновляются пакетами, чтобы не блокировать таблицу надолго.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество предложений, обновляемых одним запросом'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        region = Subquery(
+            City.objects.filter(pk=OuterRef('city')).values('region')[:1])
+
+        ids = Offer.objects.order_by('pk').values_list('pk', flat=True)
+        batch = []
+        updated = 0
+        for offer_id in ids.iterator(chunk_size=batch_size):
+            batch.append(offer_id)
+            if len(batch) == batch_size:
+                updated += self.update_batch(batch, region)
+                batch = []
+        if batch:
+            updated += self.update_batch(batch, region)
+
+        if updated:
+            cache.bump_generation()
+        self.stdout.write(f'Обновлено предложений: {updated}')
+
+    @transaction.atomic
+    def update_batch(self, ids, region):
+        return Offer.objects.filter(pk__in=ids).update(region=region)
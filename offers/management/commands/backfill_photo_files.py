@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from offers.models import OfferPhoto, PhotoFile
+
+
+class Command(BaseCommand):
+    help = (
+        'Создает и исправляет записи PhotoFile по фотографиям предложений, '
+        'в том числе загруженным до появления учета ссылок на файлы. Файлы '
+        'обрабатываются пакетами, чтобы не блокировать таблицу надолго.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество файлов, обрабатываемых в одной транзакции'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        names = (
+            OfferPhoto.objects
+            .exclude(link__isnull=True)
+            .exclude(link='')
+            .order_by('link')
+            .values_list('link', flat=True)
+            .distinct()
+        )
+        batch = []
+        updated = 0
+        for name in names.iterator(chunk_size=batch_size):
+            batch.append(name)
+            if len(batch) == batch_size:
+                updated += self.update_batch(batch)
+                batch = []
+        if batch:
+            updated += self.update_batch(batch)
+
+        self.stdout.write(f'Обновлено файлов: {updated}')
+
+    @transaction.atomic
+    def update_batch(self, names):
+        # записи блокируются, а ссылки считаются в той же транзакции,
+        # поэтому одновременные загрузки и удаления не теряются
+        photo_files = PhotoFile.objects.select_for_update().in_bulk(names)
+        counts = dict(
+            OfferPhoto.objects
+            .filter(link__in=names)
+            .order_by()
+            .values('link')
+            .annotate(count=Count('pk'))
+            .values_list('link', 'count')
+        )
+
+        changed = []
+        for name, photo_file in photo_files.items():
+            if photo_file.ref_count != counts.get(name, 0):
+                photo_file.ref_count = counts.get(name, 0)
+                changed.append(photo_file)
+        PhotoFile.objects.bulk_update(changed, ['ref_count'])
+
+        missing = [
+            PhotoFile(name=name, ref_count=count)
+            for name, count in counts.items()
+            if name not in photo_files
+        ]
+        # запись, созданную одновременной загрузкой, исправит повторный запуск
+        PhotoFile.objects.bulk_create(missing, ignore_conflicts=True)
+        return len(changed) + len(missing)
@@ -0,0 +1,96 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from offers.models import Offer, OfferCategory, OfferPhoto
+from offers.serializers import OfferNotClosedSerializer, OfferRowSerializer
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время сериализации списка предложений сериализатором '
+        'OfferNotClosedSerializer и OfferRowSerializer. Тестовые данные '
+        'создаются в транзакции, которая затем откатывается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000,
+                            help='Количество предложений')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Количество замеров каждого способа')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.create_offers(options['count'])
+                self.run(options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def create_offers(self, count):
+        author = User.objects.create_user(username='benchmark_author')
+        category = OfferCategory.objects.create(name='Benchmark')
+        offers = Offer.objects.bulk_create(
+            [
+                Offer(
+                    author=author,
+                    title=f'Предложение {number}',
+                    description=f'Описание предложения {number}',
+                    category=category,
+                    is_service=bool(number % 2),
+                    is_used=True,
+                    is_private=False,
+                    is_closed=False,
+                    moderation_statuses='APPROVED',
+                    photo_count=1
+                )
+                for number in range(count)
+            ]
+        )
+        OfferPhoto.objects.bulk_create(
+            [OfferPhoto(offer=offer) for offer in offers])
+
+    def run(self, repeat):
+        queryset = (
+            Offer.objects
+            .select_related('author', 'category', 'city')
+            .prefetch_related('photos')
+            .order_by('-pub_date', '-id')
+        )
+        renderer = JSONRenderer()
+
+        # all() создает новый queryset, чтобы замеры не использовали
+        # результаты предыдущих запросов
+        def serialize_models():
+            offers = list(queryset.all())
+            return renderer.render(
+                OfferNotClosedSerializer(offers, many=True).data)
+
+        def serialize_rows():
+            serializer = OfferRowSerializer()
+            rows = list(serializer.get_rows(queryset))
+            return renderer.render(serializer.to_representation(rows))
+
+        if serialize_models() != serialize_rows():
+            raise CommandError('Результаты сериализации различаются')
+
+        for name, serialize in (
+            ('OfferNotClosedSerializer', serialize_models),
+            ('OfferRowSerializer', serialize_rows),
+        ):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                serialize()
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(f'{name}: {min(timings):.3f} с')
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from offers import cache
+from offers.models import Offer, OfferPhoto
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает количество фотографий предложений (photo_count). '
+        'Предложения обновляются пакетами, чтобы не блокировать таблицу '
+        'надолго.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество предложений, обновляемых одним запросом'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        photo_count = Coalesce(
+            Subquery(
+                OfferPhoto.objects
+                .filter(offer=OuterRef('pk'))
+                .order_by()
+                .values('offer')
+                .annotate(count=Count('pk'))
+                .values('count'),
+                output_field=IntegerField()
+            ),
+            0
+        )
+
+        ids = Offer.objects.order_by('pk').values_list('pk', flat=True)
+        batch = []
+        updated = 0
+        for offer_id in ids.iterator(chunk_size=batch_size):
+            batch.append(offer_id)
+            if len(batch) == batch_size:
+                updated += self.update_batch(batch, photo_count)
+                batch = []
+        if batch:
+            updated += self.update_batch(batch, photo_count)
+
+        if updated:
+            cache.bump_generation()
+        self.stdout.write(f'Обновлено предложений: {updated}')
+
+    @transaction.atomic
+    def update_batch(self, ids, photo_count):
+        return (
+            Offer.objects
+            .filter(pk__in=ids)
+            .exclude(photo_count=photo_count)
+            .update(photo_count=photo_count)
+        )
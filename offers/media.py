@@ -0,0 +1,188 @@
+"""
+Отдача фотографий предложений и их уменьшенных копий.
+
+Права доступа проверяются в Django: фотографии приватных предложений
+(Offer.is_private) доступны только автору, его подписчикам и модераторам.
+Передачу самого файла можно поручить прокси-серверу
+(MEDIA_SENDFILE_BACKEND): nginx получает путь в заголовке
+X-Accel-Redirect, Apache и lighttpd - в X-Sendfile. Без прокси файл
+отдается FileResponse: сервер приложений передает его через
+wsgi.file_wrapper (sendfile, без копирования в память процесса), а
+запросы с заголовком Range обслуживаются частичными ответами.
+
+Имена файлов определяются их содержимым (см. offers.storage), поэтому
+файл по одному и тому же адресу никогда не меняется и его имя служит
+ETag. Доступ к файлу при этом может измениться (предложение стало
+приватным, фотография удалена), поэтому ответы кэшируются ненадолго
+(MEDIA_CACHE_MAX_AGE), а затем проверяются заново условным запросом.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.permissions import AllowAny
+
+from .models import OfferPhoto
+from .storage import get_derivative_name, photo_storage
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def get_source_lookup(name):
+    """Условие на фотографии, которым принадлежит файл name."""
+    lookup = Q(link=name)
+    for key in settings.OFFERS_PHOTO_DERIVATIVES:
+        suffix = get_derivative_name('', key)
+        if name.endswith(suffix):
+            # у копии то же имя, что и у исходного файла, без расширения
+            lookup |= Q(link__startswith=name[:-len(suffix)] + '.')
+    return lookup
+
+
+def get_access_lookup(user):
+    """Условие на фотографии, доступные пользователю user."""
+    lookup = Q(offer__is_private=False)
+    if user.is_authenticated:
+        lookup |= Q(offer__author=user) | Q(offer__author__followers__follower=user)
+    return lookup
+
+
+def get_photo_access(user, name):
+    """
+    Возвращает пару: доступен ли файл name пользователю user и доступен
+    ли он всем. Одинаковые файлы хранятся один раз, поэтому файл
+    доступен всем, если он принадлежит хотя бы одному неприватному
+    предложению.
+    """
+    photos = OfferPhoto.objects.filter(get_source_lookup(name))
+    if not user.is_staff:
+        photos = photos.filter(get_access_lookup(user))
+    privacy = set(photos.values_list('offer__is_private', flat=True))
+    return bool(privacy), False in privacy
+
+
+def parse_range(header, size):
+    """
+    Возвращает (начало, конец) диапазона из заголовка Range, None, если
+    заголовок не поддерживается (тогда отдается весь файл), или False,
+    если диапазон лежит за пределами файла.
+    """
+    match = RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    start, end = match.groups()
+    if not start:
+        if not end:
+            return None
+        # bytes=-N: последние N байт
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    if start >= size:
+        return False
+    end = min(int(end), size - 1) if end else size - 1
+    if end < start:
+        return None
+    return start, end
+
+
+class RangeFile:
+    """Файл, чтение которого ограничено length байтами."""
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def get_sendfile_response(name, path):
+    backend = settings.MEDIA_SENDFILE_BACKEND
+    response = HttpResponse()
+    # тип содержимого определяет прокси-сервер
+    del response['Content-Type']
+    if backend == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT_PREFIX + name)
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def get_file_response(request, path, size):
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    byte_range = None
+    if request.method == 'GET' and 'HTTP_RANGE' in request.META:
+        byte_range = parse_range(request.META['HTTP_RANGE'], size)
+
+    if byte_range is False:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    if byte_range is None:
+        response = FileResponse(open(path, 'rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        # у обертки нет fileno(), поэтому частичный ответ читается блоками;
+        # полные ответы сервер приложений передает через sendfile
+        response = FileResponse(
+            RangeFile(open(path, 'rb'), start, end - start + 1),
+            status=206,
+            content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+@api_view(['GET', 'HEAD'])
+@permission_classes([AllowAny])
+def serve_photo(request, name):
+    name = f'photos/{name}'
+    # недоступный файл неотличим от отсутствующего
+    can_view, is_public = get_photo_access(request.user, name)
+    if not can_view:
+        raise Http404
+
+    path = photo_storage.path(name)
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        raise Http404
+
+    # содержимое файла не меняется, поэтому валидатором служит его имя
+    etag = '"{}"'.format(os.path.basename(name))
+    if request.META.get('HTTP_IF_RANGE', etag) != etag:
+        request.META.pop('HTTP_RANGE', None)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        if settings.MEDIA_SENDFILE_BACKEND:
+            response = get_sendfile_response(name, path)
+        else:
+            response = get_file_response(request, path, size)
+    response['ETag'] = etag
+
+    # по истечении max_age клиенты и прокси-серверы повторяют запрос с
+    # If-None-Match, и права доступа проверяются снова
+    patch_cache_control(
+        response, max_age=settings.MEDIA_CACHE_MAX_AGE,
+        must_revalidate=True, **{'public' if is_public else 'private': True})
+    return response
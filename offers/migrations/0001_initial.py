@@ -0,0 +1,117 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:08
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import offers.models
+import offers.storage
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CloseReason',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=50, verbose_name='Причина закрытия')),
+            ],
+            options={
+                'verbose_name': 'Причина закрытия',
+            },
+        ),
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('pub_date', models.DateField(verbose_name='Дата публикации')),
+            ],
+            options={
+                'verbose_name': 'Запись ленты',
+                'verbose_name_plural': 'Записи ленты',
+            },
+        ),
+        migrations.CreateModel(
+            name='Offer',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=100)),
+                ('description', models.TextField(max_length=280)),
+                ('is_service', models.BooleanField()),
+                ('is_used', models.BooleanField()),
+                ('pub_date', models.DateField(auto_now_add=True, verbose_name='Дата публикации')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата изменения')),
+                ('is_private', models.BooleanField(verbose_name='Приватное/общедоступное предложение')),
+                ('moderation_statuses', models.CharField(choices=[('ON_MODERATION', 'На модерации'), ('APPROVED', 'Одобрено'), ('REFUSED', 'Отклонено')], default='ON_MODERATION', max_length=50, verbose_name='Статус модерации')),
+                ('is_closed', models.BooleanField(verbose_name='Открытое/закрытое предложение')),
+                ('moderation_claimed_at', models.DateTimeField(blank=True, null=True, verbose_name='Время взятия на модерацию')),
+                ('photo_count', models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Количество фотографий')),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(editable=False, null=True)),
+            ],
+            options={
+                'verbose_name': 'Предложение',
+                'verbose_name_plural': 'Предложения',
+            },
+        ),
+        migrations.CreateModel(
+            name='OfferCategory',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=50, verbose_name='Наименование')),
+            ],
+            options={
+                'verbose_name': 'Категория',
+                'verbose_name_plural': 'Категории',
+            },
+        ),
+        migrations.CreateModel(
+            name='PhotoFile',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Имя файла')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='Количество ссылок')),
+            ],
+            options={
+                'verbose_name': 'Файл фотографии',
+                'verbose_name_plural': 'Файлы фотографий',
+            },
+        ),
+        migrations.CreateModel(
+            name='OfferSearchEntry',
+            fields=[
+                ('offer', models.OneToOneField(on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='+', serialize=False, to='offers.Offer')),
+                ('title', models.TextField()),
+                ('description', models.TextField()),
+                ('document', offers.models.FullTextDocumentField(db_column='offers_offer_fts')),
+            ],
+            options={
+                'db_table': 'offers_offer_fts',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='OfferPhoto',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('link', models.ImageField(blank=True, db_index=True, null=True, storage=offers.storage.PhotoStorage(), upload_to=offers.models.nameFile)),
+                ('derivatives_ready', models.BooleanField(default=False, editable=False, verbose_name='Уменьшенные копии созданы')),
+                ('width', models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Ширина')),
+                ('height', models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Высота')),
+                ('dominant_color', models.CharField(blank=True, editable=False, max_length=7, verbose_name='Преобладающий цвет')),
+                ('preview', models.TextField(blank=True, editable=False, verbose_name='Превью')),
+                ('uploaded_at', models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Дата загрузки')),
+                ('offer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='photos', to='offers.Offer')),
+            ],
+            options={
+                'verbose_name': 'Фотография предложения',
+                'verbose_name_plural': 'Фотографии предложения',
+                'ordering': ('uploaded_at', 'id'),
+            },
+        ),
+    ]
@@ -0,0 +1,100 @@
+# Generated by Django 3.0.7 on 2026-10-18 14:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('offers', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('cities', '__first__'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offers', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='category',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='offers', to='offers.OfferCategory'),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='city',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='offers', to='cities.City'),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='close_reason',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='offers', to='offers.CloseReason'),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='moderator',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_offers', to=settings.AUTH_USER_MODEL, verbose_name='Модератор'),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='region',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='offers', to='cities.Region', verbose_name='Регион'),
+        ),
+        migrations.AddField(
+            model_name='feedentry',
+            name='author',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='feedentry',
+            name='follower',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='feedentry',
+            name='offer',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='offers.Offer'),
+        ),
+        migrations.AddIndex(
+            model_name='offerphoto',
+            index=models.Index(fields=['offer', 'uploaded_at', 'id'], name='offer_photo_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='offer',
+            index=models.Index(condition=models.Q(('is_closed', False), ('moderation_statuses', 'APPROVED')), fields=['-pub_date', '-id'], name='offer_public_pub_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='offer',
+            index=models.Index(condition=models.Q(('is_closed', False), ('moderation_statuses', 'APPROVED')), fields=['category', '-pub_date', '-id'], name='offer_public_category_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='offer',
+            index=models.Index(condition=models.Q(('is_closed', False), ('moderation_statuses', 'APPROVED')), fields=['city', '-pub_date', '-id'], name='offer_public_city_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='offer',
+            index=models.Index(condition=models.Q(('is_closed', False), ('moderation_statuses', 'APPROVED')), fields=['is_service', '-pub_date', '-id'], name='offer_public_service_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='offer',
+            index=models.Index(condition=models.Q(('is_closed', False), ('moderation_statuses', 'APPROVED')), fields=['region', '-pub_date', '-id'], name='offer_public_region_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='offer',
+            index=models.Index(condition=models.Q(('is_closed', False), ('moderation_statuses', 'ON_MODERATION')), fields=['pub_date', 'id'], name='offer_moderation_queue_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='feedentry',
+            index=models.Index(fields=['follower', '-pub_date', '-offer'], name='feed_entry_follower_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='feedentry',
+            constraint=models.UniqueConstraint(fields=('follower', 'offer'), name='feed_entry_unique'),
+        ),
+    ]
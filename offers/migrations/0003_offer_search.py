@@ -0,0 +1,14 @@
+from django.db import migrations
+
+from offers.search import InstallSearch
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers', '0002_offer_relations'),
+    ]
+
+    operations = [
+        InstallSearch(),
+    ]
@@ -1,10 +1,20 @@
+import logging
 import uuid
 
-from django.db import models
+from django.conf import settings
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 
-from cities.models import City
+from cities.models import City, Region
 from users.models import User
 
+from .placeholders import EMPTY_PLACEHOLDER, get_placeholder
+from .storage import PHOTOS_DIR, photo_storage
+
+logger = logging.getLogger(__name__)
+
 
 class OfferCategory(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -29,6 +39,16 @@ class CloseReason(models.Model):
         return self.name
 
 
+class PhotoLimitError(Exception):
+    """У предложения уже максимальное количество фотографий."""
+
+
+# Условие, по которому отбираются предложения, доступные всем пользователям.
+# Используется и в частичных индексах, и в запросах к ним: планировщик
+# применяет частичный индекс, только если условие запроса его покрывает.
+PUBLIC_OFFERS_CONDITION = models.Q(is_closed=False, moderation_statuses='APPROVED')
+
+
 class Offer(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     MODERATION_STATUSES_CHOICES = (
@@ -47,8 +67,15 @@ class Offer(models.Model):
     is_used = models.BooleanField()
     city = models.ForeignKey(
         City, on_delete=models.SET_NULL, blank=True, null=True, related_name="offers")
+    # копия региона населенного пункта, позволяющая фильтровать по региону
+    # без соединения с таблицей населенных пунктов; заполняется в save()
+    region = models.ForeignKey(
+        Region, verbose_name='Регион', on_delete=models.SET_NULL,
+        blank=True, null=True, editable=False, related_name="offers")
     pub_date = models.DateField(
         verbose_name='Дата публикации', auto_now_add=True)
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения', auto_now=True)
     is_private = models.BooleanField(
         verbose_name='Приватное/общедоступное предложение')
     moderation_statuses = models.CharField(verbose_name='Статус модерации', max_length=50, 
@@ -57,21 +84,358 @@ class Offer(models.Model):
         verbose_name='Открытое/закрытое предложение')
     close_reason = models.ForeignKey(CloseReason, 
         on_delete=models.PROTECT, blank=True, null=True, related_name="offers") 
+    moderator = models.ForeignKey(
+        User, verbose_name='Модератор', on_delete=models.SET_NULL,
+        blank=True, null=True, related_name="claimed_offers")
+    moderation_claimed_at = models.DateTimeField(
+        verbose_name='Время взятия на модерацию', blank=True, null=True)
+    # количество фотографий; изменяется одним условным UPDATE, который
+    # одновременно проверяет ограничение и занимает место (см. reserve_photos)
+    photo_count = models.PositiveSmallIntegerField(
+        verbose_name='Количество фотографий', default=0, editable=False)
+    # документ полнотекстового поиска в PostgreSQL; заполняется триггером
+    # (см. offers.search)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         verbose_name = 'Предложение'
         verbose_name_plural = 'Предложения'
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                condition=PUBLIC_OFFERS_CONDITION,
+                name='offer_public_pub_date_idx'
+            ),
+            models.Index(
+                fields=['category', '-pub_date', '-id'],
+                condition=PUBLIC_OFFERS_CONDITION,
+                name='offer_public_category_idx'
+            ),
+            models.Index(
+                fields=['city', '-pub_date', '-id'],
+                condition=PUBLIC_OFFERS_CONDITION,
+                name='offer_public_city_idx'
+            ),
+            models.Index(
+                fields=['is_service', '-pub_date', '-id'],
+                condition=PUBLIC_OFFERS_CONDITION,
+                name='offer_public_service_idx'
+            ),
+            models.Index(
+                fields=['region', '-pub_date', '-id'],
+                condition=PUBLIC_OFFERS_CONDITION,
+                name='offer_public_region_idx'
+            ),
+            models.Index(
+                fields=['pub_date', 'id'],
+                condition=models.Q(
+                    is_closed=False, moderation_statuses='ON_MODERATION'),
+                name='offer_moderation_queue_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # состояние на момент загрузки позволяет отличить публикацию
+        # предложения от его повторного сохранения (см. offers.signals)
+        if {'is_closed', 'moderation_statuses'} <= set(field_names):
+            instance._loaded_is_public = instance.is_public
+        if 'city_id' in field_names:
+            instance._loaded_city_id = instance.city_id
+        return instance
+
+    def save(self, *args, **kwargs):
+        if (self._state.adding
+                or self.city_id != getattr(self, '_loaded_city_id', None)):
+            self.update_region()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'region'}
+        super().save(*args, **kwargs)
+        self._loaded_city_id = self.city_id
+
+    def update_region(self):
+        self.region_id = self.city.region_id if self.city_id else None
+
+    @classmethod
+    def reserve_photos(cls, offer_id, count=1):
+        """
+        Занимает count мест для фотографий предложения или вызывает
+        PhotoLimitError, если превышается OFFERS_PHOTO_LIMIT, и
+        Offer.DoesNotExist, если предложения нет. Вызывается в транзакции,
+        в которой фотографии сохраняются.
+        """
+        reserved = (
+            cls.objects
+            .filter(pk=offer_id,
+                    photo_count__lte=settings.OFFERS_PHOTO_LIMIT - count)
+            .update(photo_count=F('photo_count') + count)
+        )
+        if not reserved:
+            # условие не выполняется и для удаленного предложения
+            if not cls.objects.filter(pk=offer_id).exists():
+                raise cls.DoesNotExist(f'Offer {offer_id} does not exist.')
+            raise PhotoLimitError
+
+    @property
+    def is_public(self):
+        """Соответствует ли предложение условию PUBLIC_OFFERS_CONDITION."""
+        return not self.is_closed and self.moderation_statuses == 'APPROVED'
+
+
+class FullTextDocumentField(models.TextField):
+    """
+    Скрытая колонка виртуальной таблицы FTS5, имя которой совпадает с
+    именем таблицы. Поддерживает поиск field__match='запрос'.
+    """
+
+
+@FullTextDocumentField.register_lookup
+class FullTextMatch(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class OfferSearchEntry(models.Model):
+    """
+    Строка полнотекстового индекса предложений в SQLite (виртуальная
+    таблица FTS5). Таблица и заполняющие ее триггеры создаются миграцией
+    (см. offers.search).
+    """
+    offer = models.OneToOneField(
+        Offer, primary_key=True, on_delete=models.DO_NOTHING,
+        related_name='+')
+    title = models.TextField()
+    description = models.TextField()
+    document = FullTextDocumentField(db_column='offers_offer_fts')
+
+    class Meta:
+        managed = False
+        db_table = 'offers_offer_fts'
+
+
+class FeedEntry(models.Model):
+    """
+    Запись ленты подписок: опубликованное предложение автора, на которого
+    подписан пользователь. Записи создаются при публикации предложения
+    (см. offers.feed), поэтому лента читается по индексу без соединения
+    подписок с таблицей предложений.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    follower = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="feed_entries")
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="+")
+    offer = models.ForeignKey(
+        Offer, on_delete=models.CASCADE, related_name="feed_entries")
+    pub_date = models.DateField(verbose_name='Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['follower', 'offer'],
+                name='feed_entry_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['follower', '-pub_date', '-offer'],
+                name='feed_entry_follower_idx'
+            ),
+        ]
 
 
 def nameFile(instance, filename):
-    return '/'.join(['photos', str(instance.link), filename])
+    # каталог и имя файла определяются его содержимым (см. offers.storage),
+    # от исходного имени сохраняется только расширение
+    return '/'.join([PHOTOS_DIR, filename])
+
+
+class PhotoFile(models.Model):
+    """
+    Файл фотографии в хранилище и количество фотографий предложений,
+    которые на него ссылаются. Одинаковые файлы, загруженные к разным
+    предложениям, хранятся один раз.
+    """
+    name = models.CharField(
+        verbose_name='Имя файла', max_length=100, primary_key=True)
+    ref_count = models.PositiveIntegerField(
+        verbose_name='Количество ссылок', default=0)
+
+    class Meta:
+        verbose_name = 'Файл фотографии'
+        verbose_name_plural = 'Файлы фотографий'
+
+    def __str__(self):
+        return self.name
+
+    # Счетчик изменяется в той же транзакции, что и фотографии. Запись
+    # блокируется (select_for_update), поэтому одновременные release и
+    # acquire одного файла не теряют ссылок и не удаляют используемый файл.
+
+    @classmethod
+    def acquire(cls, name, count=1):
+        """Добавляет count ссылок на файл name."""
+        with transaction.atomic():
+            while not cls.objects.filter(name=name).update(
+                    ref_count=F('ref_count') + count):
+                # записи нет; если ее одновременно создал другой запрос,
+                # get_or_create вернет ее, и UPDATE выполняется повторно
+                _, created = cls.objects.get_or_create(
+                    name=name, defaults={'ref_count': count})
+                if created:
+                    break
+
+    @classmethod
+    def release(cls, name):
+        """
+        Удаляет ссылку на файл name. Файл удаляется из хранилища после
+        фиксации транзакции, если на него больше нет ссылок.
+        """
+        with transaction.atomic():
+            photo_file = (
+                cls.objects.select_for_update().filter(name=name).first())
+            if photo_file is None:
+                return
+            if photo_file.ref_count > 1:
+                cls.objects.filter(name=name).update(
+                    ref_count=F('ref_count') - 1)
+                return
+            photo_file.delete()
+            transaction.on_commit(lambda: cls.discard([name]))
+
+    @classmethod
+    def discard(cls, names):
+        """
+        Удаляет из хранилища файлы names, на которые нет ссылок. Вызывается
+        после удаления последней ссылки и после отката транзакции, в
+        которой файлы были записаны. Ссылки проверяются заново: до вызова
+        файл мог снова понадобиться другой фотографии.
+        """
+        names = set(names)
+        referenced = set(
+            cls.objects.filter(name__in=names).values_list('name', flat=True))
+        referenced.update(
+            OfferPhoto.objects.filter(link__in=names)
+            .values_list('link', flat=True))
+        for name in names - referenced:
+            photo_storage.delete_photo(name, settings.OFFERS_PHOTO_DERIVATIVES)
+
+
+PLACEHOLDER_FIELDS = ('width', 'height', 'dominant_color', 'preview')
+
+
+def get_placeholder_payload(width, height, dominant_color, preview):
+    if width is None:
+        return {}
+    return {
+        'width': width,
+        'height': height,
+        'color': dominant_color,
+        'preview': preview,
+    }
 
 
 class OfferPhoto(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     offer = models.ForeignKey(Offer, on_delete=models.CASCADE, related_name="photos")
-    link = models.ImageField(upload_to=nameFile, blank=True, null=True)
+    # по имени файла ищутся фотографии при его отдаче (см. offers.media)
+    link = models.ImageField(upload_to=nameFile, storage=photo_storage,
+                             blank=True, null=True, db_index=True)
+    derivatives_ready = models.BooleanField(
+        verbose_name='Уменьшенные копии созданы', default=False,
+        editable=False)
+    # заглушка для списков (см. offers.placeholders), вычисляется в save()
+    width = models.PositiveIntegerField(
+        verbose_name='Ширина', blank=True, null=True, editable=False)
+    height = models.PositiveIntegerField(
+        verbose_name='Высота', blank=True, null=True, editable=False)
+    dominant_color = models.CharField(
+        verbose_name='Преобладающий цвет', max_length=7, blank=True,
+        editable=False)
+    preview = models.TextField(
+        verbose_name='Превью', blank=True, editable=False)
+    uploaded_at = models.DateTimeField(
+        verbose_name='Дата загрузки', default=timezone.now, editable=False)
     
     class Meta:
         verbose_name = 'Фотография предложения'
         verbose_name_plural = 'Фотографии предложения'        
+        # первая фотография служит обложкой предложения; индекс позволяет
+        # загрузить фотографии страницы одним упорядоченным запросом
+        ordering = ('uploaded_at', 'id')
+        indexes = [
+            models.Index(
+                fields=['offer', 'uploaded_at', 'id'],
+                name='offer_photo_order_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # файл на момент загрузки нужен для учета ссылок на файлы
+        if 'link' in field_names:
+            instance._loaded_link = instance.link.name or None
+        return instance
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        tracked = self._state.adding or hasattr(self, '_loaded_link')
+        loaded = getattr(self, '_loaded_link', None)
+        link_changed = tracked and (
+            update_fields is None or 'link' in update_fields
+        ) and (
+            (self.link and not self.link._committed)
+            or (self.link.name or None) != loaded
+        )
+        if link_changed:
+            self.derivatives_ready = False
+            self.update_placeholder()
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, 'derivatives_ready', *PLACEHOLDER_FIELDS}
+        # используется обработчиком post_save (см. offers.signals)
+        self._link_changed = link_changed
+        name = loaded
+        with transaction.atomic():
+            if self._state.adding:
+                Offer.reserve_photos(self.offer_id)
+            super().save(*args, **kwargs)
+            # ссылки на файлы учитываются в той же транзакции
+            if link_changed:
+                name = self.link.name or None
+                if name != loaded:
+                    if name:
+                        PhotoFile.acquire(name)
+                    if loaded:
+                        PhotoFile.release(loaded)
+        if link_changed:
+            self._loaded_link = name
+
+    def update_placeholder(self):
+        placeholder = EMPTY_PLACEHOLDER
+        if self.link:
+            try:
+                if self.link._committed:
+                    with self.link.open('rb'):
+                        placeholder = get_placeholder(self.link)
+                else:
+                    placeholder = get_placeholder(self.link)
+            except (OSError, ValueError):
+                logger.exception(
+                    f'Не удалось создать заглушку для файла {self.link.name}')
+        for field, value in placeholder.items():
+            setattr(self, field, value)
+
+    def get_placeholder(self):
+        """Заглушка для ответа API или пустой словарь, если ее нет."""
+        return get_placeholder_payload(
+            self.width, self.height, self.dominant_color, self.preview)
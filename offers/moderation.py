@@ -0,0 +1,62 @@
+"""
+Очередь модерации предложений.
+
+Модератор берет из очереди пакет предложений, и до истечения
+OFFERS_MODERATION_CLAIM_TIMEOUT секунд они не выдаются другим
+модераторам. Строки выбираются запросом SELECT ... FOR UPDATE SKIP
+LOCKED, поэтому параллельные запросы не ждут друг друга и не получают
+одни и те же предложения. В SQLite блокировки строк нет, и от повторной
+выдачи защищает условие в самом UPDATE.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Offer
+
+
+def get_available_offers(moderator, now):
+    """
+    Предложения, которые может взять модератор: не взятые никем, взятые
+    слишком давно или уже взятые им самим.
+    """
+    expired = now - timedelta(seconds=settings.OFFERS_MODERATION_CLAIM_TIMEOUT)
+    return (
+        Offer.objects
+        .filter(is_closed=False, moderation_statuses='ON_MODERATION')
+        .filter(
+            Q(moderator__isnull=True)
+            | Q(moderation_claimed_at__lt=expired)
+            | Q(moderator=moderator)
+        )
+    )
+
+
+def claim_offers(moderator, limit):
+    """
+    Закрепляет за модератором до limit предложений из очереди (в порядке
+    публикации) и возвращает их идентификаторы.
+    """
+    now = timezone.now()
+    available = get_available_offers(moderator, now)
+
+    with transaction.atomic():
+        ids = list(
+            available
+            .order_by('pub_date', 'id')
+            .select_for_update(skip_locked=True)
+            .values_list('id', flat=True)[:limit]
+        )
+        available.filter(pk__in=ids).update(
+            moderator=moderator,
+            moderation_claimed_at=now
+        )
+
+    return list(
+        Offer.objects
+        .filter(pk__in=ids, moderator=moderator, moderation_claimed_at=now)
+        .values_list('id', flat=True)
+    )
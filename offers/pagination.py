@@ -0,0 +1,260 @@
+import hashlib
+import uuid
+from base64 import b64decode, b64encode
+from collections import OrderedDict
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from . import feed
+from .utils import explain
+
+
+class OfferKeysetPagination(BasePagination):
+    """
+    Постраничный вывод предложений по ключу (keyset pagination).
+
+    Курсор содержит дату публикации и идентификатор последнего предложения
+    на странице. Следующая страница выбирается условием по этой паре полей,
+    поэтому стоимость запроса не зависит от глубины прокрутки, а подсчет
+    общего количества записей не выполняется.
+    """
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = api_settings.PAGE_SIZE
+    max_limit = 100
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.descending = self.is_descending(request)
+        position = self.decode_cursor(request)
+
+        results = self.get_results(queryset, position, self.limit + 1)
+        self.has_next = len(results) > self.limit
+        results = results[:self.limit]
+        if self.has_next:
+            last = results[-1]
+            self.next_position = (last.pub_date, last.id)
+        else:
+            self.next_position = None
+        return results
+
+    def get_results(self, queryset, position, count):
+        """Возвращает count предложений, следующих за позицией курсора."""
+        if self.descending:
+            queryset = queryset.order_by('-pub_date', '-id')
+        else:
+            queryset = queryset.order_by('pub_date', 'id')
+
+        if position is not None:
+            pub_date, offer_id = position
+            # Первое условие позволяет использовать индекс по pub_date для
+            # поиска диапазона, второе отсекает уже выданные записи с той же
+            # датой публикации
+            if self.descending:
+                queryset = queryset.filter(pub_date__lte=pub_date).filter(
+                    Q(pub_date__lt=pub_date) | Q(id__lt=offer_id))
+            else:
+                queryset = queryset.filter(pub_date__gte=pub_date).filter(
+                    Q(pub_date__gt=pub_date) | Q(id__gt=offer_id))
+
+        return list(queryset[:count])
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('results', data)
+        ]))
+
+    def get_limit(self, request):
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.default_limit
+        if limit <= 0:
+            return self.default_limit
+        return min(limit, self.max_limit)
+
+    def is_descending(self, request):
+        ordering = request.query_params.get(api_settings.ORDERING_PARAM, '')
+        return ordering != 'pub_date'
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position)
+        )
+
+    def encode_cursor(self, position):
+        pub_date, offer_id = position
+        value = f'{pub_date.isoformat()}|{offer_id}'
+        return b64encode(value.encode('ascii')).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            value = b64decode(encoded.encode('ascii')).decode('ascii')
+            pub_date, offer_id = value.split('|')
+            return date.fromisoformat(pub_date), uuid.UUID(offer_id)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class OfferFeedPagination(OfferKeysetPagination):
+    """
+    Постраничный вывод ленты подписок. Курсор устроен так же, как у списка
+    предложений, а сами предложения выбираются из ленты пользователя
+    (см. offers.feed). Лента всегда упорядочена от новых к старым.
+    """
+
+    def is_descending(self, request):
+        return True
+
+    def get_results(self, queryset, position, count):
+        return feed.get_feed_page(self.request.user, queryset, position, count)
+
+
+class OfferLimitOffsetPagination(LimitOffsetPagination):
+    """
+    Постраничный вывод по смещению с выбором способа подсчета общего
+    количества записей (параметр `count`):
+
+    * exact - точный COUNT(*) (по умолчанию);
+    * cached - COUNT(*), сохраняемый в кэше для каждого набора фильтров на
+      OFFERS_COUNT_CACHE_TIMEOUT секунд;
+    * estimate - оценка планировщика PostgreSQL, если она не меньше
+      OFFERS_COUNT_ESTIMATE_THRESHOLD, иначе точный подсчет;
+    * none - подсчет не выполняется, поле `count` в ответе отсутствует.
+
+    Поле `count_is_estimate` сообщает, может ли `count` отличаться от
+    точного значения.
+    """
+    count_query_param = 'count'
+    count_modes = ('exact', 'cached', 'estimate', 'none')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.offset = self.get_offset(request)
+        self.request = request
+        self.count, self.count_is_estimate = self.get_total(
+            queryset, self.get_count_mode(request))
+
+        if self.count is not None and not self.count_is_estimate:
+            self.has_next = self.offset + self.limit < self.count
+            if self.count == 0 or self.offset > self.count:
+                return []
+            return list(queryset[self.offset:self.offset + self.limit])
+
+        # без точного количества наличие следующей страницы определяется
+        # выборкой одной лишней записи
+        results = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(results) > self.limit
+        return results[:self.limit]
+
+    def get_paginated_response(self, data):
+        fields = []
+        if self.count is not None:
+            fields.append(('count', self.count))
+            fields.append(('count_is_estimate', self.count_is_estimate))
+        fields.extend([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ])
+        return Response(OrderedDict(fields))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        offset = self.offset + self.limit
+        return replace_query_param(url, self.offset_query_param, offset)
+
+    def get_count_mode(self, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode in self.count_modes:
+            return mode
+        return settings.OFFERS_COUNT_MODE
+
+    def get_total(self, queryset, mode):
+        """Возвращает пару (количество записей, является ли оно оценкой)."""
+        if mode == 'none':
+            return None, False
+        if mode == 'cached':
+            return self.get_cached_count(queryset)
+        if mode == 'estimate':
+            return self.get_estimated_count(queryset)
+        return self.get_count(queryset), False
+
+    def get_cached_count(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        digest = hashlib.md5(
+            f'{queryset.db}:{sql}:{params!r}'.encode('utf-8')
+        ).hexdigest()
+        key = f'offers:count:{digest}'
+
+        count = cache.get(key)
+        if count is not None:
+            return count, True
+
+        count = self.get_count(queryset)
+        cache.set(key, count, settings.OFFERS_COUNT_CACHE_TIMEOUT)
+        return count, False
+
+    def get_estimated_count(self, queryset):
+        if connections[queryset.db].vendor != 'postgresql':
+            return self.get_count(queryset), False
+
+        estimate = int(explain(queryset.order_by())['Plan Rows'])
+        if estimate < settings.OFFERS_COUNT_ESTIMATE_THRESHOLD:
+            return self.get_count(queryset), False
+        return estimate, True
+
+
+class OfferPagination(BasePagination):
+    """
+    Выбирает способ постраничного вывода для каждого запроса: по курсору,
+    если передан параметр `cursor` или `pagination=cursor`, иначе по
+    смещению (`limit`/`offset`).
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    keyset_class = OfferKeysetPagination
+    limit_offset_class = OfferLimitOffsetPagination
+
+    def get_paginator(self, request):
+        mode = request.query_params.get(self.mode_query_param)
+        if (mode == self.cursor_mode
+                or self.keyset_class.cursor_query_param in request.query_params):
+            return self.keyset_class()
+        return self.limit_offset_class()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
@@ -0,0 +1,66 @@
+"""
+Заглушки фотографий предложений для списков.
+
+При загрузке фотографии вычисляются ее размеры (с учетом ориентации из
+EXIF), преобладающий цвет и крошечное превью в формате WebP, закодированное
+в data URI. Они хранятся в OfferPhoto и передаются вместе со списком
+предложений, поэтому клиент может разметить карточки и показать размытое
+превью до загрузки самих фотографий.
+"""
+import base64
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image, ImageOps
+
+# теги EXIF с ориентацией, при которых ширина и высота меняются местами
+TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+# значения полей, если изображение не удалось прочитать
+EMPTY_PLACEHOLDER = {
+    'width': None,
+    'height': None,
+    'dominant_color': '',
+    'preview': '',
+}
+
+
+def get_dominant_color(image):
+    """Наиболее частый цвет изображения после сведения палитры."""
+    palette_image = image.convert('RGB').quantize(colors=4)
+    _, index = max(palette_image.getcolors())
+    red, green, blue = palette_image.getpalette()[index * 3:index * 3 + 3]
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def get_placeholder(file):
+    """
+    Возвращает словарь с полями width, height, dominant_color и preview
+    для файла изображения file.
+    """
+    size = settings.OFFERS_PHOTO_PREVIEW_SIZE
+    file.seek(0)
+    with Image.open(file) as image:
+        width, height = image.size
+        if image.getexif().get(0x0112) in TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+        # JPEG декодируется сразу в уменьшенном масштабе
+        image.draft('RGB', (size * 4, size * 4))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        image.thumbnail((size, size), Image.LANCZOS)
+
+        preview = BytesIO()
+        image.save(preview, 'WEBP',
+                   quality=settings.OFFERS_PHOTO_PREVIEW_QUALITY)
+        color = get_dominant_color(image)
+    file.seek(0)
+
+    encoded = base64.b64encode(preview.getvalue()).decode('ascii')
+    return {
+        'width': width,
+        'height': height,
+        'dominant_color': color,
+        'preview': f'data:image/webp;base64,{encoded}',
+    }
@@ -1,28 +1,30 @@
 from django.utils.translation import gettext_lazy as _
 from rest_framework.response import Response
 
+from api.renderers import EnvelopeTemplate
+
+
+# постоянная часть ответов кодируется в JSON один раз (см. api.renderers)
+ENVELOPE = EnvelopeTemplate({
+    'user_menu_links': {
+        "link_new_offer": "http://www.thingsfree/offers/",
+        "link_my_offers": "http://www.thingsfree/offers/{id}",
+        "link_my_likes": "To Be Determinted",
+        "link_following": "users/me/following",
+        "link_messages": "To Be Determinted"
+    },
+    'manage_profile': {
+        "edit_profile_link": "http://www.thingsfree/users/me/",
+        "logout_profile_link": "To Be Determinted"
+    },
+})
+
 
 def create_response(status, body):
     # статус http ответа совпадает с первыми тремя цифрами статуса бизнес-логики
     http_status = status // 1000
     return Response(
-        data={
-            'status': status,
-            'body': body,
-            'user_menu_links': {
-                "link_new_offer": "http://www.thingsfree/offers/",
-      
-                "link_my_offers": "http://www.thingsfree/offers/{id}",
-    
-                "link_my_likes": "To Be Determinted",
-      
-                "link_following": "users/me/following",
-      
-                "link_messages": "To Be Determinted"},
-            'manage_profile': {
-                "edit_profile_link": "http://www.thingsfree/users/me/",  
-                "logout_profile_link": "To Be Determinted"
-        }},
+        data=ENVELOPE.wrap(status, body),
         status=http_status
     )
 
@@ -36,4 +38,41 @@ OFFER_CREATION_OK = message(201100, _('Offer has been created.'))
 INVALID_OFFER_TITLE = message(400101, _('Please fill the title.'))
 INVALID_OFFER_DESCRIPTION = message(400102, _('Please fill the description.'))
 INVALID_OFFER_CATEGORY = message(400103, _('Please fill the category.'))
+INVALID_OFFERS_BATCH = message(400105, _('Expected a list of offers.'))
+INVALID_EXPORT_FORMAT = message(
+    400108, _('Export format must be one of: ndjson, csv.'))
+INVALID_PHOTOS_BATCH = message(
+    400109, _('Expected one or more image files in "link".'))
+INVALID_PHOTOS_BATCH_MODE = message(
+    400111, _('Batch mode must be one of: atomic, partial.'))
 OFFER_SAVING_ERROR = message(500101, _('Error in saving new offer.'))
+PHOTO_SAVING_ERROR = message(500102, _('Error in saving offer photos.'))
+
+
+def offers_batch_too_large(limit):
+    return message(
+        400106,
+        _('Too many offers in one request, the limit is %(limit)d.') % {'limit': limit}
+    )
+
+
+def invalid_moderation_data(errors):
+    return create_response(400107, errors)
+
+
+def batch_item(status, body):
+    # элемент ответа на пакетный запрос имеет тот же формат, что и ответ
+    # на одиночный запрос
+    return {'status': status, 'body': body}
+
+
+def photo_limit_exceeded(limit):
+    return message(
+        400110,
+        _('Too many photos, an offer may have at most %(limit)d.') % {'limit': limit}
+    )
+
+
+def photos_batch_rejected(results):
+    # в режиме atomic пакет не сохраняется, если хотя бы один файл неверен
+    return create_response(400112, results)
@@ -0,0 +1,227 @@
+"""
+Полнотекстовый поиск предложений по заголовку и описанию.
+
+В PostgreSQL у таблицы предложений есть колонка search_vector (tsvector с
+русской морфологией), которую заполняет триггер, и GIN-индекс по ней.
+В SQLite (среда разработки) используется виртуальная таблица FTS5
+(модель OfferSearchEntry), строки которой связаны с предложениями по их
+идентификатору и синхронизируются триггерами; морфологии в ней нет,
+поэтому слова запроса ищутся по префиксу.
+
+Условия поиска строятся из выражений Django, поэтому они остаются верными,
+когда запрос предложений становится подзапросом другого запроса. Триггеры,
+функции и индексы создаются миграцией (операция InstallSearch).
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections, router
+from django.db.migrations.operations import RunSQL
+from django.db.models import F, FloatField, Func, OuterRef, Q, Subquery
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.settings import api_settings
+
+from .models import Offer, OfferSearchEntry
+
+OFFER_TABLE = Offer._meta.db_table
+SEARCH_CONFIG = 'pg_catalog.russian'
+
+
+class PostgreSQLSearch:
+    vector_sql = (
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({{row}}title, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({{row}}description, '')), 'B')"
+    )
+    install_sql = (
+        'CREATE OR REPLACE FUNCTION offers_offer_search_vector_update() '
+        'RETURNS trigger AS $$ BEGIN '
+        f'NEW.search_vector := {vector_sql.format(row="NEW.")}; '
+        'RETURN NEW; '
+        'END $$ LANGUAGE plpgsql',
+
+        f'DROP TRIGGER IF EXISTS offers_offer_search_vector ON {OFFER_TABLE}',
+
+        'CREATE TRIGGER offers_offer_search_vector '
+        f'BEFORE INSERT OR UPDATE OF title, description ON {OFFER_TABLE} '
+        'FOR EACH ROW EXECUTE PROCEDURE offers_offer_search_vector_update()',
+
+        f'UPDATE {OFFER_TABLE} SET search_vector = {vector_sql.format(row="")} '
+        'WHERE search_vector IS NULL',
+
+        'CREATE INDEX IF NOT EXISTS offers_offer_search_idx '
+        f'ON {OFFER_TABLE} USING gin(search_vector)',
+    )
+    uninstall_sql = (
+        'DROP INDEX IF EXISTS offers_offer_search_idx',
+        f'DROP TRIGGER IF EXISTS offers_offer_search_vector ON {OFFER_TABLE}',
+        'DROP FUNCTION IF EXISTS offers_offer_search_vector_update()',
+    )
+
+    def build_query(self, text):
+        return text
+
+    def get_match(self, query):
+        return Q(search_vector=SearchQuery(query, config=SEARCH_CONFIG))
+
+    def get_rank(self, query):
+        return SearchRank(
+            F('search_vector'), SearchQuery(query, config=SEARCH_CONFIG))
+
+
+class SQLiteSearch:
+    fts_table = OfferSearchEntry._meta.db_table
+    # строки индекса связаны с предложениями по идентификатору: rowid
+    # таблицы без целочисленного первичного ключа может измениться при VACUUM
+    install_sql = (
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5('
+        'offer_id UNINDEXED, title, description, '
+        "tokenize='unicode61 remove_diacritics 2')",
+
+        f'CREATE TRIGGER IF NOT EXISTS {fts_table}_insert '
+        f'AFTER INSERT ON {OFFER_TABLE} BEGIN '
+        f'INSERT INTO {fts_table}(offer_id, title, description) '
+        'VALUES (new.id, new.title, new.description); '
+        'END',
+
+        f'CREATE TRIGGER IF NOT EXISTS {fts_table}_delete '
+        f'AFTER DELETE ON {OFFER_TABLE} BEGIN '
+        f'DELETE FROM {fts_table} WHERE offer_id = old.id; '
+        'END',
+
+        f'CREATE TRIGGER IF NOT EXISTS {fts_table}_update '
+        f'AFTER UPDATE OF title, description ON {OFFER_TABLE} BEGIN '
+        f'UPDATE {fts_table} SET title = new.title, '
+        'description = new.description WHERE offer_id = old.id; '
+        'END',
+
+        f'INSERT INTO {fts_table}(offer_id, title, description) '
+        f'SELECT id, title, description FROM {OFFER_TABLE} '
+        f'WHERE id NOT IN (SELECT offer_id FROM {fts_table})',
+    )
+    uninstall_sql = (
+        f'DROP TRIGGER IF EXISTS {fts_table}_update',
+        f'DROP TRIGGER IF EXISTS {fts_table}_delete',
+        f'DROP TRIGGER IF EXISTS {fts_table}_insert',
+        f'DROP TABLE IF EXISTS {fts_table}',
+    )
+
+    def build_query(self, text):
+        words = re.findall(r'\w+', text)
+        return ' '.join(f'"{word}"*' for word in words)
+
+    def get_match(self, query):
+        return Q(pk__in=OfferSearchEntry.objects
+                 .filter(document__match=query)
+                 .values('offer'))
+
+    def get_rank(self, query):
+        # bm25 возвращает тем меньшее значение, чем лучше совпадение;
+        # веса колонок offer_id, title и description: совпадение в
+        # заголовке весит больше, чем в описании
+        bm25 = Func(
+            F('document'),
+            function='bm25',
+            template='-%(function)s(%(expressions)s, 0.0, 10.0, 1.0)',
+            output_field=FloatField()
+        )
+        return Subquery(
+            OfferSearchEntry.objects
+            .filter(offer=OuterRef('pk'), document__match=query)
+            .annotate(rank=bm25)
+            .values('rank')[:1],
+            output_field=FloatField()
+        )
+
+
+SEARCH_BACKENDS = {
+    'postgresql': PostgreSQLSearch(),
+    'sqlite': SQLiteSearch(),
+}
+
+
+def get_search_backend(using='default'):
+    return SEARCH_BACKENDS.get(connections[using].vendor)
+
+
+def install_search(using='default'):
+    """
+    Создает объекты базы данных для полнотекстового поиска. Повторный
+    вызов ничего не меняет; используется миграцией и тестами, которые
+    запускаются без миграций.
+    """
+    backend = get_search_backend(using)
+    if backend is None:
+        return
+
+    with connections[using].cursor() as cursor:
+        for sql in backend.install_sql:
+            cursor.execute(sql)
+
+
+class InstallSearch(RunSQL):
+    """
+    Миграция, выполняющая SQL полнотекстового поиска для используемой СУБД:
+    install_sql при применении и uninstall_sql при откате.
+    """
+
+    def __init__(self, hints=None):
+        super().__init__(RunSQL.noop, RunSQL.noop, hints=hints)
+
+    def deconstruct(self):
+        kwargs = {'hints': self.hints} if self.hints else {}
+        return self.__class__.__qualname__, [], kwargs
+
+    def run(self, app_label, schema_editor, sql_name):
+        backend = SEARCH_BACKENDS.get(schema_editor.connection.vendor)
+        if backend is not None and router.allow_migrate(
+                schema_editor.connection.alias, app_label, **self.hints):
+            self._run_sql(schema_editor, getattr(backend, sql_name))
+
+    def database_forwards(self, app_label, schema_editor, from_state,
+                          to_state):
+        self.run(app_label, schema_editor, 'install_sql')
+
+    def database_backwards(self, app_label, schema_editor, from_state,
+                           to_state):
+        self.run(app_label, schema_editor, 'uninstall_sql')
+
+    def describe(self):
+        return 'Install full-text search for offers'
+
+
+def search_offers(queryset, text):
+    """
+    Оставляет в queryset только предложения, соответствующие тексту
+    запроса, и добавляет к ним аннотацию search_rank.
+    """
+    backend = get_search_backend(queryset.db)
+    if backend is None:
+        return queryset.none()
+
+    query = backend.build_query(text)
+    if not query:
+        return queryset.none()
+
+    return (
+        queryset
+        .filter(backend.get_match(query))
+        .annotate(search_rank=backend.get_rank(query))
+    )
+
+
+class OfferSearchFilter(BaseFilterBackend):
+    """
+    Фильтр по тексту из параметра `q`. Если порядок сортировки не задан
+    явно, результаты упорядочиваются по релевантности.
+    """
+    search_param = 'q'
+
+    def filter_queryset(self, request, queryset, view):
+        text = request.query_params.get(self.search_param, '').strip()
+        if not text:
+            return queryset
+
+        queryset = search_offers(queryset, text)
+        if api_settings.ORDERING_PARAM not in request.query_params:
+            queryset = queryset.order_by('-search_rank', '-pub_date', '-id')
+        return queryset
@@ -1,8 +1,45 @@
+from collections import defaultdict
+
 from rest_framework import serializers
 
+from api.serializers import (SparseFieldsetSerializerMixin,
+                             get_sparse_fieldset)
 from cities.models import City
 
-from .models import CloseReason, Offer, OfferCategory, OfferPhoto
+from .images import get_cover_url, get_derivative_urls
+from .models import (CloseReason, Offer, OfferCategory, OfferPhoto,
+                     get_placeholder_payload)
+
+
+# заглушки всех фотографий (превью в data URI) заметно увеличивают ответ,
+# поэтому выводятся только по запросу ?fields=...,placeholders; заглушка
+# обложки передается всегда в поле cover
+OPTIONAL_OFFER_FIELDS = ('placeholders',)
+
+
+def get_photo_thumbnails(photo):
+    return get_derivative_urls(photo.link.name, photo.derivatives_ready)
+
+
+def get_photos_thumbnails(photos):
+    return [get_photo_thumbnails(photo) for photo in photos]
+
+
+def get_cover(photo_id, link, derivatives_ready, placeholder):
+    """Обложка предложения - его первая фотография."""
+    return {
+        'id': str(photo_id),
+        'thumbnail': get_cover_url(link, derivatives_ready),
+        'placeholder': placeholder,
+    }
+
+
+def get_photos_cover(photos):
+    if not photos:
+        return None
+    photo = photos[0]
+    return get_cover(photo.id, photo.link.name, photo.derivatives_ready,
+                     photo.get_placeholder())
 
 
 class CloseReasonSerializer(serializers.ModelSerializer):
@@ -19,28 +56,207 @@ class OfferCategorySerializer(serializers.ModelSerializer):
         model = OfferCategory
 
 
-class OfferNotClosedSerializer(serializers.ModelSerializer):
+class OfferNotClosedSerializer(SparseFieldsetSerializerMixin,
+                               serializers.ModelSerializer):
     author = serializers.SlugRelatedField(slug_field='username', read_only=True)
     category = serializers.SlugRelatedField(slug_field='id', queryset=OfferCategory.objects.all())
     city = serializers.SlugRelatedField(slug_field='id', queryset=City.objects.all(), required=False)
-    
+    thumbnails = serializers.SerializerMethodField()
+    placeholders = serializers.SerializerMethodField()
+    cover = serializers.SerializerMethodField()
+    optional_fields = OPTIONAL_OFFER_FIELDS
+
     class Meta:
-        fields = ("pk", "author", "title", "description", "category", "is_service",
-     "is_used", "city", "pub_date", "is_private", "moderation_statuses", "is_closed", "photos")       
+        fields = ("pk", "author", "title", "description", "category",
+                  "is_service", "is_used", "city", "pub_date", "is_private",
+                  "moderation_statuses", "is_closed", "photo_count", "photos",
+                  "thumbnails", "placeholders", "cover")
         model = Offer
         read_only_fields=("moderation_statuses",)
 
+    def get_thumbnails(self, obj):
+        return get_photos_thumbnails(obj.photos.all())
+
+    def get_placeholders(self, obj):
+        return [photo.get_placeholder() for photo in obj.photos.all()]
+
+    def get_cover(self, obj):
+        return get_photos_cover(obj.photos.all())
 
-class OfferNotClosedSerializerModeration(serializers.ModelSerializer):
+
+class OfferNotClosedSerializerModeration(SparseFieldsetSerializerMixin,
+                                         serializers.ModelSerializer):
     author = serializers.SlugRelatedField(slug_field='username', read_only=True)
     category = serializers.SlugRelatedField(slug_field='id', queryset=OfferCategory.objects.all())
     city = serializers.SlugRelatedField(slug_field='id', queryset=City.objects.all(), required=False)
-    
+    thumbnails = serializers.SerializerMethodField()
+    placeholders = serializers.SerializerMethodField()
+    cover = serializers.SerializerMethodField()
+    optional_fields = OPTIONAL_OFFER_FIELDS
+
     class Meta:
-        fields = ("pk", "author", "title", "description", "category", "is_service",
-     "is_used", "city", "pub_date", "is_private", "moderation_statuses", "is_closed", "photos")       
+        fields = ("pk", "author", "title", "description", "category",
+                  "is_service", "is_used", "city", "pub_date", "is_private",
+                  "moderation_statuses", "is_closed", "photo_count", "photos",
+                  "thumbnails", "placeholders", "cover")
         model = Offer
 
+    def get_thumbnails(self, obj):
+        return get_photos_thumbnails(obj.photos.all())
+
+    def get_placeholders(self, obj):
+        return [photo.get_placeholder() for photo in obj.photos.all()]
+
+    def get_cover(self, obj):
+        return get_photos_cover(obj.photos.all())
+
+
+class OfferRowSerializer:
+    """
+    Быстрая сериализация предложений для чтения. Вместо экземпляров модели
+    и полей DRF используются строки values_list(named=True), из которых
+    напрямую строятся словари. JSON-представление результата совпадает с
+    представлением OfferNotClosedSerializer.
+
+    Строки имеют атрибуты id, pub_date и updated_at, поэтому с ними
+    работают постраничный вывод и вычисление валидаторов.
+    """
+    # поле ответа и колонка строки; фотографии, их уменьшенные копии,
+    # заглушки и обложка загружаются одним отдельным запросом, в котором
+    # фотографии упорядочены так же, как в OfferPhoto.Meta.ordering
+    row_fields = (
+        ('pk', 'id'),
+        ('author', 'author__username'),
+        ('title', 'title'),
+        ('description', 'description'),
+        ('category', 'category_id'),
+        ('is_service', 'is_service'),
+        ('is_used', 'is_used'),
+        ('city', 'city_id'),
+        ('pub_date', 'pub_date'),
+        ('is_private', 'is_private'),
+        ('moderation_statuses', 'moderation_statuses'),
+        ('is_closed', 'is_closed'),
+        ('photo_count', 'photo_count'),
+        ('photos', None),
+        ('thumbnails', None),
+        ('placeholders', None),
+        ('cover', None),
+    )
+    required_columns = ('id', 'pub_date', 'updated_at')
+
+    def __init__(self, request=None):
+        fieldset = get_sparse_fieldset(
+            request, [name for name, _ in self.row_fields],
+            OPTIONAL_OFFER_FIELDS)
+        self.fields = [
+            (name, column) for name, column in self.row_fields
+            if fieldset is None or name in fieldset
+        ]
+        self.with_photos = any(column is None for _, column in self.fields)
+
+    def get_rows(self, queryset):
+        columns = list(self.required_columns)
+        columns.extend(
+            column for _, column in self.fields
+            if column is not None and column not in columns
+        )
+        return queryset.prefetch_related(None).values_list(*columns, named=True)
+
+    def get_photos(self, rows):
+        """
+        Словари {id предложения: значение} для полей photos, thumbnails,
+        placeholders и cover.
+        """
+        photos = {
+            name: defaultdict(list)
+            for name in ('photos', 'thumbnails', 'placeholders')
+        }
+        photos['cover'] = defaultdict(lambda: None)
+        if self.with_photos and rows:
+            for photo in (
+                OfferPhoto.objects
+                .filter(offer_id__in=[row.id for row in rows])
+                .values_list('offer_id', 'id', 'link', 'derivatives_ready',
+                             'width', 'height', 'dominant_color', 'preview',
+                             named=True)
+            ):
+                photos['photos'][photo.offer_id].append(photo.id)
+                photos['thumbnails'][photo.offer_id].append(
+                    get_derivative_urls(photo.link, photo.derivatives_ready))
+                placeholder = get_placeholder_payload(
+                    photo.width, photo.height, photo.dominant_color,
+                    photo.preview)
+                photos['placeholders'][photo.offer_id].append(placeholder)
+                if photo.offer_id not in photos['cover']:
+                    photos['cover'][photo.offer_id] = get_cover(
+                        photo.id, photo.link, photo.derivatives_ready,
+                        placeholder)
+        return photos
+
+    def to_representation(self, rows):
+        photos = self.get_photos(rows)
+        data = []
+        for row in rows:
+            item = {}
+            for name, column in self.fields:
+                if column is None:
+                    item[name] = photos[name][row.id]
+                elif name == 'pk':
+                    item[name] = str(row.id)
+                elif name == 'pub_date':
+                    item[name] = row.pub_date.isoformat()
+                else:
+                    item[name] = getattr(row, column)
+            data.append(item)
+        return data
+
+
+class OfferBulkCreateSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для пакетного создания предложений. Категории и города
+    ищутся в словарях `categories` и `cities` из контекста, которые
+    загружаются одним запросом на весь пакет.
+    """
+    category = serializers.UUIDField()
+    city = serializers.UUIDField(required=False, allow_null=True)
+
+    class Meta:
+        fields = ("title", "description", "category", "is_service", "is_used",
+                  "city", "is_private", "is_closed")
+        model = Offer
+
+    def validate_category(self, value):
+        category = self.context['categories'].get(value)
+        if category is None:
+            raise serializers.ValidationError('Category does not exist.')
+        return category
+
+    def validate_city(self, value):
+        if value is None:
+            return None
+        city = self.context['cities'].get(value)
+        if city is None:
+            raise serializers.ValidationError('City does not exist.')
+        return city
+
+
+class OfferBulkModerationSerializer(serializers.Serializer):
+    """
+    Данные для пакетной модерации: новый статус и либо список
+    идентификаторов предложений, либо признак `all`, означающий все
+    ожидающие модерации предложения, соответствующие фильтрам запроса.
+    """
+    status = serializers.ChoiceField(choices=('APPROVED', 'REFUSED'))
+    ids = serializers.ListField(child=serializers.UUIDField(), required=False)
+    all = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == attrs['all']:
+            raise serializers.ValidationError(
+                'Either "ids" or "all" must be specified.')
+        return attrs
+
 
 # пока не используется, нужен будет для вью по закрытым офферам
 class OfferClosedSerializer(serializers.ModelSerializer):
@@ -56,9 +272,14 @@ class OfferClosedSerializer(serializers.ModelSerializer):
         model = Offer
 
 
-class OfferPhotoSerializer(serializers.ModelSerializer):
+class OfferPhotoSerializer(SparseFieldsetSerializerMixin,
+                           serializers.ModelSerializer):
     offer = serializers.SlugRelatedField(slug_field='id', read_only=True)
+    thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         fields = '__all__'
         model = OfferPhoto
+
+    def get_thumbnails(self, obj):
+        return get_photo_thumbnails(obj)
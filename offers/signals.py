@@ -0,0 +1,122 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import (post_delete, post_save, pre_delete,
+                                      pre_save)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from cities.models import City
+from users.models import Following, User
+
+from . import cache, feed, images
+from .models import Offer, OfferPhoto, PhotoFile
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+@receiver(post_save, sender=OfferPhoto)
+@receiver(post_delete, sender=OfferPhoto)
+def invalidate_offer_lists(sender, **kwargs):
+    cache.bump_generation_on_commit()
+
+
+def touch_offers(offers):
+    """
+    Обновляет время изменения предложений offers, представление которых
+    изменилось вместе со связанными данными, и сбрасывает кэш списков.
+    """
+    if offers.update(updated_at=timezone.now()):
+        cache.bump_generation_on_commit()
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, update_fields=None, **kwargs):
+    # имя пользователя входит в представление его предложений
+    if instance._state.adding or (
+            update_fields is not None and 'username' not in update_fields):
+        return
+    instance._saved_username = (
+        User.objects.filter(pk=instance.pk)
+        .values_list('username', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=User)
+def touch_author_offers(sender, instance, **kwargs):
+    saved_username = instance.__dict__.pop('_saved_username', None)
+    if saved_username is not None and saved_username != instance.username:
+        touch_offers(Offer.objects.filter(author=instance))
+
+
+@receiver(pre_delete, sender=City)
+def touch_city_offers(sender, instance, **kwargs):
+    # населенный пункт удаляется из предложений одним UPDATE (SET_NULL),
+    # который не отправляет сигналов
+    touch_offers(Offer.objects.filter(city=instance))
+
+
+@receiver(post_save, sender=OfferPhoto)
+def touch_offer(sender, instance, **kwargs):
+    # фотографии входят в представление предложения, поэтому их изменение
+    # должно менять ETag и Last-Modified предложения
+    Offer.objects.filter(pk=instance.offer_id).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=OfferPhoto)
+def release_photo_slot(sender, instance, **kwargs):
+    # как и touch_offer, меняет валидаторы предложения
+    Offer.objects.filter(pk=instance.offer_id).update(
+        photo_count=Greatest(F('photo_count') - 1, 0),
+        updated_at=timezone.now()
+    )
+
+
+@receiver(post_save, sender=Offer)
+def update_feeds(sender, instance, created, **kwargs):
+    # состояние при загрузке неизвестно, если предложение было загружено
+    # без этих полей; повторная запись в ленты в этом случае безопасна
+    was_public = False if created else getattr(
+        instance, '_loaded_is_public', None)
+    if instance.is_public and was_public is not True:
+        feed.add_offers([instance])
+    elif not instance.is_public and was_public is not False:
+        feed.remove_offers([instance.pk])
+    instance._loaded_is_public = instance.is_public
+
+
+@receiver(post_save, sender=Following)
+def fill_feed(sender, instance, created, **kwargs):
+    if created:
+        feed.add_following(instance)
+
+
+@receiver(post_delete, sender=Following)
+def clear_feed(sender, instance, **kwargs):
+    feed.remove_following(instance)
+
+
+@receiver(post_save, sender=City)
+def update_offer_regions(sender, instance, **kwargs):
+    # регион хранится в предложениях, поэтому перенос населенного пункта
+    # в другой регион должен изменить и их
+    updated = (
+        Offer.objects
+        .filter(city=instance)
+        .exclude(region=instance.region_id)
+        .update(region=instance.region_id, updated_at=timezone.now())
+    )
+    if updated:
+        cache.bump_generation_on_commit()
+
+
+@receiver(post_save, sender=OfferPhoto)
+def create_photo_derivatives(sender, instance, **kwargs):
+    if getattr(instance, '_link_changed', False):
+        images.create_derivatives(instance)
+
+
+@receiver(post_delete, sender=OfferPhoto)
+def release_photo_file(sender, instance, **kwargs):
+    if instance.link:
+        PhotoFile.release(instance.link.name)
@@ -0,0 +1,106 @@
+"""
+Хранилище фотографий предложений с адресацией по содержимому.
+
+При сохранении файл записывается во временный файл с одновременным
+вычислением SHA-256, после чего переносится в каталог, определяемый
+хешем: photos/ab/cd/abcd....jpg. Расширение определяется форматом
+изображения, а не именем загруженного файла, поэтому одинаковые файлы с
+разными расширениями (.jpg, .jpeg, .JPG) также совпадают. Если файл с таким содержимым уже есть,
+временный файл удаляется, и запись ссылается на существующий. Количество
+ссылок на файл хранится в модели PhotoFile; файл и его уменьшенные копии
+удаляются, когда ссылок не остается.
+"""
+import hashlib
+import os
+import tempfile
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+from PIL import Image
+
+PHOTOS_DIR = 'photos'
+TEMP_DIR = os.path.join(PHOTOS_DIR, 'tmp')
+
+# расширения файлов для форматов изображений, определяемых Pillow
+FORMAT_EXTENSIONS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'GIF': '.gif',
+    'WEBP': '.webp',
+    'BMP': '.bmp',
+    'TIFF': '.tiff',
+}
+
+
+def get_content_name(digest, extension):
+    """Имя файла в хранилище для хеша содержимого digest."""
+    return '/'.join(
+        [PHOTOS_DIR, digest[:2], digest[2:4], f'{digest}{extension}'])
+
+
+def get_extension(name, content):
+    """
+    Расширение файла по формату изображения content; для нераспознанного
+    формата - расширение имени name в нижнем регистре.
+    """
+    image_format = None
+    try:
+        content.seek(0)
+        with Image.open(content) as image:
+            image_format = image.format
+    except (OSError, ValueError):
+        pass
+    finally:
+        content.seek(0)
+    return FORMAT_EXTENSIONS.get(
+        image_format, os.path.splitext(name)[1].lower())
+
+
+def get_derivative_name(name, key):
+    """Имя файла копии key для файла name в хранилище."""
+    stem, _ = os.path.splitext(name)
+    return f'{stem}_{key}.webp'
+
+
+@deconstructible
+class PhotoStorage(FileSystemStorage):
+    """Файловое хранилище, в котором имя файла - хеш его содержимого."""
+
+    def get_available_name(self, name, max_length=None):
+        # итоговое имя определяется содержимым в _save
+        return name
+
+    def _save(self, name, content):
+        temp_dir = self.path(TEMP_DIR)
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+
+            name = get_content_name(
+                digest.hexdigest(), get_extension(name, content))
+            full_path = self.path(name)
+            if os.path.exists(full_path):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                os.chmod(temp_path, self.file_permissions_mode or 0o644)
+                os.replace(temp_path, full_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return name
+
+    def delete_photo(self, name, derivatives):
+        """Удаляет файл name и его копии с названиями из derivatives."""
+        self.delete(name)
+        for key in derivatives:
+            self.delete(get_derivative_name(name, key))
+
+
+photo_storage = PhotoStorage()
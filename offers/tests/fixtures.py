@@ -0,0 +1,131 @@
+from io import BytesIO
+
+import pytest
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from cities.models import City, Region
+from offers.models import Offer, OfferCategory, OfferPhoto
+from offers.search import install_search
+
+
+@pytest.fixture
+def region():
+    """Регион для создаваемых населенных пунктов."""
+    return Region.objects.create(name='Московская область')
+
+
+@pytest.fixture
+def city(region):
+    """Населенный пункт для создаваемых предложений."""
+    return City.objects.create(name='Подольск', region=region)
+
+
+@pytest.fixture
+def category():
+    """Категория для создаваемых предложений."""
+    return OfferCategory.objects.create(name='Мебель')
+
+
+@pytest.fixture
+def search_installed(transactional_db):
+    """
+    Создает объекты полнотекстового поиска: их создает миграция, а тесты
+    запускаются без миграций.
+    """
+    install_search()
+
+
+@pytest.fixture
+def offer_generator(user_generator, category, city):
+    """
+    Возвращает функцию, создающую заданное количество одобренных
+    предложений. Каждое предложение принадлежит новому пользователю и
+    содержит одну фотографию.
+    """
+    def generator(count, **kwargs):
+        offers = []
+        for number in range(count):
+            fields = {
+                'author': next(user_generator),
+                'title': f'Предложение {number}',
+                'description': f'Описание предложения {number}',
+                'category': category,
+                'city': city,
+                'is_service': False,
+                'is_used': True,
+                'is_private': False,
+                'is_closed': False,
+                'moderation_statuses': 'APPROVED',
+            }
+            fields.update(kwargs)
+            offer = Offer.objects.create(**fields)
+            OfferPhoto.objects.create(offer=offer)
+            # фотография меняет photo_count и updated_at предложения
+            offer.refresh_from_db()
+            offers.append(offer)
+        return offers
+
+    return generator
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Очищает кэш, чтобы ответы не переходили из одного теста в другой."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def staff_user(django_user_model, default_password):
+    """Пользователь с правами модератора."""
+    return django_user_model.objects.create_user(
+        username='moderator',
+        email='moderator@user.ru',
+        phone_number='+79604566771',
+        password=default_password,
+        is_staff=True,
+    )
+
+
+@pytest.fixture
+def staff_client(staff_user):
+    client = APIClient()
+    refresh = RefreshToken.for_user(staff_user)
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+    return client
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    """
+    Сохраняет загружаемые файлы во временный каталог; уменьшенные копии
+    фотографий создаются сразу, без пула процессов.
+    """
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.OFFERS_PHOTO_DERIVATIVES_SYNC = True
+    return tmp_path
+
+
+@pytest.fixture
+def jpeg_generator():
+    """
+    Возвращает функцию, создающую загружаемый файл JPEG заданного размера
+    с метаданными EXIF; orientation - значение тега ориентации.
+    """
+    def generator(width=1600, height=1200, orientation=None, color='red'):
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        if orientation is not None:
+            exif[0x0112] = orientation
+        content = BytesIO()
+        Image.new('RGB', (width, height), color).save(
+            content, 'JPEG', exif=exif.tobytes())
+        return SimpleUploadedFile('photo.jpg', content.getvalue(),
+                                  content_type='image/jpeg')
+
+    return generator
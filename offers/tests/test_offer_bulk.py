@@ -0,0 +1,98 @@
+import uuid
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from offers.models import Offer
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOfferBulkCreate:
+    """Набор тестов для пакетного создания предложений."""
+
+    url = '/api/v1/offers/bulk/'
+
+    def post(self, client, items):
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(self.url, data=items, format='json')
+        response_data = response.json()
+        return (
+            response.status_code,
+            response_data.get('status', 0),
+            response_data.get('body', {}),
+            len(context.captured_queries)
+        )
+
+    def make_items(self, count, category, city):
+        return [
+            {
+                'title': f'Предложение {number}',
+                'description': 'Описание',
+                'category': str(category.id),
+                'city': str(city.id),
+                'is_service': False,
+                'is_used': True,
+                'is_private': False,
+                'is_closed': False,
+            }
+            for number in range(count)
+        ]
+
+    def test_bulk_create(self, user_client, existent_user, category, city):
+        msg_pattern = f'При POST запросе {self.url} {{}}'
+        items = self.make_items(3, category, city)
+
+        http_status, app_status, body, _ = self.post(user_client, items)
+
+        assert http_status == 200, msg_pattern.format(
+            pytest.msg['wrong_http_status'])
+        assert app_status == 200000, msg_pattern.format(
+            pytest.msg['wrong_app_status'])
+        assert [item['status'] for item in body] == [201100] * 3
+        assert Offer.objects.filter(author=existent_user).count() == 3, \
+            msg_pattern.format('предложения не созданы')
+        assert {item['body']['pk'] for item in body} == {
+            str(pk) for pk in Offer.objects.values_list('pk', flat=True)
+        }
+
+    def test_num_queries_does_not_depend_on_batch_size(self, user_client,
+                                                       category, city):
+        *_, small_batch_queries = self.post(
+            user_client, self.make_items(2, category, city))
+        *_, large_batch_queries = self.post(
+            user_client, self.make_items(20, category, city))
+
+        assert small_batch_queries == large_batch_queries, \
+            f'При POST запросе {self.url} {pytest.msg["wrong_num_queries"]}'
+
+    def test_partially_invalid_batch(self, user_client, category, city):
+        items = self.make_items(3, category, city)
+        del items[0]['title']
+        items[1]['category'] = str(uuid.uuid4())
+
+        _, _, body, _ = self.post(user_client, items)
+
+        assert [item['status'] for item in body] == [400104, 400104, 201100], \
+            'Неверные статусы элементов пакетного запроса'
+        assert 'title' in body[0]['body']
+        assert 'category' in body[1]['body']
+        assert Offer.objects.count() == 1, \
+            'Создаются предложения с некорректными данными'
+
+    def test_invalid_payload(self, user_client):
+        http_status, app_status, _, _ = self.post(user_client, {'title': 'abc'})
+
+        assert http_status == 400
+        assert app_status == 400105
+
+    def test_unauthorized_bulk_create(self, client, category, city):
+        response = client.post(
+            self.url,
+            data=self.make_items(1, category, city),
+            content_type='application/json'
+        )
+
+        assert response.status_code == 401, \
+            f'При POST запросе {self.url} без токена доступа ' \
+            f'{pytest.msg["wrong_http_status"]}'
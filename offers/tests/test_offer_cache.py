@@ -0,0 +1,82 @@
+import pytest
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOfferListCache:
+    """Набор тестов для кэширования списка предложений."""
+
+    url = '/api/v1/offers/'
+
+    def get(self, client, params=None, **extra):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.url, data=params, **extra)
+        response_body = response.json().get('body', {})
+        return response_body, len(context.captured_queries)
+
+    def test_repeated_request_is_cached(self, client, offer_generator):
+        offer_generator(3)
+
+        first_body, _ = self.get(client, {'limit': 10, 'ordering': 'pub_date'})
+        second_body, num_queries = self.get(
+            client, {'ordering': 'pub_date', 'limit': 10})
+
+        assert num_queries == 0, \
+            'Повторный запрос списка предложений выполняется без кэша'
+        assert first_body == second_body, \
+            'Закэшированный ответ отличается от исходного'
+
+    @pytest.mark.parametrize('change', ['create', 'update', 'delete', 'photo'])
+    def test_cache_invalidation(self, client, offer_generator, change):
+        offer, = offer_generator(1)
+        self.get(client)
+
+        if change == 'create':
+            offer_generator(1)
+        elif change == 'update':
+            offer.title = 'Новый заголовок'
+            offer.save()
+        elif change == 'delete':
+            offer.delete()
+        else:
+            offer.photos.first().delete()
+
+        _, num_queries = self.get(client)
+        assert num_queries > 0, \
+            f'После изменения данных ({change}) возвращается устаревший список'
+
+    def test_invalidation_after_commit(self, client, offer_generator):
+        offer, = offer_generator(1)
+        self.get(client)
+
+        with transaction.atomic():
+            offer.title = 'Новый заголовок'
+            offer.save()
+            _, num_queries = self.get(client)
+            assert num_queries == 0, \
+                'Кэш сбрасывается до фиксации транзакции'
+
+        body, num_queries = self.get(client)
+        assert num_queries > 0
+        assert body['results'][0]['title'] == 'Новый заголовок'
+
+    def test_scheme_in_key(self, client, offer_generator):
+        offer_generator(3)
+
+        http_body, _ = self.get(client, {'limit': 1})
+        https_body, num_queries = self.get(client, {'limit': 1}, secure=True)
+
+        assert num_queries > 0, \
+            'Ответы на запросы по http и https хранятся под одним ключом'
+        assert https_body['next'].startswith('https://')
+        assert http_body['next'].startswith('http://')
+
+    def test_staff_list_is_not_cached(self, staff_client, offer_generator):
+        offer_generator(1, moderation_statuses='ON_MODERATION')
+
+        self.get(staff_client)
+        body, num_queries = self.get(staff_client)
+
+        assert num_queries > 0, 'Список предложений для модератора кэшируется'
+        assert body['count'] == 1
@@ -0,0 +1,99 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOfferConditionalGet:
+    """Набор тестов для условных GET-запросов к предложениям."""
+
+    url = '/api/v1/offers/'
+
+    def test_retrieve_not_modified(self, client, offer_generator):
+        offer, = offer_generator(1)
+        url = f'{self.url}{offer.id}/'
+        msg_pattern = f'При условном GET запросе {url} {{}}'
+
+        response = client.get(url)
+        etag = response['ETag']
+        assert response.status_code == 200
+        assert 'Last-Modified' in response, msg_pattern.format(
+            'не передается заголовок Last-Modified')
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304, msg_pattern.format(
+            pytest.msg['wrong_http_status'])
+        assert len(context.captured_queries) == 1, msg_pattern.format(
+            'предложение загружается полностью')
+
+    def test_retrieve_modified(self, client, offer_generator):
+        offer, = offer_generator(1)
+        url = f'{self.url}{offer.id}/'
+        etag = client.get(url)['ETag']
+
+        offer.photos.first().delete()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200, \
+            f'После удаления фотографии GET запрос {url} возвращает 304'
+        assert response['ETag'] != etag
+        assert response.json()['body']['photos'] == []
+
+    def test_author_renamed(self, client, offer_generator):
+        offer, = offer_generator(1)
+        url = f'{self.url}{offer.id}/'
+        etag = client.get(url)['ETag']
+
+        author = offer.author
+        author.username = 'renamed'
+        author.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200, \
+            f'После переименования автора GET запрос {url} возвращает 304'
+        assert response.json()['body']['author'] == 'renamed'
+
+    def test_city_deleted(self, client, offer_generator):
+        offer, = offer_generator(1)
+        url = f'{self.url}{offer.id}/'
+        etag = client.get(url)['ETag']
+
+        offer.city.delete()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200, \
+            f'После удаления населенного пункта GET запрос {url} возвращает 304'
+        assert response.json()['body']['city'] is None
+
+    def test_retrieve_by_last_modified(self, client, offer_generator):
+        offer, = offer_generator(1)
+        url = f'{self.url}{offer.id}/'
+        last_modified = client.get(url)['Last-Modified']
+
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        assert response.status_code == 304, \
+            f'При GET запросе {url} с If-Modified-Since ' \
+            f'{pytest.msg["wrong_http_status"]}'
+
+    def test_list_not_modified(self, client, offer_generator):
+        offers = offer_generator(2)
+        params = {'limit': 1}
+
+        etag = client.get(self.url, data=params)['ETag']
+        response = client.get(self.url, data=params, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, \
+            f'При условном GET запросе {self.url} ' \
+            f'{pytest.msg["wrong_http_status"]}'
+
+        other_etag = client.get(self.url, data={'limit': 1, 'offset': 1})['ETag']
+        assert other_etag != etag, 'Разные страницы списка имеют одинаковый ETag'
+
+        for offer in offers:
+            offer.title = 'Новый заголовок'
+            offer.save()
+        response = client.get(self.url, data=params, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, \
+            f'После изменения предложения GET запрос {self.url} возвращает 304'
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from offers.models import OfferPhoto
+from offers.storage import get_derivative_name
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOfferCover:
+    """Набор тестов для обложки предложения в списке предложений."""
+
+    url = '/api/v1/offers/'
+
+    def get_results(self, client, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.url, data=params)
+        assert response.status_code == 200, pytest.msg['wrong_http_status']
+        return response.json()['body']['results'], context.captured_queries
+
+    def test_cover_is_first_photo(self, client, offer_generator,
+                                  jpeg_generator):
+        offer, = offer_generator(1)
+        # фотография из offer_generator загружена раньше и не имеет файла
+        offer.photos.update(uploaded_at=timezone.now() + timedelta(days=1))
+        first = OfferPhoto.objects.create(
+            offer=offer, link=jpeg_generator(color='green'))
+        OfferPhoto.objects.create(offer=offer, link=jpeg_generator())
+        first.refresh_from_db()
+
+        item, = self.get_results(
+            client, {'fields': 'photo_count,photos,cover'})[0]
+
+        assert item['photo_count'] == 3
+        assert item['photos'][0] == str(first.id)
+        assert item['cover'] == {
+            'id': str(first.id),
+            'thumbnail': '/media/' + get_derivative_name(
+                first.link.name, 'small'),
+            'placeholder': first.get_placeholder(),
+        }
+
+    def test_cover_without_derivatives(self, client, offer_generator,
+                                       jpeg_generator, settings):
+        offer, = offer_generator(1)
+        offer.photos.all().delete()
+        settings.OFFERS_PHOTO_DERIVATIVES_SYNC = False
+        photo = OfferPhoto.objects.create(offer=offer, link=jpeg_generator())
+
+        item, = self.get_results(client, {'fields': 'cover'})[0]
+
+        assert item['cover']['thumbnail'] == f'/media/{photo.link.name}', \
+            'Пока копии не созданы, обложкой служит исходный файл'
+
+    def test_no_photos(self, client, offer_generator):
+        offer, = offer_generator(1)
+        offer.photos.all().delete()
+
+        item, = self.get_results(client, {'fields': 'cover,photo_count'})[0]
+
+        assert item == {'cover': None, 'photo_count': 0}
+
+    def test_num_queries(self, client, offer_generator):
+        offers = offer_generator(10)
+        for offer in offers:
+            OfferPhoto.objects.create(offer=offer)
+
+        small_page, small_queries = self.get_results(client, {'limit': 2})
+        large_page, large_queries = self.get_results(client, {'limit': 10})
+
+        assert len(large_page) == 10
+        assert all(item['cover'] for item in large_page)
+        assert len(small_queries) == len(large_queries), \
+            pytest.msg['wrong_num_queries']
+
+    def test_batch_order(self, user_client, existent_user, offer_generator,
+                         jpeg_generator):
+        offer, = offer_generator(1, author=existent_user)
+        offer.photos.all().delete()
+        files = [jpeg_generator(width=100 + number) for number in range(4)]
+
+        response = user_client.post(
+            f'/api/v1/offers/{offer.id}/photos/batch/', {'link': files},
+            format='multipart')
+        uploaded = [item['body']['id'] for item in response.json()['body']]
+
+        assert [str(pk) for pk in offer.photos.values_list('id', flat=True)] \
+            == uploaded, 'Фотографии пакета упорядочены не в порядке файлов'
@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import ApiKey
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOfferExport:
+    """Набор тестов для потоковой выгрузки предложений."""
+
+    url = '/api/v1/offers/export/'
+
+    def get(self, client, params=None, **headers):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.url, data=params, **headers)
+            content = b''.join(response.streaming_content) \
+                if response.streaming else response.content
+        return response, content.decode('utf-8'), len(context.captured_queries)
+
+    def test_ndjson(self, staff_client, offer_generator):
+        msg_pattern = f'При GET запросе {self.url} {{}}'
+        offers = offer_generator(3)
+
+        response, content, _ = self.get(staff_client)
+
+        assert response.status_code == 200, msg_pattern.format(
+            pytest.msg['wrong_http_status'])
+        assert response.streaming, msg_pattern.format(
+            'ответ формируется не потоком')
+        assert response['Content-Type'] == 'application/x-ndjson'
+        items = [json.loads(line) for line in content.splitlines()]
+        assert {item['id'] for item in items} == {
+            str(offer.id) for offer in offers
+        }, msg_pattern.format('выгружаются неверные предложения')
+        authors = {item['id']: item['author'] for item in items}
+        assert authors[str(offers[0].id)] == offers[0].author.username
+
+    def test_csv(self, staff_client, offer_generator):
+        offer_generator(2)
+
+        response, content, _ = self.get(staff_client, {'output': 'csv'})
+
+        rows = list(csv.DictReader(io.StringIO(content)))
+        assert response['Content-Type'] == 'text/csv; charset=utf-8'
+        assert len(rows) == 2
+        assert rows[0]['category_name'] == 'Мебель'
+
+    @pytest.mark.parametrize('title', (
+        '=HYPERLINK("http://example.com")', '+1', '-1+2', '@SUM(A1)',
+        '\tcmd', '\rcmd',
+    ))
+    def test_csv_formula_escaped(self, staff_client, offer_generator, title):
+        offer_generator(1, title=title, description='=1+1')
+
+        _, content, _ = self.get(staff_client, {'output': 'csv'})
+
+        row, = csv.DictReader(io.StringIO(content))
+        assert row['title'] == "'" + title, 'Формула в выгрузке не экранирована'
+        assert row['description'] == "'=1+1"
+
+    def test_filters_and_num_queries(self, staff_client, offer_generator,
+                                     settings):
+        offer_generator(2)
+        offer_generator(5, is_service=True)
+
+        _, _, large_chunk_queries = self.get(staff_client)
+        settings.OFFERS_EXPORT_CHUNK_SIZE = 2
+        _, content, small_chunk_queries = self.get(
+            staff_client, {'is_service': True})
+
+        assert len(content.splitlines()) == 5, \
+            'Выгрузка не учитывает фильтры запроса'
+        assert small_chunk_queries == large_chunk_queries, \
+            f'При GET запросе {self.url} {pytest.msg["wrong_num_queries"]}'
+
+    def test_api_key(self, client, offer_generator):
+        offer_generator(1)
+        _, key = ApiKey.generate('partner', ['offers.export'])
+        _, other_key = ApiKey.generate('other')
+
+        response, content, _ = self.get(
+            client, HTTP_AUTHORIZATION=f'Api-Key {key}')
+        assert response.status_code == 200
+        assert len(content.splitlines()) == 1
+
+        response, _, _ = self.get(
+            client, HTTP_AUTHORIZATION=f'Api-Key {other_key}')
+        assert response.status_code == 403, \
+            'Выгрузка доступна ключу без нужного разрешения'
+
+        response, _, _ = self.get(client, HTTP_AUTHORIZATION='Api-Key wrong')
+        assert response.status_code == 401
+
+    def test_not_staff(self, client, user_client):
+        assert self.get(client)[0].status_code == 401
+        assert self.get(user_client)[0].status_code == 403
+
+    def test_invalid_format(self, staff_client):
+        response, content, _ = self.get(staff_client, {'output': 'xml'})
+
+        assert response.status_code == 400
+        assert json.loads(content)['status'] == 400108
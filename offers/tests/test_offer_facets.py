@@ -0,0 +1,84 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from offers.models import OfferCategory
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOfferFacets:
+    """Набор тестов для количеств предложений по фильтрам."""
+
+    url = '/api/v1/offers/facets/'
+
+    def get(self, client, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.url, data=params)
+        return (
+            response.status_code,
+            response.json().get('body', {}),
+            len(context.captured_queries)
+        )
+
+    def test_facets(self, client, offer_generator, category, city):
+        msg_pattern = f'При GET запросе {self.url} {{}}'
+        other_category = OfferCategory.objects.create(name='Одежда')
+        offer_generator(3)
+        offer_generator(2, category=other_category, is_service=True)
+        offer_generator(1, city=None)
+        offer_generator(4, moderation_statuses='ON_MODERATION')
+
+        http_status, body, num_queries = self.get(client)
+
+        assert http_status == 200, msg_pattern.format(
+            pytest.msg['wrong_http_status'])
+        assert num_queries == 1, msg_pattern.format(
+            'количества вычисляются не одним запросом')
+        assert body == {
+            'total': 6,
+            'categories': [
+                {'id': str(category.id), 'count': 4},
+                {'id': str(other_category.id), 'count': 2},
+            ],
+            'cities': [
+                {'id': str(city.id), 'count': 5},
+                {'id': None, 'count': 1},
+            ],
+            'is_service': [
+                {'value': True, 'count': 2},
+                {'value': False, 'count': 4},
+            ],
+        }, msg_pattern.format('возвращаются неверные количества')
+
+    def test_facets_grouped_separately(self, client, offer_generator):
+        offer_generator(2)
+
+        with CaptureQueriesContext(connection) as context:
+            client.get(self.url)
+
+        sql, = [query['sql'] for query in context.captured_queries]
+        assert sql.count('GROUP BY') == 3 and 'UNION ALL' in sql, \
+            'Количества группируются по сочетаниям значений полей'
+
+    def test_facets_respect_filters(self, client, offer_generator):
+        offer_generator(2)
+        offer_generator(1, is_service=True)
+
+        _, body, _ = self.get(client, {'is_service': True})
+
+        assert body['total'] == 1, \
+            'Количества вычисляются без учета фильтров запроса'
+
+    def test_facets_cache(self, client, offer_generator):
+        offer, = offer_generator(1)
+        self.get(client)
+
+        *_, num_queries = self.get(client)
+        assert num_queries == 0, 'Количества предложений не кэшируются'
+
+        offer.is_closed = True
+        offer.save()
+
+        _, body, _ = self.get(client)
+        assert body['total'] == 0, \
+            'После закрытия предложения возвращаются устаревшие количества'
@@ -0,0 +1,153 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from offers.models import FeedEntry, Offer
+from users.models import Following
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOfferFeed:
+    """Набор тестов для ленты предложений подписок."""
+
+    url = '/api/v1/offers/feed/'
+
+    def get(self, client, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.url, data=params)
+        return (
+            response.status_code,
+            response.json().get('body', {}),
+            len(context.captured_queries)
+        )
+
+    def get_ids(self, client, params=None):
+        _, body, _ = self.get(client, params)
+        return [item['pk'] for item in body['results']]
+
+    def follow(self, follower, offers):
+        for offer in offers:
+            Following.objects.get_or_create(author=offer.author,
+                                            follower=follower)
+
+    def test_feed_contains_offers_of_followed_authors(self, user_client,
+                                                      existent_user,
+                                                      offer_generator):
+        msg_pattern = f'При GET запросе {self.url} {{}}'
+        followed = offer_generator(3, moderation_statuses='ON_MODERATION')
+        offer_generator(2)
+        self.follow(existent_user, followed)
+
+        assert self.get_ids(user_client) == [], msg_pattern.format(
+            'в ленту попадают неодобренные предложения')
+
+        for offer in followed:
+            offer.moderation_statuses = 'APPROVED'
+            offer.save()
+
+        http_status, body, _ = self.get(user_client)
+        assert http_status == 200, msg_pattern.format(
+            pytest.msg['wrong_http_status'])
+        assert {item['pk'] for item in body['results']} == {
+            str(offer.pk) for offer in followed
+        }, msg_pattern.format('лента содержит неверные предложения')
+
+    def test_new_following_and_unfollowing(self, user_client, existent_user,
+                                           offer_generator):
+        offer, = offer_generator(1)
+
+        self.follow(existent_user, [offer])
+        assert self.get_ids(user_client) == [str(offer.pk)], \
+            'После подписки в ленте нет предложений автора'
+
+        Following.objects.filter(follower=existent_user).delete()
+        assert self.get_ids(user_client) == [], \
+            'После отписки в ленте остаются предложения автора'
+
+    def test_closed_offer_leaves_feed(self, user_client, existent_user,
+                                      offer_generator):
+        offer, = offer_generator(1)
+        self.follow(existent_user, [offer])
+
+        offer.is_closed = True
+        offer.save()
+
+        assert self.get_ids(user_client) == [], \
+            'Закрытое предложение остается в ленте'
+
+    def test_bulk_moderation_fills_feed(self, user_client, staff_client,
+                                        existent_user, offer_generator):
+        offers = offer_generator(2, moderation_statuses='ON_MODERATION')
+        self.follow(existent_user, offers)
+
+        staff_client.post(
+            '/api/v1/offers/moderate/',
+            data={'status': 'APPROVED', 'ids': [str(o.pk) for o in offers]},
+            format='json'
+        )
+
+        assert len(self.get_ids(user_client)) == 2, \
+            'Пакетная модерация не добавляет предложения в ленту'
+
+    def test_celebrity_offers_are_merged_on_read(self, user_client,
+                                                 existent_user,
+                                                 offer_generator, settings):
+        settings.OFFERS_FEED_FANOUT_LIMIT = 0
+        celebrity_offer, = offer_generator(1, moderation_statuses='ON_MODERATION')
+        self.follow(existent_user, [celebrity_offer])
+
+        celebrity_offer.moderation_statuses = 'APPROVED'
+        celebrity_offer.save()
+
+        assert not FeedEntry.objects.exists(), \
+            'Предложения популярных авторов записываются в ленты'
+        assert self.get_ids(user_client) == [str(celebrity_offer.pk)], \
+            'Предложения популярных авторов не попадают в ленту'
+
+    def test_cursor_pagination(self, user_client, existent_user,
+                               offer_generator):
+        offers = offer_generator(5)
+        self.follow(existent_user, offers)
+
+        _, body, first_queries = self.get(user_client, {'limit': 2})
+        ids = [item['pk'] for item in body['results']]
+        while body['next']:
+            body = user_client.get(body['next']).json()['body']
+            ids.extend(item['pk'] for item in body['results'])
+
+        assert sorted(ids) == sorted(str(offer.pk) for offer in offers), \
+            'Постраничный вывод ленты пропускает или повторяет предложения'
+
+        *_, all_queries = self.get(user_client, {'limit': 5})
+        assert first_queries == all_queries, \
+            f'При GET запросе {self.url} {pytest.msg["wrong_num_queries"]}'
+
+    def test_hidden_offers_do_not_shorten_pages(self, user_client,
+                                                existent_user,
+                                                offer_generator):
+        offers = offer_generator(5)
+        self.follow(existent_user, offers)
+        # изменение без сигналов оставляет в лентах устаревшие записи;
+        # скрываются первые по порядку ленты предложения
+        hidden = sorted(offer.pk for offer in offers)[-2:]
+        Offer.objects.filter(pk__in=hidden).update(is_closed=True)
+
+        _, body, _ = self.get(user_client, {'limit': 2})
+        ids = [item['pk'] for item in body['results']]
+        assert len(ids) == 2, 'Страница ленты короче запрошенной'
+        while body['next']:
+            body = user_client.get(body['next']).json()['body']
+            ids.extend(item['pk'] for item in body['results'])
+
+        assert sorted(ids) == sorted(
+            str(offer.pk) for offer in offers if offer.pk not in hidden), \
+            'Лента заканчивается раньше времени'
+        assert not FeedEntry.objects.filter(offer_id__in=hidden).exists(), \
+            'Устаревшие записи ленты не удаляются'
+
+    def test_unauthorized(self, client):
+        response = client.get(self.url)
+
+        assert response.status_code == 401, \
+            f'При GET запросе {self.url} без токена доступа ' \
+            f'{pytest.msg["wrong_http_status"]}'
@@ -0,0 +1,74 @@
+import pytest
+
+from cities import geo
+from cities.models import City
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOfferNearFilter:
+    """Набор тестов для поиска предложений рядом с населенным пунктом."""
+
+    url = '/api/v1/offers/'
+
+    @pytest.fixture
+    def cities(self, region):
+        def create(name, latitude, longitude):
+            return City.objects.create(name=name, region=region,
+                                       latitude=latitude, longitude=longitude)
+
+        return {
+            'moscow': create('Москва', 55.7558, 37.6173),
+            'serpukhov': create('Серпухов', 54.9158, 37.4111),
+            'tula': create('Тула', 54.1931, 37.6173),
+            'petersburg': create('Санкт-Петербург', 59.9386, 30.3141),
+        }
+
+    def get_cities(self, client, params):
+        response = client.get(self.url, data=params)
+        return response.status_code, [
+            item['city'] for item in response.json()['body']['results']
+        ]
+
+    def test_near_filter(self, client, offer_generator, cities):
+        msg_pattern = f'При GET запросе {self.url} с параметром near {{}}'
+        for city in cities.values():
+            offer_generator(1, city=city)
+
+        http_status, found = self.get_cities(client, {
+            'near': cities['moscow'].id,
+            'radius_km': 200
+        })
+
+        assert http_status == 200, msg_pattern.format(
+            pytest.msg['wrong_http_status'])
+        assert found == [
+            str(cities[name].id) for name in ('moscow', 'serpukhov', 'tula')
+        ], msg_pattern.format('возвращаются неверные предложения')
+
+    def test_radius_is_exact(self, client, offer_generator, cities):
+        offer_generator(1, city=cities['tula'])
+
+        # Тула находится примерно в 174 км от Москвы
+        _, inside = self.get_cities(
+            client, {'near': cities['moscow'].id, 'radius_km': 180})
+        _, outside = self.get_cities(
+            client, {'near': cities['moscow'].id, 'radius_km': 170})
+
+        assert inside == [str(cities['tula'].id)]
+        assert outside == []
+
+    def test_city_without_coordinates(self, client, city):
+        response = client.get(self.url, data={'near': city.id})
+
+        assert response.status_code == 400, \
+            f'При GET запросе {self.url} с населенным пунктом без ' \
+            f'координат {pytest.msg["wrong_http_status"]}'
+
+
+def test_bounding_box_contains_circle():
+    min_lat, max_lat, min_lon, max_lon = geo.get_bounding_box(55.75, 37.62, 100)
+
+    assert max_lat - min_lat == pytest.approx(200 / geo.KM_PER_DEGREE)
+    assert min_lon < 37.62 - 100 / geo.KM_PER_DEGREE
+    assert max_lon > 37.62 + 100 / geo.KM_PER_DEGREE
+    assert geo.get_bounding_box(89.5, 0, 100)[2:] == (None, None)
@@ -0,0 +1,56 @@
+import pytest
+from django.db import connection
+
+from offers.models import PUBLIC_OFFERS_CONDITION, Offer
+from offers.utils import explain
+
+
+def get_scanned_relations(plan, node_type):
+    """Возвращает имена таблиц, которые читаются узлами плана node_type."""
+    relations = []
+    if plan.get('Node Type') == node_type:
+        relations.append(plan.get('Relation Name'))
+    for subplan in plan.get('Plans', []):
+        relations.extend(get_scanned_relations(subplan, node_type))
+    return relations
+
+
+@pytest.mark.skipif(connection.vendor != 'postgresql',
+                    reason='план запроса проверяется только для PostgreSQL')
+@pytest.mark.django_db
+class TestOfferIndexes:
+    """
+    Набор тестов, проверяющих, что основные фильтры публичного списка
+    предложений выполняются по индексам, а не полным просмотром таблицы.
+    """
+
+    @pytest.fixture(autouse=True)
+    def disable_seqscan(self):
+        # При малом объеме данных планировщик предпочитает полный просмотр,
+        # поэтому он запрещается: если подходящего индекса нет, план все
+        # равно будет содержать Seq Scan
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+
+    @pytest.mark.parametrize('filters', [
+        {},
+        {'category': True},
+        {'city': True},
+        {'is_service': False},
+    ], ids=('pub_date', 'category', 'city', 'is_service'))
+    def test_public_offers_use_index(self, offer_generator, filters):
+        offer, = offer_generator(1)
+        lookups = {
+            field: getattr(offer, field) if value is True else value
+            for field, value in filters.items()
+        }
+        queryset = (
+            Offer.objects
+            .filter(PUBLIC_OFFERS_CONDITION, **lookups)
+            .order_by('-pub_date', '-id')[:50]
+        )
+
+        plan = explain(queryset)
+
+        assert Offer._meta.db_table not in get_scanned_relations(plan, 'Seq Scan'), \
+            f'Запрос с фильтрами {list(filters)} выполняется без индекса'
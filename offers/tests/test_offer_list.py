@@ -0,0 +1,159 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOfferListQueries:
+    """Набор тестов для проверки количества SQL-запросов списка предложений."""
+
+    url = '/api/v1/offers/'
+
+    def get_num_queries(self, client, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.url, data=params)
+        assert response.status_code == 200, \
+            f'При GET запросе {self.url} {pytest.msg["wrong_http_status"]}'
+        return len(context.captured_queries), response.json()['body']
+
+    def test_num_queries_does_not_depend_on_page_size(self, client,
+                                                      offer_generator):
+        msg_pattern = f'При GET запросе {self.url} {{}}'
+        offer_generator(20)
+
+        small_page_queries, small_body = self.get_num_queries(
+            client, {'limit': 2})
+        large_page_queries, large_body = self.get_num_queries(
+            client, {'limit': 20})
+
+        assert len(small_body['results']) == 2, msg_pattern.format(
+            pytest.msg['wrong_results_size'])
+        assert len(large_body['results']) == 20, msg_pattern.format(
+            pytest.msg['wrong_results_size'])
+        assert small_page_queries == large_page_queries, msg_pattern.format(
+            pytest.msg['wrong_num_queries'])
+
+    def test_retrieve_num_queries(self, client, offer_generator):
+        offer, = offer_generator(1)
+        url = f'{self.url}{offer.id}/'
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+
+        assert response.status_code == 200, \
+            f'При GET запросе {url} {pytest.msg["wrong_http_status"]}'
+        assert len(context.captured_queries) <= 2, \
+            f'При GET запросе {url} выполняется лишний SQL-запрос'
+
+        body = response.json()['body']
+        assert body['author'] == offer.author.username
+        assert body['photos'] == [str(photo.pk) for photo in offer.photos.all()]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOfferCursorPagination:
+    """Набор тестов для постраничного вывода предложений по курсору."""
+
+    url = '/api/v1/offers/'
+
+    def get(self, client, url, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, data=params)
+        response_data = response.json()
+        return response.status_code, response_data.get('body', {}), context
+
+    def test_cursor_traversal(self, client, offer_generator):
+        msg_pattern = f'При постраничном выводе {self.url} по курсору {{}}'
+        offers = offer_generator(7)
+
+        received = []
+        http_status, body, _ = self.get(
+            client, self.url, {'pagination': 'cursor', 'limit': 3})
+        while True:
+            assert http_status == 200, msg_pattern.format(
+                pytest.msg['wrong_http_status'])
+            assert 'count' not in body, msg_pattern.format(
+                'в ответе содержится общее количество записей')
+            received.extend(item['pk'] for item in body['results'])
+            if body['next'] is None:
+                break
+            http_status, body, _ = self.get(client, body['next'])
+
+        assert len(received) == len(set(received)), msg_pattern.format(
+            'предложения повторяются на разных страницах')
+        assert set(received) == {str(offer.id) for offer in offers}, \
+            msg_pattern.format('выдаются не все предложения')
+
+    def test_no_count_query(self, client, offer_generator):
+        offer_generator(3)
+
+        _, body, context = self.get(client, self.url, {'pagination': 'cursor'})
+
+        assert len(body['results']) == 3
+        assert not any(
+            'COUNT(' in query['sql'].upper()
+            for query in context.captured_queries
+        ), 'При постраничном выводе по курсору выполняется подсчет записей'
+
+    def test_invalid_cursor(self, client):
+        http_status, _, _ = self.get(client, self.url, {'cursor': 'abc'})
+
+        assert http_status == 404, \
+            f'При передаче неверного курсора {pytest.msg["wrong_http_status"]}'
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOfferCountModes:
+    """Набор тестов для способов подсчета количества предложений в списке."""
+
+    url = '/api/v1/offers/'
+
+    def get(self, client, params):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.url, data=params)
+        count_queries = [
+            query for query in context.captured_queries
+            if 'COUNT(' in query['sql'].upper()
+        ]
+        return response.json().get('body', {}), len(count_queries)
+
+    def test_exact_count(self, client, offer_generator):
+        offer_generator(3)
+
+        body, _ = self.get(client, {'limit': 2})
+
+        assert body['count'] == 3, pytest.msg['wrong_total_count']
+        assert body['count_is_estimate'] is False
+        assert body['next'] is not None
+
+    def test_without_count(self, client, offer_generator):
+        offer_generator(3)
+
+        first_body, num_count_queries = self.get(
+            client, {'count': 'none', 'limit': 2})
+        last_body, _ = self.get(
+            client, {'count': 'none', 'limit': 2, 'offset': 2})
+
+        assert num_count_queries == 0, \
+            'При count=none выполняется подсчет записей'
+        assert 'count' not in first_body
+        assert len(first_body['results']) == 2, pytest.msg['wrong_results_size']
+        assert first_body['next'] is not None, \
+            'При count=none не передается ссылка на следующую страницу'
+        assert len(last_body['results']) == 1, pytest.msg['wrong_results_size']
+        assert last_body['next'] is None, \
+            'При count=none на последней странице есть ссылка на следующую'
+
+    def test_cached_count(self, client, offer_generator):
+        offer_generator(3)
+
+        first_body, _ = self.get(client, {'count': 'cached', 'limit': 1})
+        second_body, num_count_queries = self.get(
+            client, {'count': 'cached', 'limit': 1, 'offset': 1})
+
+        assert first_body['count'] == second_body['count'] == 3, \
+            pytest.msg['wrong_total_count']
+        assert first_body['count_is_estimate'] is False
+        assert second_body['count_is_estimate'] is True
+        assert num_count_queries == 0, \
+            'При count=cached количество записей не берется из кэша'
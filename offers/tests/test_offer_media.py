@@ -0,0 +1,143 @@
+import pytest
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from offers.models import OfferPhoto
+from offers.storage import get_derivative_name
+from users.models import Following
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPhotoMedia:
+    """Набор тестов для отдачи фотографий предложений."""
+
+    @pytest.fixture
+    def photo(self, existent_user, offer_generator, jpeg_generator):
+        offer, = offer_generator(1, author=existent_user)
+        return OfferPhoto.objects.create(offer=offer, link=jpeg_generator())
+
+    def get_url(self, name):
+        return f'/media/{name}'
+
+    def get_content(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_public_photo(self, client, photo, settings):
+        response = client.get(self.get_url(photo.link.name),
+                              HTTP_ACCEPT_ENCODING='gzip')
+
+        assert response.status_code == 200, pytest.msg['wrong_http_status']
+        photo.link.open('rb')
+        assert self.get_content(response) == photo.link.read()
+        assert response['Content-Type'] == 'image/jpeg'
+        assert response['Accept-Ranges'] == 'bytes'
+        assert 'Content-Encoding' not in response, 'Изображение сжимается'
+        cache_control = response['Cache-Control']
+        assert 'public' in cache_control
+        assert 'immutable' not in cache_control, \
+            'Доступ к закэшированной фотографии нельзя будет отозвать'
+        assert 'must-revalidate' in cache_control
+        assert f'max-age={settings.MEDIA_CACHE_MAX_AGE}' in cache_control
+
+    def test_derivative(self, client, photo):
+        name = get_derivative_name(photo.link.name, 'small')
+
+        response = client.get(self.get_url(name))
+
+        assert response.status_code == 200, pytest.msg['wrong_http_status']
+        assert response['Content-Type'] == 'image/webp'
+
+    def test_unknown_file(self, client, photo, media_root):
+        (media_root / 'photos' / 'orphan.jpg').write_bytes(b'data')
+
+        for name in ('photos/orphan.jpg', 'photos/tmp/missing',
+                     'photos/../../etc/passwd'):
+            response = client.get(self.get_url(name))
+            assert response.status_code == 404, pytest.msg['wrong_http_status']
+
+    def test_private_photo(self, client, user_client, staff_client, photo):
+        photo.offer.is_private = True
+        photo.offer.save()
+        url = self.get_url(photo.link.name)
+
+        assert client.get(url).status_code == 404
+        response = user_client.get(url)
+        assert response.status_code == 200
+        assert 'private' in response['Cache-Control']
+        assert staff_client.get(url).status_code == 200
+
+    def test_private_photo_follower(self, photo, user_generator):
+        photo.offer.is_private = True
+        photo.offer.save()
+        follower = next(user_generator)
+        refresh = RefreshToken.for_user(follower)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        url = self.get_url(photo.link.name)
+
+        assert client.get(url).status_code == 404
+        Following.objects.create(author=photo.offer.author, follower=follower)
+        assert client.get(url).status_code == 200
+
+    @pytest.mark.parametrize('header, status, content_range, part', (
+        ('bytes=0-9', 206, 'bytes 0-9/{size}', slice(0, 10)),
+        ('bytes=10-', 206, 'bytes 10-{last}/{size}', slice(10, None)),
+        ('bytes=-5', 206, 'bytes {tail}-{last}/{size}', slice(-5, None)),
+        ('bytes=100000000-', 416, 'bytes */{size}', None),
+        ('bytes=9-0', 200, None, slice(None)),
+    ))
+    def test_range(self, client, photo, header, status, content_range, part):
+        photo.link.open('rb')
+        content = photo.link.read()
+        size = len(content)
+
+        response = client.get(self.get_url(photo.link.name), HTTP_RANGE=header)
+
+        assert response.status_code == status, pytest.msg['wrong_http_status']
+        if content_range is not None:
+            assert response['Content-Range'] == content_range.format(
+                size=size, last=size - 1, tail=size - 5)
+        if part is not None:
+            assert self.get_content(response) == content[part]
+            assert int(response['Content-Length']) == len(content[part])
+
+    def test_if_range_mismatch(self, client, photo):
+        response = client.get(self.get_url(photo.link.name),
+                              HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"other"')
+
+        assert response.status_code == 200, pytest.msg['wrong_http_status']
+
+    def test_revoked_access(self, client, photo):
+        url = self.get_url(photo.link.name)
+        etag = client.get(url)['ETag']
+        photo.offer.is_private = True
+        photo.offer.save()
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 404, \
+            'Повторная проверка кэша не учитывает права доступа'
+
+    def test_not_modified(self, client, photo):
+        url = self.get_url(photo.link.name)
+        etag = client.get(url)['ETag']
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 304, pytest.msg['wrong_http_status']
+
+    @pytest.mark.parametrize('backend, header, prefix', (
+        ('x-accel-redirect', 'X-Accel-Redirect', '/protected-media/'),
+        ('x-sendfile', 'X-Sendfile', None),
+    ))
+    def test_sendfile_backend(self, client, photo, settings, media_root,
+                              backend, header, prefix):
+        settings.MEDIA_SENDFILE_BACKEND = backend
+
+        response = client.get(self.get_url(photo.link.name))
+
+        assert response.status_code == 200, pytest.msg['wrong_http_status']
+        assert response.content == b''
+        expected = (f'{prefix}{photo.link.name}' if prefix
+                    else str(media_root / photo.link.name))
+        assert response[header] == expected
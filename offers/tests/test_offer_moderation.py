@@ -0,0 +1,227 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from offers.models import FeedEntry, Offer, OfferCategory
+from users.models import Following
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOfferBulkModeration:
+    """Набор тестов для пакетной модерации предложений."""
+
+    url = '/api/v1/offers/moderate/'
+
+    def post(self, client, data, params=''):
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(f'{self.url}{params}', data=data,
+                                   format='json')
+        response_data = response.json()
+        return (
+            response.status_code,
+            response_data.get('status', 0),
+            response_data.get('body', {}),
+            context.captured_queries
+        )
+
+    def test_moderate_by_ids(self, staff_client, offer_generator):
+        msg_pattern = f'При POST запросе {self.url} {{}}'
+        offers = offer_generator(5, moderation_statuses='ON_MODERATION')
+        selected = [str(offer.id) for offer in offers[:3]]
+
+        http_status, app_status, body, queries = self.post(
+            staff_client, {'status': 'APPROVED', 'ids': selected})
+
+        assert http_status == 200, msg_pattern.format(
+            pytest.msg['wrong_http_status'])
+        assert app_status == 200000, msg_pattern.format(
+            pytest.msg['wrong_app_status'])
+        assert body['updated'] == 3
+        assert set(
+            str(pk) for pk in Offer.objects
+            .filter(moderation_statuses='APPROVED')
+            .values_list('pk', flat=True)
+        ) == set(selected), msg_pattern.format('изменены не те предложения')
+
+        updates = [query for query in queries
+                   if query['sql'].startswith('UPDATE')]
+        assert len(updates) == 1, msg_pattern.format(
+            'статусы изменяются не одним запросом')
+
+    def test_moderate_by_filter(self, staff_client, offer_generator):
+        other_category = OfferCategory.objects.create(name='Одежда')
+        offer_generator(2, moderation_statuses='ON_MODERATION')
+        offer_generator(3, moderation_statuses='ON_MODERATION',
+                        category=other_category)
+
+        _, _, body, _ = self.post(
+            staff_client,
+            {'status': 'REFUSED', 'all': True},
+            f'?category={other_category.id}'
+        )
+
+        assert body['updated'] == 3
+        assert Offer.objects.filter(
+            moderation_statuses='REFUSED', category=other_category
+        ).count() == 3, 'Пакетная модерация не учитывает фильтры'
+
+    def test_moderate_by_search(self, staff_client, offer_generator,
+                                search_installed):
+        offer_generator(2, moderation_statuses='ON_MODERATION')
+        found, = offer_generator(1, moderation_statuses='ON_MODERATION',
+                                 title='Велосипед')
+
+        _, _, body, _ = self.post(
+            staff_client, {'status': 'APPROVED', 'all': True}, '?q=велосипед')
+
+        assert body['updated'] == 1, 'Пакетная модерация не учитывает поиск'
+        assert list(
+            Offer.objects.filter(moderation_statuses='APPROVED')
+            .values_list('id', flat=True)
+        ) == [found.id]
+
+    def test_moderate_all_is_set_based(self, staff_client, existent_user,
+                                       offer_generator, settings):
+        settings.OFFERS_FEED_SYNC_BATCH_SIZE = 2
+        offers = offer_generator(5, moderation_statuses='ON_MODERATION')
+        for offer in offers:
+            Following.objects.create(author=offer.author, follower=existent_user)
+
+        _, _, body, queries = self.post(
+            staff_client, {'status': 'APPROVED', 'all': True})
+
+        assert body['updated'] == 5
+        update, = [query['sql'] for query in queries
+                   if query['sql'].startswith('UPDATE "offers_offer"')]
+        assert not any(offer.id.hex in update for offer in offers), \
+            'Идентификаторы предложений загружаются перед изменением статуса'
+        assert FeedEntry.objects.filter(follower=existent_user).count() == 5, \
+            'Ленты подписчиков не синхронизированы после пакетной модерации'
+
+    def test_refused_offers_leave_feeds(self, staff_client, existent_user,
+                                        offer_generator):
+        offers = offer_generator(3)
+        for offer in offers:
+            Following.objects.create(author=offer.author, follower=existent_user)
+        refused, *kept = offers
+
+        _, _, body, _ = self.post(
+            staff_client, {'status': 'REFUSED', 'ids': [str(refused.id)]})
+
+        assert body['updated'] == 1
+        assert set(
+            FeedEntry.objects.filter(follower=existent_user)
+            .values_list('offer_id', flat=True)
+        ) == {offer.id for offer in kept}, \
+            'Пакетная модерация синхронизирует ленты не с теми предложениями'
+
+    def test_approved_offers_appear_in_list(self, client, staff_client,
+                                            offer_generator):
+        offers = offer_generator(2, moderation_statuses='ON_MODERATION')
+        assert client.get('/api/v1/offers/').json()['body']['count'] == 0
+
+        self.post(staff_client, {
+            'status': 'APPROVED',
+            'ids': [str(offer.id) for offer in offers]
+        })
+
+        assert client.get('/api/v1/offers/').json()['body']['count'] == 2, \
+            'После пакетной модерации возвращается устаревший список'
+
+    @pytest.mark.parametrize('data', [
+        {'status': 'APPROVED'},
+        {'status': 'APPROVED', 'ids': [], 'all': True},
+        {'status': 'UNKNOWN', 'all': True},
+    ])
+    def test_invalid_data(self, staff_client, data):
+        http_status, app_status, _, _ = self.post(staff_client, data)
+
+        assert http_status == 400
+        assert app_status == 400107
+
+    def test_not_staff(self, user_client, offer_generator):
+        offer, = offer_generator(1, moderation_statuses='ON_MODERATION')
+
+        http_status, _, _, _ = self.post(
+            user_client, {'status': 'APPROVED', 'ids': [str(offer.id)]})
+
+        assert http_status == 403, \
+            f'При POST запросе {self.url} без прав модератора ' \
+            f'{pytest.msg["wrong_http_status"]}'
+
+
+@pytest.mark.django_db(transaction=True)
+class TestModerationQueue:
+    """Набор тестов для очереди модерации."""
+
+    url = '/api/v1/offers/moderation-queue/'
+
+    def claim(self, client, limit):
+        response = client.post(f'{self.url}?limit={limit}')
+        if response.status_code != 200:
+            return response.status_code, []
+        return response.status_code, [
+            item['pk'] for item in response.json()['body']
+        ]
+
+    @pytest.fixture
+    def second_staff_client(self, django_user_model):
+        moderator = django_user_model.objects.create_user(
+            username='second_moderator', password='123456', is_staff=True)
+        client = APIClient()
+        refresh = RefreshToken.for_user(moderator)
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {refresh.access_token}')
+        return client
+
+    def test_moderators_get_different_offers(self, staff_client,
+                                             second_staff_client,
+                                             offer_generator):
+        msg_pattern = f'При POST запросе {self.url} {{}}'
+        offer_generator(5, moderation_statuses='ON_MODERATION')
+        offer_generator(2)
+
+        http_status, first_batch = self.claim(staff_client, 3)
+        _, second_batch = self.claim(second_staff_client, 3)
+
+        assert http_status == 200, msg_pattern.format(
+            pytest.msg['wrong_http_status'])
+        assert len(first_batch) == 3, msg_pattern.format(
+            pytest.msg['wrong_results_size'])
+        assert len(second_batch) == 2, msg_pattern.format(
+            pytest.msg['wrong_results_size'])
+        assert not set(first_batch) & set(second_batch), msg_pattern.format(
+            'разные модераторы получают одни и те же предложения')
+
+    def test_claim_expiry(self, staff_client, second_staff_client,
+                          offer_generator, settings):
+        offer_generator(2, moderation_statuses='ON_MODERATION')
+        _, first_batch = self.claim(staff_client, 2)
+
+        settings.OFFERS_MODERATION_CLAIM_TIMEOUT = 0
+        _, second_batch = self.claim(second_staff_client, 2)
+
+        assert set(second_batch) == set(first_batch), \
+            'Просроченные предложения не возвращаются в очередь'
+
+    def test_moderated_offers_leave_queue(self, staff_client, offer_generator):
+        offer_generator(2, moderation_statuses='ON_MODERATION')
+        _, batch = self.claim(staff_client, 2)
+
+        staff_client.post(
+            '/api/v1/offers/moderate/',
+            data={'status': 'APPROVED', 'ids': batch[:1]},
+            format='json'
+        )
+        _, next_batch = self.claim(staff_client, 2)
+
+        assert next_batch == batch[1:], \
+            'Промодерированное предложение остается в очереди'
+
+    def test_not_staff(self, user_client):
+        http_status, _ = self.claim(user_client, 1)
+
+        assert http_status == 403, \
+            f'При POST запросе {self.url} без прав модератора ' \
+            f'{pytest.msg["wrong_http_status"]}'
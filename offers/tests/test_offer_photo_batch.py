@@ -0,0 +1,211 @@
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError
+
+from offers import views
+from offers.models import Offer, OfferPhoto, PhotoFile
+from offers.storage import PhotoStorage
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPhotoBatchUpload:
+    """Набор тестов для загрузки нескольких фотографий одним запросом."""
+
+    def get_url(self, offer):
+        return f'/api/v1/offers/{offer.id}/photos/batch/'
+
+    def upload(self, client, offer, files, mode=None):
+        url = self.get_url(offer)
+        if mode is not None:
+            url = f'{url}?mode={mode}'
+        return client.post(url, {'link': files}, format='multipart')
+
+    def get_statuses(self, response):
+        return [item['status'] for item in response.json()['body']]
+
+    def test_atomic_upload(self, user_client, existent_user, offer_generator,
+                           jpeg_generator):
+        offer, = offer_generator(1, author=existent_user)
+        files = [jpeg_generator(color=color) for color in ('red', 'green', 'blue')]
+
+        response = self.upload(user_client, offer, files)
+
+        assert response.status_code == 200, pytest.msg['wrong_http_status']
+        assert self.get_statuses(response) == [201100] * 3, \
+            pytest.msg['wrong_app_status']
+        offer.refresh_from_db()
+        assert offer.photo_count == 4
+        assert OfferPhoto.objects.filter(offer=offer).count() == 4
+        assert OfferPhoto.objects.filter(
+            offer=offer, derivatives_ready=True).count() == 3
+        assert PhotoFile.objects.count() == 3
+
+    def test_atomic_rejects_invalid_file(self, user_client, existent_user,
+                                         offer_generator, jpeg_generator):
+        offer, = offer_generator(1, author=existent_user)
+        files = [jpeg_generator(), SimpleUploadedFile('photo.jpg', b'not an image')]
+
+        response = self.upload(user_client, offer, files)
+
+        assert response.status_code == 400, pytest.msg['wrong_http_status']
+        body = response.json()
+        assert body['status'] == 400112, pytest.msg['wrong_app_status']
+        assert body['body'][0] == {} and 'link' in body['body'][1]
+        assert OfferPhoto.objects.filter(offer=offer).count() == 1
+
+    def test_partial_upload(self, user_client, existent_user, offer_generator,
+                            jpeg_generator):
+        offer, = offer_generator(1, author=existent_user)
+        files = [SimpleUploadedFile('photo.jpg', b'not an image'),
+                 jpeg_generator()]
+
+        response = self.upload(user_client, offer, files, mode='partial')
+
+        assert response.status_code == 200, pytest.msg['wrong_http_status']
+        assert self.get_statuses(response) == [400104, 201100], \
+            pytest.msg['wrong_app_status']
+        assert OfferPhoto.objects.filter(offer=offer).count() == 2
+
+    @pytest.mark.parametrize('mode, statuses, saved', (
+        ('atomic', None, 0),
+        ('partial', [201100] * 4 + [400110], 4),
+    ))
+    def test_photo_limit(self, user_client, existent_user, offer_generator,
+                         jpeg_generator, settings, mode, statuses, saved):
+        offer, = offer_generator(1, author=existent_user)
+        files = [jpeg_generator(width=100 + number)
+                 for number in range(settings.OFFERS_PHOTO_LIMIT)]
+
+        response = self.upload(user_client, offer, files, mode=mode)
+
+        if statuses is None:
+            assert response.json()['status'] == 400110, \
+                pytest.msg['wrong_app_status']
+        else:
+            assert self.get_statuses(response) == statuses, \
+                pytest.msg['wrong_app_status']
+        offer.refresh_from_db()
+        assert offer.photo_count == 1 + saved
+        assert OfferPhoto.objects.filter(offer=offer).count() == 1 + saved
+
+    def test_duplicate_files(self, user_client, existent_user, offer_generator,
+                             jpeg_generator):
+        offer, = offer_generator(1, author=existent_user)
+        content = jpeg_generator().read()
+        files = [SimpleUploadedFile(f'{number}.jpg', content)
+                 for number in range(2)]
+
+        response = self.upload(user_client, offer, files)
+
+        assert self.get_statuses(response) == [201100] * 2
+        photo_file, = PhotoFile.objects.all()
+        assert photo_file.ref_count == 2
+
+    def test_placeholder_error(self, user_client, existent_user,
+                               offer_generator, jpeg_generator, monkeypatch):
+        def broken_placeholder(file):
+            raise OSError('image file is truncated')
+
+        monkeypatch.setattr('offers.views.get_placeholder', broken_placeholder)
+        offer, = offer_generator(1, author=existent_user)
+
+        response = self.upload(user_client, offer, [jpeg_generator()])
+
+        assert response.status_code == 200, pytest.msg['wrong_http_status']
+        assert self.get_statuses(response) == [201100], \
+            'Ошибка при создании заглушки прерывает загрузку пакета'
+        photo = OfferPhoto.objects.filter(offer=offer).last()
+        assert photo.width is None and photo.preview == ''
+        assert photo.get_placeholder() == {}
+
+    def test_saving_error_removes_files(self, user_client, existent_user,
+                                        offer_generator, jpeg_generator,
+                                        media_root, monkeypatch):
+        offer, = offer_generator(1, author=existent_user)
+        stored = {path for path in (media_root / 'photos').rglob('*')
+                  if path.is_file()}
+
+        def broken_acquire(name, count=1):
+            raise DatabaseError('deadlock detected')
+
+        monkeypatch.setattr(PhotoFile, 'acquire', broken_acquire)
+        files = [jpeg_generator(color=color) for color in ('red', 'green')]
+
+        response = self.upload(user_client, offer, files)
+
+        assert response.json()['status'] == 500102, \
+            pytest.msg['wrong_app_status']
+        assert {path for path in (media_root / 'photos').rglob('*')
+                if path.is_file()} == stored, \
+            'После отката транзакции в хранилище остаются файлы'
+        offer.refresh_from_db()
+        assert offer.photo_count == 1
+
+    def test_storage_error_removes_files(self, user_client, existent_user,
+                                         offer_generator, jpeg_generator,
+                                         media_root, monkeypatch):
+        offer, = offer_generator(1, author=existent_user)
+        original_save = PhotoStorage._save
+        saved = []
+
+        def failing_save(storage, name, content):
+            if saved:
+                raise OSError('No space left on device')
+            saved.append(original_save(storage, name, content))
+            return saved[-1]
+
+        monkeypatch.setattr(PhotoStorage, '_save', failing_save)
+        files = [jpeg_generator(color=color) for color in ('red', 'green')]
+
+        response = self.upload(user_client, offer, files)
+
+        assert response.json()['status'] == 500102, \
+            pytest.msg['wrong_app_status']
+        assert saved and not (media_root / saved[0]).exists(), \
+            'После ошибки записи в хранилище остаются файлы'
+        assert OfferPhoto.objects.filter(offer=offer).count() == 1
+
+    def test_partial_upload_after_concurrent_upload(self, user_client,
+                                                    existent_user,
+                                                    offer_generator,
+                                                    jpeg_generator, settings,
+                                                    monkeypatch):
+        settings.OFFERS_PHOTO_LIMIT = 5
+        offer, = offer_generator(1, author=existent_user)
+        validate_photos = views.validate_photos
+
+        def validate_during_upload(files, context):
+            # пока файлы проверяются, другой запрос занимает места
+            Offer.objects.filter(pk=offer.pk).update(photo_count=4)
+            return validate_photos(files, context)
+
+        monkeypatch.setattr(views, 'validate_photos', validate_during_upload)
+        files = [jpeg_generator(color=color)
+                 for color in ('red', 'green', 'blue')]
+
+        response = self.upload(user_client, offer, files, mode='partial')
+
+        assert response.status_code == 200, pytest.msg['wrong_http_status']
+        assert self.get_statuses(response) == [201100, 400110, 400110], \
+            pytest.msg['wrong_app_status']
+        offer.refresh_from_db()
+        assert offer.photo_count == 5
+
+    def test_not_author(self, user_client, offer_generator, jpeg_generator):
+        offer, = offer_generator(1)
+
+        response = self.upload(user_client, offer, [jpeg_generator()])
+
+        assert response.status_code == 403, pytest.msg['wrong_http_status']
+        assert not Offer.objects.filter(photo_count__gt=1).exists()
+
+    def test_invalid_request(self, user_client, existent_user, offer_generator,
+                             jpeg_generator):
+        offer, = offer_generator(1, author=existent_user)
+
+        response = self.upload(user_client, offer, [])
+        assert response.json()['status'] == 400109
+
+        response = self.upload(user_client, offer, [jpeg_generator()],
+                               mode='unknown')
+        assert response.json()['status'] == 400111
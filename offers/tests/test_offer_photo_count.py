@@ -0,0 +1,75 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from offers.models import Offer, OfferPhoto, PhotoLimitError
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOfferPhotoCount:
+    """Набор тестов для количества фотографий предложения."""
+
+    def test_photo_count_maintained(self, offer_generator):
+        offer, = offer_generator(1)
+        OfferPhoto.objects.create(offer=offer)
+        offer.refresh_from_db()
+        assert offer.photo_count == 2
+
+        offer.photos.first().delete()
+        offer.refresh_from_db()
+        assert offer.photo_count == 1
+
+    def test_limit(self, offer_generator, settings):
+        offer, = offer_generator(1)
+        for _ in range(settings.OFFERS_PHOTO_LIMIT - 1):
+            OfferPhoto.objects.create(offer=offer)
+
+        with pytest.raises(PhotoLimitError):
+            OfferPhoto.objects.create(offer=offer)
+
+        assert OfferPhoto.objects.filter(offer=offer).count() == \
+            settings.OFFERS_PHOTO_LIMIT
+        offer.refresh_from_db()
+        assert offer.photo_count == settings.OFFERS_PHOTO_LIMIT
+
+    def test_missing_offer(self, offer_generator):
+        offer, = offer_generator(1)
+        photo = OfferPhoto(offer=offer)
+        Offer.objects.filter(pk=offer.pk).delete()
+
+        with pytest.raises(Offer.DoesNotExist):
+            photo.save()
+
+    def test_upload_limit(self, user_client, existent_user, offer_generator,
+                          jpeg_generator, settings):
+        offer, = offer_generator(1, author=existent_user)
+        url = f'/api/v1/offers/{offer.id}/photos/'
+        settings.OFFERS_PHOTO_LIMIT = 2
+
+        response = user_client.post(url, {'link': jpeg_generator()},
+                                    format='multipart')
+        assert response.status_code == 201, pytest.msg['wrong_http_status']
+
+        response = user_client.post(url, {'link': jpeg_generator()},
+                                    format='multipart')
+        assert response.status_code == 400, pytest.msg['wrong_http_status']
+        assert OfferPhoto.objects.filter(offer=offer).count() == 2
+
+    def test_photo_count_in_payload(self, client, offer_generator):
+        offer, = offer_generator(1)
+
+        body = client.get('/api/v1/offers/', {'fields': 'photo_count'}).json()
+        detail = client.get(f'/api/v1/offers/{offer.id}/').json()['body']
+
+        assert body['body']['results'] == [{'photo_count': 1}]
+        assert detail['photo_count'] == 1
+
+    def test_recount_command(self, offer_generator):
+        offer, = offer_generator(1)
+        Offer.objects.filter(pk=offer.pk).update(photo_count=4)
+
+        call_command('recount_offer_photos', stdout=StringIO())
+
+        offer.refresh_from_db()
+        assert offer.photo_count == 1
@@ -0,0 +1,53 @@
+import pytest
+from PIL import Image
+
+from offers.images import get_derivative_name
+from offers.models import Offer, OfferPhoto
+from offers.serializers import OfferNotClosedSerializer, OfferRowSerializer
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPhotoDerivatives:
+    """Набор тестов для уменьшенных копий фотографий предложений."""
+
+    def test_derivatives_created(self, offer_generator, jpeg_generator,
+                                 media_root):
+        offer, = offer_generator(1)
+        # поворот на 90 градусов: копии должны быть "портретными"
+        photo = OfferPhoto.objects.create(
+            offer=offer, link=jpeg_generator(orientation=6))
+        photo.refresh_from_db()
+
+        assert photo.derivatives_ready
+        for key, size in (('small', 200), ('medium', 800)):
+            path = media_root / get_derivative_name(photo.link.name, key)
+            with Image.open(path) as image:
+                assert image.format == 'WEBP'
+                assert image.size == (size * 3 // 4, size), \
+                    'Не учтена ориентация или неверный размер копии'
+                assert not image.getexif(), 'Копия содержит метаданные EXIF'
+
+    def test_thumbnails_in_payload(self, client, offer_generator,
+                                   jpeg_generator):
+        offer, = offer_generator(1)
+        photo = OfferPhoto.objects.create(offer=offer, link=jpeg_generator())
+
+        body = client.get(f'/api/v1/offers/{offer.id}/').json()['body']
+        thumbnails = [item for item in body['thumbnails'] if item]
+        photo_body = client.get(
+            f'/api/v1/offers/{offer.id}/photos/{photo.id}/').json()
+
+        assert thumbnails == [photo_body['thumbnails']]
+        assert thumbnails[0]['small'].endswith('_small.webp')
+
+    def test_row_serializer_output(self, offer_generator, jpeg_generator):
+        offer, = offer_generator(1)
+        OfferPhoto.objects.create(offer=offer, link=jpeg_generator())
+        queryset = Offer.objects.prefetch_related('photos')
+
+        expected = OfferNotClosedSerializer(list(queryset), many=True).data
+        serializer = OfferRowSerializer()
+        data = serializer.to_representation(list(serializer.get_rows(queryset)))
+
+        assert sorted(data[0]['thumbnails'], key=len) == \
+            sorted(expected[0]['thumbnails'], key=len)
@@ -0,0 +1,81 @@
+import base64
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from offers.models import OfferPhoto
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPhotoPlaceholders:
+    """Набор тестов для заглушек фотографий предложений."""
+
+    def test_placeholder_computed(self, offer_generator, jpeg_generator,
+                                  settings):
+        offer, = offer_generator(1)
+        photo = OfferPhoto.objects.create(
+            offer=offer,
+            link=jpeg_generator(width=1600, height=1200, orientation=6,
+                                color='blue')
+        )
+        photo.refresh_from_db()
+
+        assert (photo.width, photo.height) == (1200, 1600), \
+            'Размеры не учитывают ориентацию изображения'
+        red, green, blue = (int(photo.dominant_color[i:i + 2], 16)
+                            for i in (1, 3, 5))
+        assert blue > 200 and red < 50 and green < 50
+        prefix = 'data:image/webp;base64,'
+        assert photo.preview.startswith(prefix)
+        assert len(photo.preview) < 1000
+        with Image.open(BytesIO(base64.b64decode(photo.preview[len(prefix):]))) as image:
+            assert max(image.size) == settings.OFFERS_PHOTO_PREVIEW_SIZE
+            assert image.size[0] < image.size[1]
+
+    def test_placeholders_in_list(self, client, offer_generator,
+                                  jpeg_generator):
+        offer, = offer_generator(1)
+        photo = OfferPhoto.objects.create(offer=offer, link=jpeg_generator())
+
+        item, = client.get(
+            '/api/v1/offers/', {'fields': 'photos,placeholders'}
+        ).json()['body']['results']
+        placeholders = dict(zip(item['photos'], item['placeholders']))
+
+        assert placeholders[str(photo.id)] == {
+            'width': 1600,
+            'height': 1200,
+            'color': photo.dominant_color,
+            'preview': photo.preview,
+        }
+        assert {} in item['placeholders'], \
+            'Для фотографии без файла должна передаваться пустая заглушка'
+
+    def test_placeholders_are_opt_in(self, client, offer_generator,
+                                     jpeg_generator):
+        offer, = offer_generator(1)
+        OfferPhoto.objects.filter(offer=offer).delete()
+        photo = OfferPhoto.objects.create(offer=offer, link=jpeg_generator())
+
+        item, = client.get('/api/v1/offers/').json()['body']['results']
+        detail = client.get(f'/api/v1/offers/{offer.id}/').json()['body']
+
+        assert 'placeholders' not in item and 'placeholders' not in detail, \
+            'Заглушки всех фотографий передаются без запроса'
+        assert item['cover']['placeholder']['preview'] == photo.preview, \
+            'В списке нет заглушки обложки'
+
+    def test_batch_upload(self, user_client, existent_user, offer_generator,
+                          jpeg_generator):
+        offer, = offer_generator(1, author=existent_user)
+
+        response = user_client.post(
+            f'/api/v1/offers/{offer.id}/photos/batch/',
+            {'link': [jpeg_generator(width=300, height=200)]},
+            format='multipart'
+        )
+
+        item, = response.json()['body']
+        assert item['body']['width'] == 300 and item['body']['height'] == 200
+        assert item['body']['preview'].startswith('data:image/webp')
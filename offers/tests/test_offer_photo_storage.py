@@ -0,0 +1,152 @@
+import hashlib
+from io import StringIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+
+from offers.models import OfferPhoto, PhotoFile
+from offers.storage import get_derivative_name
+
+
+@pytest.mark.django_db(transaction=True)
+class TestPhotoStorage:
+    """Набор тестов для хранилища фотографий с адресацией по содержимому."""
+
+    def test_content_name(self, offer_generator, jpeg_generator, media_root):
+        offer, = offer_generator(1)
+        upload = jpeg_generator()
+        digest = hashlib.sha256(upload.read()).hexdigest()
+        upload.seek(0)
+
+        photo = OfferPhoto.objects.create(offer=offer, link=upload)
+
+        assert photo.link.name == \
+            f'photos/{digest[:2]}/{digest[2:4]}/{digest}.jpg'
+        assert (media_root / photo.link.name).exists()
+        assert not list((media_root / 'photos' / 'tmp').iterdir()), \
+            'Временный файл не удален'
+
+    def test_duplicates_are_stored_once(self, offer_generator, jpeg_generator,
+                                        media_root):
+        offers = offer_generator(2)
+        content = jpeg_generator().read()
+        photos = [
+            OfferPhoto.objects.create(
+                offer=offer,
+                link=SimpleUploadedFile(f'{number}.JPG', content))
+            for number, offer in enumerate(offers)
+        ]
+
+        assert photos[0].link.name == photos[1].link.name
+        assert PhotoFile.objects.get(name=photos[0].link.name).ref_count == 2
+        files = [path for path in (media_root / 'photos').rglob('*.jpg')]
+        assert len(files) == 1
+        assert OfferPhoto.objects.filter(derivatives_ready=True).count() == 2
+
+    def test_extension_from_format(self, offer_generator, jpeg_generator):
+        offer, = offer_generator(1)
+        content = jpeg_generator().read()
+        photos = [
+            OfferPhoto.objects.create(
+                offer=offer, link=SimpleUploadedFile(name, content))
+            for name in ('photo.jpeg', 'photo.JPG', 'photo.png')
+        ]
+
+        assert {photo.link.name for photo in photos} == {photos[0].link.name}, \
+            'Одинаковые файлы с разными расширениями хранятся отдельно'
+        assert photos[0].link.name.endswith('.jpg')
+        assert PhotoFile.objects.get().ref_count == 3
+
+    def test_file_deleted_with_last_reference(self, offer_generator,
+                                              jpeg_generator, media_root):
+        offers = offer_generator(2)
+        content = jpeg_generator().read()
+        for offer in offers:
+            OfferPhoto.objects.create(
+                offer=offer, link=SimpleUploadedFile('photo.jpg', content))
+        first, second = OfferPhoto.objects.exclude(link='')
+        name = first.link.name
+
+        first.delete()
+        assert (media_root / name).exists()
+        assert PhotoFile.objects.get(name=name).ref_count == 1
+
+        second.offer.delete()
+        assert not (media_root / name).exists()
+        assert not (media_root / get_derivative_name(name, 'small')).exists()
+        assert not PhotoFile.objects.filter(name=name).exists()
+
+    def test_file_referenced_again_before_commit(self, offer_generator,
+                                                  jpeg_generator, media_root):
+        offer, = offer_generator(1)
+        content = jpeg_generator().read()
+        photo = OfferPhoto.objects.create(
+            offer=offer, link=SimpleUploadedFile('photo.jpg', content))
+        name = photo.link.name
+
+        with transaction.atomic():
+            photo.delete()
+            OfferPhoto.objects.create(
+                offer=offer, link=SimpleUploadedFile('photo.jpg', content))
+
+        assert (media_root / name).exists(), \
+            'Удален файл, на который снова сослались до фиксации транзакции'
+        assert PhotoFile.objects.get(name=name).ref_count == 1
+
+    def test_failed_save_keeps_reference_count(self, offer_generator,
+                                               jpeg_generator, monkeypatch):
+        offer, = offer_generator(1)
+        photo = OfferPhoto.objects.create(offer=offer, link=jpeg_generator())
+        old_name = photo.link.name
+
+        def broken_release(name):
+            raise RuntimeError
+
+        monkeypatch.setattr(PhotoFile, 'release', broken_release)
+        photo = OfferPhoto.objects.get(pk=photo.pk)
+        photo.link = jpeg_generator(width=800, height=600)
+        with pytest.raises(RuntimeError):
+            photo.save()
+
+        photo.refresh_from_db()
+        assert photo.link.name == old_name
+        assert list(PhotoFile.objects.values_list('name', 'ref_count')) == [
+            (old_name, 1)], 'Учет ссылок не откатывается вместе с фотографией'
+
+    def test_backfill_command(self, offer_generator, jpeg_generator):
+        offers = offer_generator(2)
+        content = jpeg_generator().read()
+        for offer in offers:
+            OfferPhoto.objects.create(
+                offer=offer, link=SimpleUploadedFile('photo.jpg', content))
+        single = OfferPhoto.objects.create(
+            offer=offers[0], link=jpeg_generator(color='blue'))
+        shared = OfferPhoto.objects.exclude(link='').exclude(
+            pk=single.pk).first()
+        # фотографии, загруженные до учета ссылок
+        PhotoFile.objects.filter(name=single.link.name).delete()
+        PhotoFile.objects.filter(name=shared.link.name).update(ref_count=5)
+
+        call_command('backfill_photo_files', batch_size=1, stdout=StringIO())
+
+        assert dict(PhotoFile.objects.values_list('name', 'ref_count')) == {
+            shared.link.name: 2,
+            single.link.name: 1,
+        }
+
+    def test_replace_file(self, offer_generator, jpeg_generator, media_root):
+        offer, = offer_generator(1)
+        photo = OfferPhoto.objects.create(offer=offer, link=jpeg_generator())
+        old_name = photo.link.name
+
+        photo = OfferPhoto.objects.get(pk=photo.pk)
+        photo.link = jpeg_generator(width=800, height=600)
+        photo.save()
+
+        assert photo.link.name != old_name
+        assert not (media_root / old_name).exists()
+        assert PhotoFile.objects.get(name=photo.link.name).ref_count == 1
+        photo.refresh_from_db()
+        assert photo.derivatives_ready
@@ -0,0 +1,68 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from cities.models import City, Region
+from offers.models import Offer
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOfferRegion:
+    """Набор тестов для фильтрации предложений по региону."""
+
+    url = '/api/v1/offers/'
+
+    @pytest.fixture
+    def other_city(self):
+        return City.objects.create(
+            name='Тула', region=Region.objects.create(name='Тульская область'))
+
+    def test_region_is_kept_in_sync(self, offer_generator, city, other_city):
+        offer, = offer_generator(1)
+        assert offer.region_id == city.region_id, \
+            'Регион не заполняется при создании предложения'
+
+        offer.city = other_city
+        offer.save(update_fields=['city'])
+        offer.refresh_from_db()
+        assert offer.region_id == other_city.region_id, \
+            'Регион не изменяется вместе с населенным пунктом'
+
+        other_city.region = city.region
+        other_city.save()
+        offer.refresh_from_db()
+        assert offer.region_id == city.region_id, \
+            'Регион не изменяется при переносе населенного пункта'
+
+    def test_region_filter(self, client, offer_generator, city, other_city):
+        msg_pattern = f'При GET запросе {self.url} с параметром region {{}}'
+        offer_generator(2)
+        expected = offer_generator(1, city=other_city)
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(self.url, data={
+                'region': other_city.region_id})
+        body = response.json()['body']
+
+        assert [item['pk'] for item in body['results']] == [
+            str(offer.pk) for offer in expected
+        ], msg_pattern.format('возвращаются неверные предложения')
+        count_sql = next(
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith('SELECT COUNT')
+        )
+        assert 'cities_city' not in count_sql, msg_pattern.format(
+            'выполняется соединение с населенными пунктами')
+
+    def test_backfill_command(self, offer_generator, city):
+        offer_generator(3)
+        Offer.objects.update(region=None)
+
+        call_command('backfill_offer_regions', batch_size=2, stdout=StringIO())
+
+        assert set(Offer.objects.values_list('region', flat=True)) == {
+            city.region_id
+        }, 'Команда не заполняет регион предложений'
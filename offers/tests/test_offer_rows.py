@@ -0,0 +1,64 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from offers.models import Offer, OfferPhoto
+from offers.serializers import OfferNotClosedSerializer, OfferRowSerializer
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOfferRowSerializer:
+    """Набор тестов для быстрой сериализации предложений."""
+
+    def test_output_is_identical(self, offer_generator):
+        offers = offer_generator(3)
+        offer_generator(1, city=None, is_service=True)
+        OfferPhoto.objects.create(offer=offers[0])
+        queryset = (
+            Offer.objects
+            .select_related('author', 'category', 'city')
+            .prefetch_related('photos')
+            .order_by('-pub_date', '-id')
+        )
+
+        expected = OfferNotClosedSerializer(list(queryset), many=True).data
+        serializer = OfferRowSerializer()
+        data = serializer.to_representation(list(serializer.get_rows(queryset)))
+
+        renderer = JSONRenderer()
+        assert renderer.render(data) == renderer.render(expected), \
+            'Результат быстрой сериализации отличается от OfferNotClosedSerializer'
+
+    def test_list_and_retrieve_responses(self, client, offer_generator):
+        offer, = offer_generator(1)
+        request = Request(APIRequestFactory().get('/api/v1/offers/'))
+        expected = OfferNotClosedSerializer(
+            offer, context={'request': request}).data
+
+        list_item, = client.get('/api/v1/offers/').json()['body']['results']
+        detail = client.get(f'/api/v1/offers/{offer.id}/').json()['body']
+
+        assert list_item == detail == json.loads(JSONRenderer().render(expected)), \
+            'Ответ API отличается от результата OfferNotClosedSerializer'
+
+    def test_retrieve_invalid_id(self, client):
+        response = client.get('/api/v1/offers/not-a-uuid/')
+
+        assert response.status_code == 404
+
+
+@pytest.mark.django_db(transaction=True)
+def test_benchmark_command():
+    stdout = StringIO()
+
+    call_command('benchmark_offer_serialization', count=20, repeat=1,
+                 stdout=stdout)
+
+    assert 'OfferRowSerializer' in stdout.getvalue()
+    assert not Offer.objects.exists(), \
+        'Команда не удаляет созданные для замеров предложения'
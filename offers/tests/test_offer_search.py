@@ -0,0 +1,66 @@
+import pytest
+
+from offers.models import OfferCategory
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('search_installed')
+class TestOfferSearch:
+    """Набор тестов для полнотекстового поиска предложений."""
+
+    url = '/api/v1/offers/'
+
+    def search(self, client, params):
+        response = client.get(self.url, data=params)
+        response_data = response.json()
+        response_body = response_data.get('body', {})
+
+        return response.status_code, [
+            item['title'] for item in response_body.get('results', [])
+        ]
+
+    @pytest.fixture
+    def searchable_offers(self, offer_generator):
+        offer_generator(1, title='Комод',
+                        description='Купили новый шкаф, комод больше не нужен')
+        offer_generator(1, title='Книжный шкаф',
+                        description='Почти новый, отдаю даром')
+        offer_generator(1, title='Велосипед', description='Требует ремонта')
+
+    def test_search_by_title_and_description(self, client, searchable_offers):
+        msg_pattern = f'При поиске GET {self.url}?q= {{}}'
+
+        http_status, titles = self.search(client, {'q': 'шкаф'})
+
+        assert http_status == 200, msg_pattern.format(
+            pytest.msg['wrong_http_status'])
+        assert titles == ['Книжный шкаф', 'Комод'], msg_pattern.format(
+            'результаты не соответствуют запросу или неверно ранжированы')
+
+    def test_search_with_filters(self, client, searchable_offers,
+                                 offer_generator):
+        other_category = OfferCategory.objects.create(name='Детские товары')
+        offer_generator(1, title='Детский шкаф', category=other_category)
+
+        _, titles = self.search(
+            client, {'q': 'шкаф', 'category': other_category.id})
+
+        assert titles == ['Детский шкаф'], \
+            'Поиск не учитывает остальные фильтры списка предложений'
+
+    def test_search_is_updated_on_change(self, client, offer_generator):
+        offer, = offer_generator(1, title='Стол')
+        offer.title = 'Табурет'
+        offer.save()
+
+        _, titles = self.search(client, {'q': 'стол'})
+        assert titles == [], 'Поиск находит предложение по старому заголовку'
+
+        _, titles = self.search(client, {'q': 'табурет'})
+        assert titles == ['Табурет'], \
+            'Поиск не находит предложение по новому заголовку'
+
+    def test_empty_query(self, client, searchable_offers):
+        _, titles = self.search(client, {'q': '!!!'})
+
+        assert titles == [], 'Запрос без слов должен возвращать пустой список'
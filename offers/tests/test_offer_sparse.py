@@ -0,0 +1,69 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@pytest.mark.django_db(transaction=True)
+class TestOfferSparseFieldsets:
+    """Набор тестов для выбора полей ответа параметрами fields и omit."""
+
+    url = '/api/v1/offers/'
+
+    def get(self, client, url, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, data=params)
+        return response.json()['body'], context.captured_queries
+
+    def test_fields(self, client, offer_generator):
+        msg_pattern = f'При GET запросе {self.url} с параметром fields {{}}'
+        offer_generator(2)
+
+        body, queries = self.get(client, self.url, {'fields': 'pk,title'})
+
+        assert all(set(item) == {'pk', 'title'} for item in body['results']), \
+            msg_pattern.format('ответ содержит неверный набор полей')
+        assert not any('description' in query['sql'] for query in queries), \
+            msg_pattern.format('загружаются невыбранные поля')
+        assert not any('offers_offerphoto' in query['sql'] for query in queries), \
+            msg_pattern.format('загружаются невыбранные фотографии')
+
+    def test_omit(self, client, offer_generator):
+        offer, = offer_generator(1)
+
+        body, queries = self.get(
+            client, f'{self.url}{offer.id}/',
+            {'omit': 'description,photos,thumbnails,placeholders,cover'})
+
+        assert 'description' not in body and 'photos' not in body
+        assert body['author'] == offer.author.username
+        assert body['city'] == str(offer.city_id)
+        assert len(queries) == 1, \
+            f'При GET запросе {self.url}{{id}}/ с параметром omit ' \
+            f'выполняются лишние запросы'
+
+    def test_photo_fields(self, client, offer_generator):
+        offer, = offer_generator(1)
+
+        response = client.get(f'{self.url}{offer.id}/photos/', {'fields': 'id'})
+
+        assert [set(item) for item in response.json()['results']] == [{'id'}], \
+            'Ответ со списком фотографий содержит неверный набор полей'
+
+    def test_fields_are_ignored_on_create(self, user_client, category):
+        response = user_client.post(
+            f'{self.url}bulk/?fields=pk',
+            data=[{
+                'title': 'Шкаф',
+                'description': 'Описание',
+                'category': str(category.id),
+                'is_service': False,
+                'is_used': True,
+                'is_private': False,
+                'is_closed': False,
+            }],
+            format='json'
+        )
+
+        item, = response.json()['body']
+        assert 'title' in item['body'], \
+            'Параметр fields применяется к запросам на изменение'
@@ -0,0 +1,19 @@
+import json
+
+from django.db import connections
+
+
+def explain(queryset):
+    """
+    Возвращает план выполнения запроса queryset в PostgreSQL в виде словаря
+    (корневой узел из вывода EXPLAIN (FORMAT JSON)).
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    # psycopg2 сам разбирает значения типа json, но на случай другого
+    # драйвера поддерживается и строковое представление
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
@@ -1,35 +1,166 @@
+import logging
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import DatabaseError, transaction
+from django.db.models import (BooleanField, CharField, Count, F, UUIDField,
+                              Value, prefetch_related_objects)
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, mixins, serializers, status, viewsets
+from rest_framework import (filters, generics, mixins, serializers, status,
+                            viewsets)
+from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
-from rest_framework.pagination import LimitOffsetPagination
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.permissions import (IsAdminUser, IsAuthenticated,
+                                        IsAuthenticatedOrReadOnly)
 from rest_framework.viewsets import ModelViewSet
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from api.authentication import ApiKeyAuthentication
+from api.permissions import HasApiKeyScope
+from api.views import SparseFieldsetMixin
+from cities.models import City
 
+from . import cache as offer_cache
+from . import conditional, export, feed, images, moderation
 from . import permissions as offer_permissions
 from . import responses
-from .models import Offer, OfferCategory, OfferPhoto
-from .serializers import (OfferCategorySerializer, OfferNotClosedSerializer,
+from .filters import OfferFilter
+from .models import (PUBLIC_OFFERS_CONDITION, Offer, OfferCategory,
+                     OfferPhoto, PhotoFile, PhotoLimitError)
+from .pagination import OfferFeedPagination, OfferPagination
+from .placeholders import EMPTY_PLACEHOLDER, get_placeholder
+from .search import OfferSearchFilter
+from .serializers import (OPTIONAL_OFFER_FIELDS, OfferBulkCreateSerializer,
+                          OfferBulkModerationSerializer, OfferCategorySerializer,
+                          OfferNotClosedSerializer,
                           OfferNotClosedSerializerModeration,
-                          OfferPhotoSerializer)
+                          OfferPhotoSerializer, OfferRowSerializer)
+
+logger = logging.getLogger(__name__)
+
+
+def collect_ids(items, field):
+    """Собирает корректные UUID из поля field элементов пакетного запроса."""
+    ids = set()
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            ids.add(uuid.UUID(str(item.get(field))))
+        except ValueError:
+            pass
+    return ids
+
+
+def validate_photo(serializer):
+    # bulk_create не вызывает OfferPhoto.save(), поэтому заглушка
+    # вычисляется здесь же и попадает в проверенные данные
+    if not serializer.is_valid():
+        return
+    link = serializer.validated_data['link']
+    try:
+        placeholder = get_placeholder(link)
+    except (OSError, ValueError):
+        # как и в OfferPhoto.update_placeholder, фотография сохраняется
+        # без заглушки
+        logger.exception(f'Не удалось создать заглушку для файла {link.name}')
+        placeholder = EMPTY_PLACEHOLDER
+    serializer.validated_data.update(placeholder)
+
+
+def validate_photos(files, context):
+    """
+    Проверяет загруженные изображения и вычисляет их заглушки в нескольких
+    потоках (Pillow освобождает GIL при чтении изображений). Возвращает
+    проверенные сериализаторы в порядке файлов.
+    """
+    photo_serializers = [
+        OfferPhotoSerializer(data={'link': file}, context=context)
+        for file in files
+    ]
+    workers = min(len(files), settings.OFFERS_PHOTO_VALIDATION_THREADS)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(validate_photo, photo_serializers))
+    return photo_serializers
 
 
-class OfferViewSet(ModelViewSet):
+def discard_photo_files(photos):
+    """
+    Удаляет файлы, записанные в хранилище при вставке фотографий photos,
+    после отката транзакции.
+    """
+    PhotoFile.discard(
+        photo.link.name for photo in photos if photo.link._committed)
+
+
+# режимы пакетной загрузки фотографий: atomic - пакет сохраняется, только
+# если все файлы верны; partial - сохраняются верные файлы
+PHOTO_BATCH_MODES = ('atomic', 'partial')
+
+
+class OfferViewSet(SparseFieldsetMixin, ModelViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly, offer_permissions.IsOwnerOrReadOnly, ]
-    pagination_class = LimitOffsetPagination    
-    filter_backends = [filters.OrderingFilter, DjangoFilterBackend]
+    pagination_class = OfferPagination
+    filter_backends = [filters.OrderingFilter, DjangoFilterBackend, OfferSearchFilter]
     ordering_fields = ['pub_date', ]
-    filterset_fields = ['category', 'city', 'is_service']
+    filterset_class = OfferFilter
+    sparse_fields = {
+        'pk': ['id'],
+        'author': ['author__username'],
+        'title': ['title'],
+        'description': ['description'],
+        'category': ['category__id'],
+        'is_service': ['is_service'],
+        'is_used': ['is_used'],
+        'city': ['city__id'],
+        'pub_date': ['pub_date'],
+        'is_private': ['is_private'],
+        'moderation_statuses': ['moderation_statuses'],
+        'is_closed': ['is_closed'],
+        'photo_count': ['photo_count'],
+        'photos': [],
+        'thumbnails': [],
+        'placeholders': [],
+        'cover': [],
+    }
+    sparse_prefetch = {
+        'photos': 'photos',
+        'thumbnails': 'photos',
+        'placeholders': 'photos',
+        'cover': 'photos',
+    }
+    # нужны для постраничного вывода и условных запросов
+    sparse_required_fields = ('id', 'pub_date', 'updated_at')
+    sparse_optional_fields = OPTIONAL_OFFER_FIELDS
+    sparse_actions = ('list', 'retrieve', 'feed')
+    api_key_scope = 'offers.export'
 
     def get_serializer_class(self):      
         if self.request.user.is_staff:
             return OfferNotClosedSerializerModeration
         return OfferNotClosedSerializer
 
-    def get_queryset(self):          
+    def get_queryset(self):
+        # автор, категория и город загружаются одним JOIN, фотографии -
+        # одним дополнительным запросом на всю страницу, поэтому число
+        # запросов не зависит от размера выборки
+        queryset = (
+            Offer.objects
+            .select_related('author', 'category', 'city')
+            .prefetch_related('photos')
+        )
+        if self.action in self.sparse_actions:
+            queryset = self.get_sparse_queryset(queryset)
         if self.request.user.is_staff:
-            return Offer.objects.filter(is_closed=False)
-        return Offer.objects.filter(is_closed=False, moderation_statuses="APPROVED")
+            return queryset.filter(is_closed=False)
+        return queryset.filter(PUBLIC_OFFERS_CONDITION)
 
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
@@ -58,31 +189,284 @@ class OfferViewSet(ModelViewSet):
                serializer.data,
            )    
     
-    def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
-        page = self.paginate_queryset(queryset)
-        
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            paginated_response = super().get_paginated_response(serializer.data)
+    @action(detail=False, methods=['POST'], url_path='bulk')
+    def bulk_create(self, request):
+        items = request.data
+        if not isinstance(items, list):
+            return responses.INVALID_OFFERS_BATCH
 
-            return responses.create_response(
-                200000,
-                paginated_response.data
-                )
+        limit = settings.OFFERS_BULK_CREATE_LIMIT
+        if len(items) > limit:
+            return responses.offers_batch_too_large(limit)
+
+        # категории и города всего пакета загружаются двумя запросами
+        context = self.get_serializer_context()
+        context['categories'] = OfferCategory.objects.in_bulk(
+            collect_ids(items, 'category'))
+        context['cities'] = City.objects.in_bulk(collect_ids(items, 'city'))
+
+        results = []
+        new_offers = []
+        for item in items:
+            serializer = OfferBulkCreateSerializer(data=item, context=context)
+            if serializer.is_valid():
+                offer = Offer(author=request.user, **serializer.validated_data)
+                offer.update_region()
+                new_offers.append(offer)
+                results.append(offer)
+            else:
+                results.append(responses.batch_item(400104, serializer.errors))
+
+        try:
+            with transaction.atomic():
+                Offer.objects.bulk_create(new_offers, batch_size=limit)
+        except DatabaseError:
+            return responses.OFFER_SAVING_ERROR
+
+        # bulk_create не отправляет сигналы post_save
+        offer_cache.bump_generation()
+
+        prefetch_related_objects(new_offers, 'photos')
+        serializer_class = self.get_serializer_class()
+        return responses.create_response(
+            200000,
+            [
+                responses.batch_item(
+                    201100, serializer_class(result, context=context).data)
+                if isinstance(result, Offer) else result
+                for result in results
+            ]
+        )
+
+    @action(detail=False, methods=['POST'], url_path='moderate',
+            permission_classes=[IsAdminUser])
+    def bulk_moderate(self, request):
+        serializer = OfferBulkModerationSerializer(data=request.data)
+        if not serializer.is_valid():
+            return responses.invalid_moderation_data(serializer.errors)
+
+        new_status = serializer.validated_data['status']
+        if serializer.validated_data['all']:
+            selected = self.filter_queryset(self.get_queryset()).filter(
+                moderation_statuses='ON_MODERATION')
+            queryset = Offer.objects.filter(pk__in=selected.values('pk'))
+        else:
+            queryset = Offer.objects.filter(
+                is_closed=False,
+                pk__in=serializer.validated_data['ids']
+            )
+
+        # статус меняется одним UPDATE без загрузки предложений, поэтому
+        # время изменения проставляется явно, а кэш и ленты подписок
+        # обновляются вручную. После UPDATE измененные предложения уже не
+        # выделить условием, поэтому ленты синхронизируются до него в той
+        # же транзакции, а строки блокируются до ее фиксации
+        changed = queryset.exclude(moderation_statuses=new_status)
+        published = new_status == 'APPROVED'
+        with transaction.atomic():
+            feed.sync_offers_in_batches(
+                changed.filter(is_closed=False).select_for_update(),
+                published
+            )
+            updated = changed.update(
+                moderation_statuses=new_status,
+                updated_at=timezone.now(),
+                moderator=None,
+                moderation_claimed_at=None
+            )
+        if updated:
+            offer_cache.bump_generation_on_commit()
+
+        return responses.create_response(200000, {'updated': updated})
+
+    @action(detail=False, methods=['POST'], url_path='moderation-queue',
+            permission_classes=[IsAdminUser])
+    def moderation_queue(self, request):
+        try:
+            limit = int(request.query_params['limit'])
+        except (KeyError, ValueError):
+            limit = settings.OFFERS_MODERATION_BATCH_SIZE
+        limit = max(1, min(limit, settings.OFFERS_MODERATION_MAX_BATCH_SIZE))
+
+        ids = moderation.claim_offers(request.user, limit)
+        queryset = self.get_queryset().filter(pk__in=ids).order_by('pub_date', 'id')
         serializer = self.get_serializer(queryset, many=True)
-        return  responses.create_response(
+        return responses.create_response(200000, serializer.data)
+
+    @action(detail=False, methods=['GET'], permission_classes=[IsAuthenticated],
+            pagination_class=OfferFeedPagination)
+    def feed(self, request):
+        queryset = self.get_queryset().filter(PUBLIC_OFFERS_CONDITION)
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return responses.create_response(
+            200000,
+            self.get_paginated_response(serializer.data).data
+        )
+
+    @action(detail=False, methods=['GET'])
+    def facets(self, request):
+        # как и список, количества для модераторов не кэшируются
+        if request.user.is_staff:
+            body = self.get_facets()
+        else:
+            body = offer_cache.get_or_set_facets(request, self.get_facets)
+        return responses.create_response(200000, body)
+
+    def get_facets(self):
+        """
+        Возвращает количества предложений, соответствующих фильтрам запроса,
+        по категориям, населенным пунктам и типу. Количества получаются
+        одним запросом: три группировки, каждая по своему полю, объединяются
+        UNION ALL, поэтому число строк равно сумме, а не произведению
+        количеств значений полей.
+        """
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .prefetch_related(None)
+            .order_by()
+        )
+
+        def group(facet, key, flag):
+            # у частей UNION должны совпадать колонки и их типы:
+            # идентификатор категории или населенного пункта и тип
+            return (
+                queryset
+                .annotate(key=key, flag=flag)
+                .values('key', 'flag')
+                .annotate(facet=Value(facet, output_field=CharField()),
+                          count=Count('id'))
+            )
+
+        no_key = Value(None, output_field=UUIDField())
+        no_flag = Value(None, output_field=BooleanField())
+        groups = group('categories', F('category'), no_flag).union(
+            group('cities', F('city'), no_flag),
+            group('is_service', no_key, F('is_service')),
+            all=True
+        )
+
+        categories = Counter()
+        cities = Counter()
+        is_service = Counter()
+        for row in groups:
+            if row['facet'] == 'categories':
+                categories[row['key']] += row['count']
+            elif row['facet'] == 'cities':
+                cities[row['key']] += row['count']
+            else:
+                is_service[bool(row['flag'])] += row['count']
+
+        return {
+            'total': sum(categories.values()),
+            'categories': [
+                {'id': key, 'count': count}
+                for key, count in categories.most_common()
+            ],
+            'cities': [
+                {'id': key, 'count': count}
+                for key, count in cities.most_common()
+            ],
+            'is_service': [
+                {'value': value, 'count': is_service[value]}
+                for value in (True, False)
+            ],
+        }
+
+    @action(detail=False, methods=['GET'], url_path='export',
+            authentication_classes=[JWTAuthentication, ApiKeyAuthentication],
+            permission_classes=[IsAdminUser | HasApiKeyScope])
+    def export(self, request):
+        export_format = request.query_params.get('output', 'ndjson')
+        if export_format not in export.EXPORT_FORMATS:
+            return responses.INVALID_EXPORT_FORMAT
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return export.get_export_response(queryset, export_format)
+
+    def list(self, request, *args, **kwargs):
+        # ответ для обычных пользователей зависит только от параметров
+        # запроса, поэтому он кэшируется вместе с валидаторами; модераторам
+        # видны предложения на модерации, и для них список всегда строится
+        # заново
+        if request.user.is_staff:
+            entry = self.get_list_entry()
+        else:
+            entry = offer_cache.get_or_set_list(request, self.get_list_entry)
+
+        etag, last_modified = entry['etag'], entry['last_modified']
+        not_modified = conditional.get_not_modified_response(
+            request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        response = responses.create_response(
                 200000,
-                serializer.data 
+                entry['body']
             )
+        return conditional.set_validators(response, etag, last_modified)
+
+    def get_list_entry(self):
+        # список только читается, поэтому вместо моделей и сериализатора DRF
+        # используются строки values_list (см. OfferRowSerializer)
+        serializer = OfferRowSerializer(self.request)
+        queryset = serializer.get_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+
+        if page is not None:
+            data = serializer.to_representation(page)
+            body = self.get_paginated_response(data).data
+            pagination = {
+                key: value for key, value in body.items() if key != 'results'
+            }
+        else:
+            page = list(queryset)
+            body = serializer.to_representation(page)
+            pagination = None
+
+        etag, last_modified = conditional.get_validators(
+            [(offer.id, offer.updated_at) for offer in page],
+            extra=pagination
+        )
+        return {'body': body, 'etag': etag, 'last_modified': last_modified}
 
     def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return responses.create_response(
+        # для условного запроса валидаторы вычисляются по одной колонке, и
+        # неизмененное предложение не загружается и не сериализуется;
+        # несуществующее предложение обрабатывается ниже
+        if conditional.is_conditional(request):
+            try:
+                row = (
+                    self.get_queryset()
+                    .prefetch_related(None)
+                    .filter(pk=kwargs[self.lookup_field])
+                    .values_list('id', 'updated_at')
+                    .first()
+                )
+            except (TypeError, ValueError, DjangoValidationError):
+                row = None
+
+            if row is not None:
+                etag, last_modified = conditional.get_validators([row])
+                not_modified = conditional.get_not_modified_response(
+                    request, etag, last_modified)
+                if not_modified is not None:
+                    return not_modified
+
+        serializer = OfferRowSerializer(request)
+        instance = generics.get_object_or_404(
+            serializer.get_rows(self.get_queryset()),
+            pk=kwargs[self.lookup_field]
+        )
+        self.check_object_permissions(request, instance)
+        data, = serializer.to_representation([instance])
+        response = responses.create_response(
                 200000,
-                serializer.data 
+                data
             )
+        etag, last_modified = conditional.get_validators(
+            [(instance.id, instance.updated_at)])
+        return conditional.set_validators(response, etag, last_modified)
 
  
 class OfferCategoryViewSet(viewsets.GenericViewSet,
@@ -98,25 +482,141 @@ class OfferCategoryViewSet(viewsets.GenericViewSet,
     search_fields = ['name', ]
 
 
-class OfferPhotoViewSet(ModelViewSet):
+class OfferPhotoViewSet(SparseFieldsetMixin, ModelViewSet):
 
     permission_classes = [IsAuthenticatedOrReadOnly, offer_permissions.IsOfferAuthorOrReadOnly, ] 
     serializer_class = OfferPhotoSerializer  
+    sparse_fields = {
+        'id': ['id'],
+        'offer': ['offer__id'],
+        'link': ['link'],
+        'thumbnails': ['link', 'derivatives_ready'],
+        'width': ['width'],
+        'height': ['height'],
+        'dominant_color': ['dominant_color'],
+        'preview': ['preview'],
+        'uploaded_at': ['uploaded_at'],
+    }
+    sparse_required_fields = ('id',)
 
     def get_queryset(self):
         offer = get_object_or_404(Offer, id=self.kwargs.get("offer_id"))
         photos = OfferPhoto.objects.filter(offer=offer)
+        if self.action in ('list', 'retrieve'):
+            photos = self.get_sparse_queryset(photos)
         return photos
     
     def perform_create(self, serializer):  
         offer = get_object_or_404(Offer, id=self.kwargs.get("offer_id"))
         self.check_object_permissions(self.request, offer)
 
-        if OfferPhoto.objects.filter(offer=offer).count() >= 5: 
-       
+        try:
+            serializer.save(offer_id=offer.id)
+        except Offer.DoesNotExist:
+            # предложение удалено во время загрузки
+            raise Http404
+        except PhotoLimitError:
             raise serializers.ValidationError(
                 detail="limit photos",
                 code=status.HTTP_400_BAD_REQUEST
-            )    
+            )
+
+    @action(detail=False, methods=['POST'], url_path='batch')
+    def batch_create(self, request, offer_id=None):
+        offer = get_object_or_404(Offer, id=offer_id)
+        self.check_object_permissions(request, offer)
+
+        mode = request.query_params.get('mode', 'atomic')
+        if mode not in PHOTO_BATCH_MODES:
+            return responses.INVALID_PHOTOS_BATCH_MODE
+        files = request.FILES.getlist('link')
+        if not files:
+            return responses.INVALID_PHOTOS_BATCH
+        limit = settings.OFFERS_PHOTO_LIMIT
+        if len(files) > limit:
+            return responses.photo_limit_exceeded(limit)
+
+        context = self.get_serializer_context()
+        photo_serializers = validate_photos(files, context)
+        valid = [serializer for serializer in photo_serializers
+                 if not serializer.errors]
+        if mode == 'atomic' and len(valid) < len(photo_serializers):
+            return responses.photos_batch_rejected(
+                [serializer.errors for serializer in photo_serializers])
+
+        # количество мест проверяется еще раз в транзакции
+        available = max(limit - offer.photo_count, 0)
+        if mode == 'atomic' and len(valid) > available:
+            return responses.photo_limit_exceeded(limit)
+        accepted = valid[:available]
+
+        # фотографии пакета упорядочиваются в порядке файлов (первая
+        # станет обложкой, если у предложения еще нет фотографий)
+        uploaded_at = timezone.now()
+        photos = [
+            OfferPhoto(
+                offer=offer,
+                uploaded_at=uploaded_at + timedelta(microseconds=number),
+                **serializer.validated_data
+            )
+            for number, serializer in enumerate(accepted)
+        ]
+        if photos:
+            try:
+                with transaction.atomic():
+                    # места могла занять одновременная загрузка, поэтому
+                    # в частичном режиме их количество перечитывается под
+                    # блокировкой и пакет сокращается до него
+                    if mode == 'partial':
+                        photo_count = (
+                            Offer.objects.select_for_update()
+                            .filter(pk=offer.id)
+                            .values_list('photo_count', flat=True)
+                            .first()
+                        )
+                        if photo_count is None:
+                            raise Offer.DoesNotExist
+                        photos = photos[:max(limit - photo_count, 0)]
+                    if photos:
+                        self.save_photos(offer, photos)
+            except Offer.DoesNotExist:
+                raise Http404
+            except PhotoLimitError:
+                return responses.photo_limit_exceeded(limit)
+            except (DatabaseError, OSError):
+                discard_photo_files(photos)
+                return responses.PHOTO_SAVING_ERROR
+            except Exception:
+                discard_photo_files(photos)
+                raise
+
+            # bulk_create не отправляет сигналы post_save
+            if photos:
+                offer_cache.bump_generation()
+            for photo in photos:
+                images.create_derivatives(photo)
+
+        created = dict(zip(accepted, photos))
+        results = []
+        for serializer in photo_serializers:
+            if serializer.errors:
+                results.append(responses.batch_item(400104, serializer.errors))
+            elif serializer in created:
+                results.append(responses.batch_item(
+                    201100,
+                    OfferPhotoSerializer(created[serializer], context=context).data
+                ))
+            else:
+                results.append(responses.batch_item(
+                    400110, {'link': ['limit photos']}))
+        return responses.create_response(200000, results)
 
-        serializer.save(offer_id=offer.id)
+    def save_photos(self, offer, photos):
+        """Сохраняет фотографии пакета; вызывается в транзакции."""
+        Offer.reserve_photos(offer.id, len(photos))
+        # файлы записываются в хранилище при вставке строк
+        OfferPhoto.objects.bulk_create(photos)
+        names = Counter(photo.link.name for photo in photos)
+        for name, count in names.items():
+            PhotoFile.acquire(name, count)
+        Offer.objects.filter(pk=offer.id).update(updated_at=timezone.now())
@@ -31,6 +31,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -85,6 +86,97 @@ STATIC_URL = '/static/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Время жизни (в секундах) закэшированных ответов со списком предложений
+OFFERS_LIST_CACHE_TIMEOUT = 60
+
+# Время хранения в кэше количеств предложений по категориям, населенным
+# пунктам и типу (услуга/вещь); кэш сбрасывается при изменении предложений
+OFFERS_FACETS_CACHE_TIMEOUT = 5 * 60
+
+# Способ подсчета общего количества предложений в списке по умолчанию:
+# exact, cached, estimate или none (см. offers.pagination)
+OFFERS_COUNT_MODE = 'exact'
+OFFERS_COUNT_CACHE_TIMEOUT = 30
+OFFERS_COUNT_ESTIMATE_THRESHOLD = 10000
+
+# Максимальное количество предложений в одном запросе пакетного создания
+OFFERS_BULK_CREATE_LIMIT = 500
+
+# Очередь модерации: размер выдаваемого пакета и время (в секундах), в
+# течение которого взятые предложения закреплены за модератором
+OFFERS_MODERATION_BATCH_SIZE = 20
+OFFERS_MODERATION_MAX_BATCH_SIZE = 100
+OFFERS_MODERATION_CLAIM_TIMEOUT = 15 * 60
+
+# Лента подписок: предложения авторов, у которых больше
+# OFFERS_FEED_FANOUT_LIMIT подписчиков, не записываются в ленты, а
+# добавляются при чтении; список таких авторов кэшируется на
+# OFFERS_FEED_CELEBRITIES_CACHE_TIMEOUT секунд. При подписке в ленту
+# добавляются OFFERS_FEED_BACKFILL_SIZE последних предложений автора
+OFFERS_FEED_FANOUT_LIMIT = 5000
+OFFERS_FEED_CELEBRITIES_CACHE_TIMEOUT = 10 * 60
+OFFERS_FEED_BACKFILL_SIZE = 50
+OFFERS_FEED_BATCH_SIZE = 1000
+# Количество предложений, ленты по которым синхронизируются за один раз
+# после пакетной модерации
+OFFERS_FEED_SYNC_BATCH_SIZE = 500
+
+# Поиск предложений рядом с населенным пунктом: радиус по умолчанию и
+# максимальный радиус в километрах
+OFFERS_NEAR_DEFAULT_RADIUS_KM = 50
+OFFERS_NEAR_MAX_RADIUS_KM = 500
+
+# Количество строк, загружаемых из базы данных за один раз при выгрузке
+# предложений
+OFFERS_EXPORT_CHUNK_SIZE = 2000
+
+# Максимальное количество фотографий у одного предложения
+OFFERS_PHOTO_LIMIT = 5
+
+# Уменьшенные копии фотографий предложений: название копии и наибольший
+# размер стороны в пикселях, качество WebP и количество процессов для
+# обработки изображений. При OFFERS_PHOTO_DERIVATIVES_SYNC = True копии
+# создаются в процессе, обрабатывающем запрос
+OFFERS_PHOTO_DERIVATIVES = {
+    'small': 200,
+    'medium': 800,
+}
+OFFERS_PHOTO_WEBP_QUALITY = 80
+OFFERS_PHOTO_WORKERS = 2
+OFFERS_PHOTO_DERIVATIVES_SYNC = False
+# Копия, используемая как обложка предложения в списках
+OFFERS_PHOTO_COVER_DERIVATIVE = 'small'
+
+# Заглушки фотографий в списках предложений: наибольший размер стороны
+# превью в пикселях и качество WebP
+OFFERS_PHOTO_PREVIEW_SIZE = 16
+OFFERS_PHOTO_PREVIEW_QUALITY = 30
+
+# Отдача фотографий предложений (см. offers.media): None - файл отдает
+# Django, 'x-accel-redirect' (nginx) или 'x-sendfile' (Apache, lighttpd) -
+# передачу файла выполняет прокси-сервер. MEDIA_ACCEL_REDIRECT_PREFIX -
+# внутренний location nginx, соответствующий MEDIA_ROOT. Фотографии
+# кэшируются клиентами на MEDIA_CACHE_MAX_AGE секунд, после чего права
+# доступа к ним проверяются заново
+MEDIA_SENDFILE_BACKEND = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+MEDIA_CACHE_MAX_AGE = 5 * 60
+
+# Количество потоков, в которых проверяются файлы при пакетной загрузке
+# фотографий
+OFFERS_PHOTO_VALIDATION_THREADS = 4
+
+# Сжатие ответов (см. api.middleware): минимальный размер сжимаемого
+# ответа в байтах и уровень сжатия brotli (0-11)
+API_COMPRESSION_MIN_SIZE = 1024
+API_COMPRESSION_BROTLI_QUALITY = 5
+
 AUTH_USER_MODEL = 'users.User'
 AUTHENTICATION_BACKENDS = [
     'users.backends.AuthenticationBackend',
@@ -126,6 +218,10 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ], 
     'EXCEPTION_HANDLER': 'api.views.exception_handler',
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 50,
     'DEFAULT_FILTER_BACKENDS': [
@@ -27,5 +27,8 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
 }
 
+# передача фотографий поручается прокси-серверу (см. offers.media)
+MEDIA_SENDFILE_BACKEND = os.getenv('MEDIA_SENDFILE_BACKEND', 'x-accel-redirect')
+
 SOCIAL_AUTH_POSTGRES_JSONFIELD = True
 SOCIAL_AUTH_LOGIN_REDIRECT_URL = 'https://www.thingsfree.ru/login/'
\ No newline at end of file
@@ -20,10 +20,15 @@ from django.urls import include, path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from offers.media import serve_photo
+
 urlpatterns = [
     path('api/v1/', include('offers.urls')),
     path('admin/', admin.site.urls),
     path('api/v1/', include('users.urls')),
+    # фотографии предложений отдаются с проверкой прав доступа
+    path(f'{settings.MEDIA_URL.lstrip("/")}photos/<path:name>', serve_photo,
+         name='photo-media'),
 ]
 
 if settings.DEBUG:
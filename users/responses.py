@@ -1,15 +1,16 @@
 from django.utils.translation import gettext_lazy as _
 from rest_framework.response import Response
 
+from api.renderers import EnvelopeTemplate
+
+ENVELOPE = EnvelopeTemplate({})
+
 
 def create_response(status, body):
     # статус http ответа совпадает с первыми тремя цифрами статуса бизнес-логики
     http_status = status // 1000
     return Response(
-        data={
-            'status': status,
-            'body': body
-        },
+        data=ENVELOPE.wrap(status, body),
         status=http_status
     )
 
@@ -7,6 +7,8 @@ from rest_framework_simplejwt.serializers import \
 from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from api.serializers import SparseFieldsetSerializerMixin
+
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
@@ -29,7 +31,8 @@ class CreateUserSerializer(serializers.ModelSerializer):
         return User.objects.create_user(**validated_data)
 
 
-class ShortUserProfileSerializer(serializers.ModelSerializer):
+class ShortUserProfileSerializer(SparseFieldsetSerializerMixin,
+                                 serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'first_name', 'last_name', 'avatar')
@@ -84,6 +84,19 @@ class TestFollowersList:
             assert follower in authorized_user_followers, msg_pattern.format(
                 'ответ содержит неверный список подписчиков')
 
+    def test_sparse_fieldset(self, existent_user, user_client,
+                             authorized_user_followers):
+        _, _, response_body = self.get(
+            user_client, 'me', {'fields': 'id,username'})
+
+        assert response_body['results'], \
+            'ответ не содержит список подписчиков'
+        assert all(
+            set(item) == {'id', 'username'}
+            for item in response_body['results']
+        ), 'При GET запросе /api/v1/users/me/followers/ с параметром ' \
+           'fields ответ содержит неверный набор полей'
+
     def test_unauthorized_user_followers(self, client):
         msg_pattern = f'При GET запросе /api/v1/users/me/followers/ ' \
                       f'без токена доступа {{}}'
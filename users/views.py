@@ -18,6 +18,8 @@ from social_core import exceptions as social_exceptions
 from social_core.backends.utils import load_backends as load_social_backends
 from social_django import utils as social_utils
 
+from api.views import SparseFieldsetMixin
+
 from . import responses, serializers, utils
 from .models import SocialMedia, Following
 
@@ -191,7 +193,14 @@ def convert_social_token(request):
         return responses.TOKEN_GENERATION_ERROR
 
 
-class FollowingViewSet(GenericViewSet):
+class FollowingViewSet(SparseFieldsetMixin, GenericViewSet):
+    sparse_fields = {
+        'id': ['id'],
+        'username': ['username'],
+        'first_name': ['first_name'],
+        'last_name': ['last_name'],
+        'avatar': ['avatar'],
+    }
 
     def get_user(self, request, user_id):
         if user_id == 'me':
@@ -217,10 +226,15 @@ class FollowingViewSet(GenericViewSet):
             queryset = target_user.following.all()
             lookup_field = 'author'
 
+        queryset = self.get_sparse_queryset(
+            queryset.select_related(lookup_field),
+            prefix=f'{lookup_field}__'
+        )
         page = self.paginate_queryset(queryset)
         serializer = serializers.ShortUserProfileSerializer(
             [getattr(obj, lookup_field) for obj in page],
-            many=True
+            many=True,
+            context=self.get_serializer_context()
         )
         paginated_response = super().get_paginated_response(serializer.data)
         return responses.create_response(